@@ -1,20 +1,41 @@
+import copy
 from datetime import datetime
 from random import choice
-from typing import Any, Dict
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 
-from app.core.config import GENERAL_INTENTS
+from app.core.config import GENERAL_INTENTS, INTENT_CONFIDENCE_THRESHOLD
 from app.core.logger import logger
-from app.utils.text_utils import expand_with_synonyms
+from app.core.metrics import trace
+from app.services.intent_matcher import get_intent_matcher
 from app.session.persona_store import resolve_persona
-from app.session.session_context import save_to_context_history
-from app.session.memory_manager import get_or_create_memory
-from app.llm_client import validate_with_llm
+from app.session.session_context import save_to_context_history, get_context_text
+from app.session.history_summarizer import schedule_summary
+from app.llm_client import LLMStreamInterrupted, validate_with_llm, stream_validate_with_llm
 from app.agents.flowbot.form_manager import FormManager
 
+# Per-intent "llm_polish" policies in general_intents.json
+LLM_POLISH_NEVER = "never"
+LLM_POLISH_LOW_CONFIDENCE = "low_confidence"
+LLM_POLISH_ALWAYS = "always"
+DEFAULT_LLM_POLISH = LLM_POLISH_LOW_CONFIDENCE
+
 
 class FlowBot:
-    def __init__(self, user_id: str, avatar: str = "default"):
+    def __init__(self, user_id: str, avatar: str = "default", form_manager: Optional[FormManager] = None):
         self.user_id = user_id
+        self._bind_persona(avatar)
+
+        self.intents = GENERAL_INTENTS
+        self.matcher = get_intent_matcher()
+        # One FormManager (and DB session) per conversation, shared across personas
+        self.form_manager = form_manager or FormManager(user_id)
+
+        logger.info(
+            f"[FlowBot Init] user_id={self.user_id}, avatar={self.avatar}, "
+            f"persona_key={self.persona_key}, style={self.style}, icon={self.icon}"
+        )
+
+    def _bind_persona(self, avatar: str) -> None:
         self.avatar = avatar
 
         # Resolve persona config from avatar
@@ -28,15 +49,15 @@ class FlowBot:
         )
         self.fallback_template = persona_config.get("fallback", "")
 
-        self.intents = GENERAL_INTENTS
-        # LangChain ConversationBufferMemory
-        self.memory = get_or_create_memory(user_id)
-        self.form_manager = FormManager(user_id)
+    def with_persona(self, avatar: str) -> "FlowBot":
+        """A bot for the same conversation in another persona, sharing this one's FormManager."""
+        bot = copy.copy(self)
+        bot._bind_persona(avatar)
+        return bot
 
-        logger.info(
-            f"[FlowBot Init] user_id={self.user_id}, avatar={self.avatar}, "
-            f"persona_key={self.persona_key}, style={self.style}, icon={self.icon}"
-        )
+    async def close(self) -> None:
+        """Release the DB connection. The bot stays usable; the next query reconnects."""
+        await self.form_manager.close()
 
     def _placeholder_values(self) -> Dict[str, str]:
         now = datetime.now()
@@ -94,54 +115,59 @@ class FlowBot:
             f"[Greeting] avatar={self.avatar}, persona={self.persona_key}, greeting={greeting}")
         return greeting
 
-    async def handle_message(self, message: str) -> str:
+    async def _resolve_reply(self, message: str) -> Tuple[str, bool]:
+        """
+        Produce the local reply for a message.
+
+        Returns:
+            (reply, needs_polish) — form and application-start replies are
+            final; intent and fallback replies may still need LLM polishing.
+        """
         # 1. Check if FormManager wants to handle it (Active Application)
-        history = self.memory.load_memory_variables({})
-        form_response = self.form_manager.handle_message(message, str(history))
+        history = get_context_text(self.user_id)
+        with trace("form_manager"):
+            form_response = await self.form_manager.handle_message(message, history)
         if form_response:
-            save_to_context_history(self.user_id, "user", message)
-            save_to_context_history(self.user_id, "bot", form_response)
-            return form_response
+            return form_response, False
 
         candidate_reply = None
-        msg_variants = expand_with_synonyms(message)
-        logger.debug(f"[Match Debug] msg_variants={msg_variants}")
-
-        for intent_name, intent_data in self.intents.items():
-            for pattern in intent_data.get("patterns", []):
-                pattern_variants = expand_with_synonyms(pattern)
-                logger.debug(
-                    f"[Match Debug] intent={intent_name}, pattern_variants={pattern_variants}")
-
-                if any(
-                    mv == pv or mv in pv or pv in mv
-                    for mv in msg_variants
-                    for pv in pattern_variants
-                ):
-                    # Special handling for starting a permit
-                    if intent_name == "tollgate_2":  # Assuming tollgate_2 is Permit to Build
-                        # Start the application flow
-                        start_msg = self.form_manager.start_application(
-                            "Permit to Build")
-                        save_to_context_history(self.user_id, "user", message)
-                        save_to_context_history(self.user_id, "bot", start_msg)
-                        return start_msg
-
-                    candidate_reply = self._format_response(intent_data)
-                    logger.info(
-                        f"[Intent Matched] user_id={self.user_id}, intent={intent_name}")
-                    break
-            if candidate_reply:
-                break
-                candidate_reply = self._format_response(intent_data)
-                logger.info(
-                    f"[Intent Matched] user_id={self.user_id}, intent={intent_name}")
-                break
-            if candidate_reply:
-                break
+        needs_polish = True
+        with trace("intent_match"):
+            match = self.matcher.match(message)
+
+        if match:
+            intent_name = match.intent
+            # Special handling for starting a permit
+            if intent_name == "tollgate_2":  # Assuming tollgate_2 is Permit to Build
+                # Start the application flow
+                start_msg = await self.form_manager.start_application(
+                    "Permit to Build")
+                return start_msg, False
+
+            intent_data = self.intents[intent_name]
+            candidate_reply = self._format_response(intent_data)
+            needs_polish = self._needs_llm_polish(intent_data, match.confidence)
+            logger.info(
+                f"[Intent Matched] user_id={self.user_id}, intent={intent_name}, "
+                f"confidence={match.confidence:.2f}, polish={needs_polish}")
 
         if not candidate_reply:
             candidate_reply = self._handle_failback(message)
+            needs_polish = True
+
+        return candidate_reply, needs_polish
+
+    def _remember_turn(self, message: str, reply: str) -> None:
+        save_to_context_history(self.user_id, "user", message)
+        save_to_context_history(self.user_id, "bot", reply)
+        # Fold older turns into the running summary in the background
+        schedule_summary(self.user_id)
+
+    async def handle_message(self, message: str) -> str:
+        candidate_reply, needs_polish = await self._resolve_reply(message)
+        if not needs_polish:
+            self._remember_turn(message, candidate_reply)
+            return candidate_reply
 
         try:
             validated_reply = await validate_with_llm(
@@ -152,8 +178,7 @@ class FlowBot:
                 candidate_reply=candidate_reply
             )
             if validated_reply and validated_reply.strip():
-                save_to_context_history(self.user_id, "user", message)
-                save_to_context_history(self.user_id, "bot", validated_reply)
+                self._remember_turn(message, validated_reply)
                 logger.debug(
                     f"[LLM Validation] Pre: {candidate_reply} | Post: {validated_reply}")
                 return validated_reply
@@ -161,10 +186,55 @@ class FlowBot:
             logger.warning(f"[LLM Validation Skipped] {e}")
 
         # Save fallback or unvalidated reply
-        save_to_context_history(self.user_id, "user", message)
-        save_to_context_history(self.user_id, "bot", candidate_reply)
+        self._remember_turn(message, candidate_reply)
         return candidate_reply
 
+    async def stream_message(self, message: str) -> AsyncIterator[str]:
+        """
+        Streaming variant of handle_message: yields reply text as it is
+        produced. Replies that need no LLM polishing are yielded whole.
+
+        Raises:
+            LLMStreamInterrupted: The model failed mid-reply; the candidate
+                reply (its `fallback`) is what was stored in history.
+        """
+        candidate_reply, needs_polish = await self._resolve_reply(message)
+        if not needs_polish:
+            self._remember_turn(message, candidate_reply)
+            yield candidate_reply
+            return
+
+        parts: List[str] = []
+        try:
+            async for delta in stream_validate_with_llm(
+                session_id=self.user_id,
+                persona_key=self.persona_key,
+                style=self.style,
+                user_message=message,
+                candidate_reply=candidate_reply
+            ):
+                parts.append(delta)
+                yield delta
+        except LLMStreamInterrupted:
+            # The partial text is discarded; remember the reply that replaces it
+            self._remember_turn(message, candidate_reply)
+            raise
+
+        streamed_reply = "".join(parts).strip()
+        self._remember_turn(message, streamed_reply or candidate_reply)
+        logger.debug(
+            f"[LLM Stream] Pre: {candidate_reply} | Post: {streamed_reply}")
+
+    @staticmethod
+    def _needs_llm_polish(intent_data: Dict[str, Any], confidence: float) -> bool:
+        """Apply the intent's llm_polish policy to a match confidence."""
+        policy = intent_data.get("llm_polish", DEFAULT_LLM_POLISH)
+        if policy == LLM_POLISH_NEVER:
+            return False
+        if policy == LLM_POLISH_LOW_CONFIDENCE:
+            return confidence < INTENT_CONFIDENCE_THRESHOLD
+        return True
+
     def _format_response(self, intent_data: Dict[str, Any]) -> str:
         responses = intent_data.get("responses", {})
         persona_responses = responses.get(
@@ -1,10 +1,15 @@
 import json
 from typing import Optional, Dict, Any, List
-from app.services.application_service import ApplicationService
+from app.db.models import Application
+from app.services.application_service import ApplicationUnitOfWork, AsyncApplicationService
+from app.services.review_engine import run_sme_reviews, summarize_reviews, SME_REVIEW_JOB
+from app.services.job_queue import get_job_queue
 from app.langchain_config import get_llm
 from langchain.prompts import PromptTemplate
 from langchain_core.output_parsers import JsonOutputParser
 from app.core.logger import logger
+from app.core.metrics import trace
+from app.langchain_config import get_llm_provider
 
 # Define required fields for Permit to Build
 REQUIRED_FIELDS = {
@@ -41,15 +46,22 @@ JSON only:
 class FormManager:
     def __init__(self, user_id: str):
         self.user_id = user_id
-        self.app_service = ApplicationService()
+        self.app_service = AsyncApplicationService()
         self.llm = get_llm(temperature=0)
 
-    def handle_message(self, message: str, history: str) -> Optional[str]:
+    async def handle_message(self, message: str, history: str) -> Optional[str]:
         """
         Returns a response string if the form manager handled the message.
         Returns None if the message should be handled by the normal FlowBot intent matcher.
+
+        The turn runs in one unit of work: the active application is loaded
+        once and all changes are committed together.
         """
-        app = self.app_service.get_active_application_by_session(self.user_id)
+        async with self.app_service.unit_of_work(self.user_id) as uow:
+            return await self._handle_turn(uow, message, history)
+
+    async def _handle_turn(self, uow: ApplicationUnitOfWork, message: str, history: str) -> Optional[str]:
+        app = uow.application
 
         # If no active app, check if user wants to start one (simple keyword check for now, or rely on FlowBot to call create)
         # Actually, FlowBot should detect "start permit" intent and call create_application.
@@ -68,49 +80,55 @@ class FormManager:
         if not missing:
             # All fields present, waiting for submission confirmation
             if "submit" in message.lower() or "yes" in message.lower():
-                self.app_service.submit_application(app.id)
-                # Trigger SMEs here or return a message saying it's started
-                # For now, just return message. The Orchestrator/Service should handle the async trigger.
-                return self._trigger_reviews(app.id)
+                return await self._submit(uow)
             else:
                 return "All fields are collected. Ready to submit? (Yes/No)"
 
         # Extract data
-        extracted = self._extract_data(message, history, missing)
+        with trace("llm_extraction", provider=get_llm_provider()):
+            extracted = await self._extract_data(message, history, missing)
 
         if extracted.get("intent") == "cancel":
             # TODO: Cancel application
             return "Application cancelled."
 
         if extracted.get("intent") == "submit" and not missing:
-            self.app_service.submit_application(app.id)
-            return self._trigger_reviews(app.id)
+            return await self._submit(uow)
 
-        # Update DB with extracted fields
+        # Stage extracted fields (committed once at the end of the turn)
         # Filter out 'intent' key
         fields_to_update = {k: v for k, v in extracted.items() if k in missing}
 
         if fields_to_update:
-            self.app_service.update_application_data(app.id, fields_to_update)
+            uow.update_data(fields_to_update)
             # Recalculate missing
             missing = [
                 f for f in REQUIRED_FIELDS if f not in current_data and f not in fields_to_update]
 
         if not missing:
-            return f"Great! I have all the details:\n{self._format_summary(app.id)}\n\nReady to submit?"
+            return f"Great! I have all the details:\n{self._format_summary(app)}\n\nReady to submit?"
 
         # Ask for next missing field
         next_field = missing[0]
         return REQUIRED_FIELDS[next_field]
 
-    def start_application(self, permit_type: str) -> str:
-        self.app_service.create_application(self.user_id, permit_type)
+    async def _submit(self, uow: ApplicationUnitOfWork) -> str:
+        uow.submit()
+        # Reviews read the submitted application, so commit before triggering them
+        await uow.commit()
+        return await self._trigger_reviews(uow.application)
+
+    async def close(self) -> None:
+        await self.app_service.close()
+
+    async def start_application(self, permit_type: str) -> str:
+        await self.app_service.create_application(self.user_id, permit_type)
         return f"Starting a new {permit_type} application. " + REQUIRED_FIELDS["project_name"]
 
-    def _extract_data(self, message: str, history: str, missing: List[str]) -> Dict[str, Any]:
+    async def _extract_data(self, message: str, history: str, missing: List[str]) -> Dict[str, Any]:
         chain = extraction_prompt | self.llm | JsonOutputParser()
         try:
-            return chain.invoke({
+            return await chain.ainvoke({
                 "history": history,
                 "message": message,
                 "missing_fields": ", ".join(missing)
@@ -119,39 +137,25 @@ class FormManager:
             logger.error(f"Extraction failed: {e}")
             return {}
 
-    def _format_summary(self, app_id: int) -> str:
-        app = self.app_service.get_application(app_id)
+    @staticmethod
+    def _format_summary(app: Application) -> str:
         data = app.data
         return "\n".join([f"- {k}: {v}" for k, v in data.items()])
 
-    def _trigger_reviews(self, app_id: int) -> str:
-        # This is where we call the SMEs
-        # In a real app, this might be a background task
-        from app.agents.smes.cyber_sme import get_cyber_sme_tool
-        from app.agents.smes.architecture_sme import get_architecture_sme_tool
-
-        app = self.app_service.get_application(app_id)
+    async def _trigger_reviews(self, app: Application) -> str:
+        # With the job queue running, reviews happen in the background and the
+        # outcome is pushed to the session when ready; otherwise run inline.
+        app_id = app.id
+        queue = get_job_queue()
+        if queue.is_running:
+            await queue.enqueue(
+                SME_REVIEW_JOB,
+                {"app_id": app_id, "session_id": self.user_id},
+                job_key=f"{SME_REVIEW_JOB}:{app_id}"
+            )
+            return "Application submitted! Our SMEs are reviewing it now — I'll post their decisions here as soon as they're in."
+
+        # SMEs run concurrently; each decision is persisted as it arrives
         app_str = json.dumps(app.data)
-
-        results = []
-
-        # Cyber SME
-        cyber = get_cyber_sme_tool()
-        cyber_result = cyber.run(app_str)
-        self.app_service.add_review(app_id, "cyber", cyber_result.get(
-            "decision"), cyber_result.get("justification"))
-        results.append(f"Cybersecurity: {cyber_result.get('decision')}")
-
-        # Architecture SME
-        arch = get_architecture_sme_tool()
-        arch_result = arch.run(app_str)
-        self.app_service.add_review(app_id, "architecture", arch_result.get(
-            "decision"), arch_result.get("justification"))
-        results.append(f"Architecture: {arch_result.get('decision')}")
-
-        # Check if all approved
-        if all(r.get("decision") == "approve" for r in [cyber_result, arch_result]):
-            self.app_service.log_event(app_id, "human_review_ready", {})
-            return "SME Reviews Complete. All approved! Application is now ready for Human Review.\n" + "\n".join(results)
-        else:
-            return "SME Reviews Complete. Issues found:\n" + "\n".join(results)
+        reviews = await run_sme_reviews(self.app_service, app_id, app_str)
+        return await summarize_reviews(self.app_service, app_id, reviews)
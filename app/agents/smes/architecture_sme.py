@@ -2,6 +2,7 @@ from langchain.tools import Tool
 from langchain_core.output_parsers import JsonOutputParser
 from app.langchain_config import get_llm
 from langchain.prompts import PromptTemplate
+from app.core.logger import logger
 
 # Define the ArchitectureSME prompt template
 architecture_prompt = PromptTemplate(
@@ -48,8 +49,14 @@ def get_architecture_sme_tool():
         chain = architecture_prompt | llm | ArchitectureSMEOutputParser()
         return chain.invoke({"application": application_str})
 
+    async def arun(application_str: str):
+        logger.debug("[ArchitectureSME] Sending application: %s", application_str)
+        chain = architecture_prompt | llm | ArchitectureSMEOutputParser()
+        return await chain.ainvoke({"application": application_str})
+
     return Tool(
         name="ArchitectureSME",
         func=run,
+        coroutine=arun,
         description="Evaluates permit applications for software architecture alignment and returns a JSON decision."
     )
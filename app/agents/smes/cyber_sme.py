@@ -1,6 +1,7 @@
 from langchain.tools import Tool
 from langchain_core.output_parsers import JsonOutputParser
 from app.langchain_config import get_llm, PROMPTS
+from app.core.logger import logger
 
 class CyberSMEOutputParser(JsonOutputParser):
     def parse(self, text: str):
@@ -31,8 +32,14 @@ def get_cyber_sme_tool():
         chain = prompt | llm | CyberSMEOutputParser()
         return chain.invoke({"application": application_str})
 
+    async def arun(application_str: str):
+        logger.debug("[CyberSME] Sending application: %s", application_str)
+        chain = prompt | llm | CyberSMEOutputParser()
+        return await chain.ainvoke({"application": application_str})
+
     return Tool(
         name="CyberSME",
         func=run,
+        coroutine=arun,
         description="Evaluates permit applications for cybersecurity risks and returns a JSON decision."
     )
\ No newline at end of file
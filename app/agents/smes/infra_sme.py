@@ -3,6 +3,7 @@ from langchain.tools import Tool
 from langchain_core.output_parsers import JsonOutputParser
 from app.langchain_config import get_llm, PROMPTS
 from langchain.prompts import PromptTemplate
+from app.core.logger import logger
 
 # Define the InfraSME prompt template
 infra_prompt = PromptTemplate(
@@ -45,8 +46,14 @@ def get_infra_sme_tool():
         chain = infra_prompt | llm | InfraSMEOutputParser()
         return chain.invoke({"application": application_str})
 
+    async def arun(application_str: str):
+        logger.debug("[InfraSME] Sending application: %s", application_str)
+        chain = infra_prompt | llm | InfraSMEOutputParser()
+        return await chain.ainvoke({"application": application_str})
+
     return Tool(
         name="InfraSME",
         func=run,
+        coroutine=arun,
         description="Evaluates permit applications for infrastructure and operational risks, returns a JSON decision."
     )
\ No newline at end of file
@@ -8,4 +8,15 @@ from app.core.config_loader import (
 )
 
 # Example: expose a global constant from site properties
-MAX_CONTEXT_TURNS = SITE_PROPERTIES.get("MAX_CONTEXT_TURNS", 5)
\ No newline at end of file
+MAX_CONTEXT_TURNS = SITE_PROPERTIES.get("MAX_CONTEXT_TURNS", 5)
+
+# Intent matches scoring at or above this confidence skip LLM polishing
+# when the intent's "llm_polish" policy is "low_confidence"
+INTENT_CONFIDENCE_THRESHOLD = SITE_PROPERTIES.get("INTENT_CONFIDENCE_THRESHOLD", 1.0)
+
+# Stream LLM-polished replies to clients as incremental frames
+STREAM_LLM_REPLIES = SITE_PROPERTIES.get("STREAM_LLM_REPLIES", False)
+
+# At most one streamed "chunk" frame per window; deltas arriving in between
+# are merged (0 sends every delta as its own frame)
+STREAM_COALESCE_MS = SITE_PROPERTIES.get("STREAM_COALESCE_MS", 50)
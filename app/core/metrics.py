@@ -0,0 +1,216 @@
+"""
+metrics.py — Lightweight per-stage tracing and Prometheus metrics.
+
+Responsibilities:
+- Time chat-turn stages (intent match, DB lookups, LLM calls, SME reviews,
+  broadcast) with `trace(stage, **labels)`.
+- Keep histograms and counters per stage and label set.
+- Carry a session/request correlation id through a turn via contextvars.
+- Render everything in Prometheus text format for GET /metrics.
+
+Sampling:
+- METRICS_SAMPLE_RATE (env or site property, default 1.0) is the share of
+  spans recorded. At 0, `trace` returns a shared no-op context manager, so
+  instrumentation costs one function call and a float compare.
+- Sampled spans are also logged at DEBUG with their correlation id.
+
+Future Changes:
+- Export spans to OpenTelemetry when a collector is available.
+"""
+
+import logging
+import os
+import random
+import threading
+import time
+import uuid
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from app.core.config import SITE_PROPERTIES
+from app.core.logger import logger
+
+METRICS_SAMPLE_RATE = float(os.getenv("METRICS_SAMPLE_RATE", SITE_PROPERTIES.get("METRICS_SAMPLE_RATE", 1.0)))
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+# ===== Correlation =====
+_session_id: ContextVar[str] = ContextVar("session_id", default="-")
+_request_id: ContextVar[str] = ContextVar("request_id", default="-")
+
+
+def start_request(session_id: str) -> str:
+    """Begin a traced unit of work (one chat turn) for a session."""
+    request_id = uuid.uuid4().hex[:12]
+    _session_id.set(session_id)
+    _request_id.set(request_id)
+    return request_id
+
+
+def correlation_id() -> str:
+    return f"{_session_id.get()}/{_request_id.get()}"
+
+
+# ===== Metric Types =====
+def _label_key(labels: Dict[str, str]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(key: LabelKey, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(key) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help = help_text
+        self._values: Dict[LabelKey, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(_label_key(labels), 0.0)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for key, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_format_labels(key)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.buckets = tuple(sorted(buckets))
+        # label key -> [per-bucket counts..., +Inf count], sum
+        self._counts: Dict[LabelKey, List[int]] = {}
+        self._sums: Dict[LabelKey, float] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = _label_key(labels)
+        idx = bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._counts.get(key)
+            if counts is None:
+                counts = self._counts[key] = [0] * (len(self.buckets) + 1)
+                self._sums[key] = 0.0
+            counts[idx] += 1
+            self._sums[key] += value
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for key in sorted(self._counts):
+            counts = self._counts[key]
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{_format_labels(key, ('le', repr(bound)))} {cumulative}")
+            cumulative += counts[-1]
+            lines.append(f"{self.name}_bucket{_format_labels(key, ('le', '+Inf'))} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {self._sums[key]}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {cumulative}")
+        return lines
+
+
+class Gauge:
+    """Gauge whose samples are read from a callback at scrape time."""
+
+    def __init__(self, name: str, help_text: str, collect: Callable[[], List[Tuple[Dict[str, str], float]]]):
+        self.name = name
+        self.help = help_text
+        self.collect = collect
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} gauge"]
+        try:
+            samples = self.collect()
+        except Exception as e:
+            logger.warning(f"[Metrics] Gauge {self.name} failed: {e}")
+            samples = []
+        for labels, value in samples:
+            lines.append(f"{self.name}{_format_labels(_label_key(labels))} {value}")
+        return lines
+
+
+# ===== Registry =====
+_registry: Dict[str, object] = {}
+
+
+def counter(name: str, help_text: str) -> Counter:
+    return _registry.setdefault(name, Counter(name, help_text))
+
+
+def histogram(name: str, help_text: str, buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+    return _registry.setdefault(name, Histogram(name, help_text, buckets))
+
+
+def gauge(name: str, help_text: str, collect: Callable[[], List[Tuple[Dict[str, str], float]]]) -> Gauge:
+    _registry[name] = Gauge(name, help_text, collect)
+    return _registry[name]
+
+
+def render_prometheus() -> str:
+    lines: List[str] = []
+    for metric in _registry.values():
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# ===== Stage Tracing =====
+STAGE_DURATION = histogram("permitflow_stage_duration_seconds", "Duration of chat-turn stages.")
+STAGE_TOTAL = counter("permitflow_stage_total", "Chat-turn stage executions by outcome.")
+
+
+class _NoopSpan:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+@contextmanager
+def _span(stage: str, labels: Dict[str, str]) -> Iterator[None]:
+    started = time.perf_counter()
+    status = "ok"
+    try:
+        yield
+    except BaseException:
+        status = "error"
+        raise
+    finally:
+        elapsed = time.perf_counter() - started
+        STAGE_DURATION.observe(elapsed, stage=stage, **labels)
+        STAGE_TOTAL.inc(stage=stage, status=status, **labels)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"[Span] {correlation_id()} stage={stage} {labels} status={status} ms={elapsed * 1000:.1f}")
+
+
+def trace(stage: str, **labels: str):
+    """
+    Time a stage. Use as `with trace("llm_validate", provider="openai"): ...`
+    in sync or async code.
+    """
+    if METRICS_SAMPLE_RATE <= 0 or (METRICS_SAMPLE_RATE < 1 and random.random() >= METRICS_SAMPLE_RATE):
+        return _NOOP_SPAN
+    return _span(stage, labels)
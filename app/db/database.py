@@ -1,12 +1,50 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
 import os
 
+from app.core.logger import logger
+
 # Use SQLite for local development, can be swapped for Azure SQL connection string
 DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./permitflow.db")
 
+# Async driver per backend: aiosqlite locally, asyncpg for Postgres, aioodbc
+# for Azure SQL / SQL Server. ASYNC_DATABASE_URL overrides the mapping (e.g.
+# for other drivers or different connection options).
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "postgres": "postgresql+asyncpg",
+    "mssql": "mssql+aioodbc",
+}
+# Drivers that are already async; URLs using them pass through unchanged
+ASYNC_DRIVER_NAMES = ("aiosqlite", "asyncpg", "aioodbc", "aiomysql", "asyncmy")
+
+# Connection pool for the async engine; size it to the DB's connection budget
+# divided by the number of workers
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+
+# SQLite production profile, applied to every new connection. WAL lets readers
+# run alongside the single writer; synchronous=NORMAL is durable under WAL
+# except for the last commits on power loss. SQLITE_PROFILE=default keeps
+# SQLite's stock rollback-journal behaviour (used as the benchmark baseline).
+SQLITE_PROFILE = os.getenv("SQLITE_PROFILE", "wal").lower()
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "busy_timeout": int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000")),
+    "mmap_size": int(os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024))),
+    # Negative values are KiB rather than pages
+    "cache_size": -int(os.getenv("SQLITE_CACHE_SIZE_KB", "65536")),
+    "temp_store": "MEMORY",
+}
+
 engine = create_engine(
-    DATABASE_URL, 
+    DATABASE_URL,
     connect_args={"check_same_thread": False} if "sqlite" in DATABASE_URL else {}
 )
 
@@ -14,9 +52,107 @@ SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
 
+
+def to_async_url(url: str) -> str:
+    """Map a sync DATABASE_URL to its async driver (explicit async drivers pass through)."""
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if parsed.drivername != backend and parsed.get_driver_name() in ASYNC_DRIVER_NAMES:
+        return url
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for database backend '{backend}'")
+    return parsed.set(drivername=ASYNC_DRIVERS[backend]).render_as_string(hide_password=False)
+
+
+def _async_engine_options(url: str) -> dict:
+    parsed = make_url(url)
+    if parsed.get_backend_name() == "sqlite" and parsed.database in (None, "", ":memory:"):
+        return {}  # in-memory SQLite uses a single static connection
+    options = {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+    }
+    if parsed.get_backend_name() != "sqlite":
+        options["pool_pre_ping"] = True
+    return options
+
+
+class AsyncDatabaseUnavailable(AsyncSession):
+    """Session class used when no async engine could be set up; fails on first use, not at import."""
+    reason = ""
+
+    def __init__(self, *args, **kwargs):
+        raise RuntimeError(f"Async database access is unavailable: {self.reason}. "
+                           f"Set ASYNC_DATABASE_URL to an async driver URL for this database.")
+
+
+def _create_async_engines():
+    url = os.getenv("ASYNC_DATABASE_URL") or to_async_url(DATABASE_URL)
+    options = _async_engine_options(url)
+    reader = create_async_engine(url, **options)
+    # The single writer (app/db/write_queue.py) gets its own connection so it
+    # can never wait behind readers holding every pooled connection
+    writer = create_async_engine(url, pool_size=1, max_overflow=0) if options else reader
+    return url, reader, writer
+
+
+try:
+    ASYNC_DATABASE_URL, async_engine, async_write_engine = _create_async_engines()
+    _async_session_class = AsyncSession
+except (ValueError, ImportError, exc.InvalidRequestError) as e:
+    # The sync engine still works (e.g. admin scripts); async callers get the error
+    logger.warning(f"[Database] No async engine for '{make_url(DATABASE_URL).get_backend_name()}': {e}")
+    ASYNC_DATABASE_URL, async_engine, async_write_engine = None, None, None
+    AsyncDatabaseUnavailable.reason = str(e)
+    _async_session_class = AsyncDatabaseUnavailable
+
+# Objects stay readable after commit so callers can use them without a reload
+AsyncSessionLocal = async_sessionmaker(
+    async_engine, class_=_async_session_class, autoflush=False, expire_on_commit=False)
+AsyncWriteSessionLocal = async_sessionmaker(
+    async_write_engine, class_=_async_session_class, autoflush=False, expire_on_commit=False)
+
+
+def is_sqlite(url: str = DATABASE_URL) -> bool:
+    return make_url(url).get_backend_name() == "sqlite"
+
+
+def _apply_sqlite_pragmas(dbapi_connection, connection_record) -> None:
+    cursor = dbapi_connection.cursor()
+    try:
+        for name, value in SQLITE_PRAGMAS.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+    finally:
+        cursor.close()
+
+
+if is_sqlite() and SQLITE_PROFILE != "default":
+    event.listen(engine, "connect", _apply_sqlite_pragmas)
+    if async_engine is not None:
+        event.listen(async_engine.sync_engine, "connect", _apply_sqlite_pragmas)
+    if async_write_engine is not async_engine:
+        event.listen(async_write_engine.sync_engine, "connect", _apply_sqlite_pragmas)
+
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+async def dispose_engines():
+    """Close pooled connections on shutdown."""
+    if async_engine is not None:
+        await async_engine.dispose()
+    if async_write_engine is not async_engine:
+        await async_write_engine.dispose()
+    engine.dispose()
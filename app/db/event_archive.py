@@ -0,0 +1,238 @@
+"""
+event_archive.py — Compressed on-disk archive of old EventLog rows.
+
+Responsibilities:
+- Store archived events as immutable gzip JSONL segments, one event per
+  line, each covering a contiguous id range.
+- Keep an index (index.json) of the segments with their id, time and
+  application id ranges and event types, so readers open only the segments
+  that can match.
+- Read archived events back in id order with the same filters as
+  /db/event_logs (used by the NDJSON export and the analytics backfill).
+
+Segments are written to a temp file, fsynced and renamed before the index is
+updated, and the index is replaced atomically. Every archived event has a
+lower id than every event still in the database (retention archives an id
+prefix), so the highest archived id is a watermark separating the two.
+
+Future Changes:
+- Upload sealed segments to object storage.
+"""
+
+import gzip
+import json
+import os
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from app.core.logger import logger
+from app.core.metrics import gauge
+
+# ===== Settings =====
+EVENT_LOG_ARCHIVE_DIR = os.getenv("EVENT_LOG_ARCHIVE_DIR", "./event_archive")
+
+INDEX_FILE = "index.json"
+SEGMENT_PATTERN = "events-{first_id:012d}-{last_id:012d}.jsonl.gz"
+
+
+def _naive_utc(ts: Optional[datetime]) -> Optional[datetime]:
+    if ts is not None and ts.tzinfo is not None:
+        ts = ts.astimezone(timezone.utc).replace(tzinfo=None)
+    return ts
+
+
+def _isoformat(ts: Optional[datetime]) -> Optional[str]:
+    return ts.isoformat() if ts is not None else None
+
+
+def _parse(ts: Optional[str]) -> Optional[datetime]:
+    return datetime.fromisoformat(ts) if ts else None
+
+
+def _holds_any(segment: Dict[str, Any], app_ids: set) -> bool:
+    """Whether the segment's application id range can contain one of `app_ids`."""
+    if "application_ids" not in segment:
+        return True  # indexed before ranges were recorded
+    if segment["application_ids"] is None:
+        return False
+    low, high = segment["application_ids"]
+    return any(low <= app_id <= high for app_id in app_ids)
+
+
+class EventArchive:
+    """Segment files plus their index in one directory."""
+
+    def __init__(self, directory: str = EVENT_LOG_ARCHIVE_DIR):
+        self.directory = Path(directory)
+
+    @property
+    def index_path(self) -> Path:
+        return self.directory / INDEX_FILE
+
+    def segments(self) -> List[Dict[str, Any]]:
+        """Index entries ordered by id range."""
+        try:
+            return json.loads(self.index_path.read_text())["segments"]
+        except FileNotFoundError:
+            return []
+
+    @property
+    def watermark(self) -> int:
+        """Highest archived event id (0 when nothing is archived)."""
+        segments = self.segments()
+        return segments[-1]["last_id"] if segments else 0
+
+    def stats(self) -> Dict[str, Any]:
+        segments = self.segments()
+        return {
+            "directory": str(self.directory),
+            "segments": len(segments),
+            "events": sum(s["rows"] for s in segments),
+            "bytes": sum(s["bytes"] for s in segments),
+            "watermark": segments[-1]["last_id"] if segments else 0,
+        }
+
+    # ---------------------------------------------------------------
+    # Writing
+    # ---------------------------------------------------------------
+    def write_segment(self, events: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Archive `events` (dicts with the EventLog columns, ascending ids above
+        the watermark) as one segment and add it to the index.
+        """
+        watermark = self.watermark
+        if not events or events[0]["id"] <= watermark:
+            raise ValueError(f"Segment must start above the archive watermark {watermark}")
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        first_id, last_id = events[0]["id"], events[-1]["id"]
+        path = self.directory / SEGMENT_PATTERN.format(first_id=first_id, last_id=last_id)
+        tmp = path.with_suffix(".tmp")
+        with open(tmp, "wb") as raw:
+            with gzip.GzipFile(fileobj=raw, mode="wb", mtime=0) as out:
+                for event in events:
+                    line = {**event, "timestamp": _isoformat(event.get("timestamp"))}
+                    out.write(json.dumps(line, separators=(",", ":"), default=str).encode() + b"\n")
+            raw.flush()
+            os.fsync(raw.fileno())
+        os.replace(tmp, path)
+
+        timestamps = [_naive_utc(e["timestamp"]) for e in events if e.get("timestamp") is not None]
+        app_ids = [e["application_id"] for e in events if e.get("application_id") is not None]
+        entry = {
+            "file": path.name,
+            "first_id": first_id,
+            "last_id": last_id,
+            "rows": len(events),
+            "bytes": path.stat().st_size,
+            "first_timestamp": _isoformat(min(timestamps)) if timestamps else None,
+            "last_timestamp": _isoformat(max(timestamps)) if timestamps else None,
+            "event_types": sorted({e["event_type"] for e in events if e.get("event_type")}),
+            "application_ids": [min(app_ids), max(app_ids)] if app_ids else None,
+            "archived_at": datetime.now(timezone.utc).isoformat(),
+        }
+        self._write_index(self.segments() + [entry])
+        logger.info(f"[EventArchive] segment={path.name} rows={len(events)} bytes={entry['bytes']}")
+        return entry
+
+    def _write_index(self, segments: List[Dict[str, Any]]) -> None:
+        tmp = self.index_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps({"segments": segments}, indent=1))
+        os.replace(tmp, self.index_path)
+
+    # ---------------------------------------------------------------
+    # Reading
+    # ---------------------------------------------------------------
+    def read(
+        self,
+        after_id: Optional[int] = None,
+        event_type: Optional[str] = None,
+        application_id: Optional[int] = None,
+        since: Optional[datetime] = None,
+        until: Optional[datetime] = None,
+        through_id: Optional[int] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Archived events in id order, filtered like /db/event_logs ([since, until)
+        by timestamp). `through_id` stops at a watermark read earlier, so a
+        segment archived meanwhile is not read twice.
+        """
+        since, until = _naive_utc(since), _naive_utc(until)
+        for segment in self._matching(self.segments(), after_id, event_type, since, until, application_id):
+            if through_id is not None and segment["first_id"] > through_id:
+                break
+            for event in self._read_segment(segment):
+                if after_id is not None and event["id"] <= after_id:
+                    continue
+                if event_type and event.get("event_type") != event_type:
+                    continue
+                if application_id is not None and event.get("application_id") != application_id:
+                    continue
+                ts = _naive_utc(event["timestamp"])
+                if since is not None and (ts is None or ts < since):
+                    continue
+                if until is not None and (ts is None or ts >= until):
+                    continue
+                yield event
+
+    def fingerprints(self, first_id: int, last_id: int) -> Dict[int, Tuple[Optional[str], Optional[datetime]]]:
+        """id -> (event_type, naive UTC timestamp) of the archived events in [first_id, last_id]."""
+        return {
+            event["id"]: (event.get("event_type"), _naive_utc(event["timestamp"]))
+            for event in self.read(after_id=first_id - 1, through_id=last_id)
+            if event["id"] <= last_id
+        }
+
+    def start_times(self, app_ids: Iterable[int], event_types: Iterable[str]) -> Dict[int, Dict[str, datetime]]:
+        """Earliest archived timestamp of each of `event_types` per application (only those found)."""
+        wanted, event_types = set(app_ids), set(event_types)
+        found: Dict[int, Dict[str, datetime]] = {}
+        for segment in self.segments():
+            if not event_types.intersection(segment["event_types"]):
+                continue
+            if not _holds_any(segment, wanted):
+                continue
+            for event in self._read_segment(segment):
+                app_id = event.get("application_id")
+                if app_id in wanted and event.get("event_type") in event_types:
+                    found.setdefault(app_id, {}).setdefault(event["event_type"], event["timestamp"])
+        return found
+
+    @staticmethod
+    def _matching(segments: Iterable[Dict[str, Any]], after_id, event_type, since, until, application_id=None):
+        for segment in segments:
+            if application_id is not None and not _holds_any(segment, {application_id}):
+                continue
+            if after_id is not None and segment["last_id"] <= after_id:
+                continue
+            if event_type and event_type not in segment["event_types"]:
+                continue
+            last_ts, first_ts = _parse(segment["last_timestamp"]), _parse(segment["first_timestamp"])
+            if since is not None and (last_ts is None or last_ts < since):
+                continue
+            if until is not None and (first_ts is None or first_ts >= until):
+                continue
+            yield segment
+
+    def _read_segment(self, segment: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+        with gzip.open(self.directory / segment["file"], "rb") as lines:
+            for line in lines:
+                event = json.loads(line)
+                event["timestamp"] = _parse(event.get("timestamp"))
+                yield event
+
+
+# ===== Shared Instance =====
+event_archive = EventArchive()
+
+
+def get_event_archive() -> EventArchive:
+    return event_archive
+
+
+gauge(
+    "permitflow_event_archive_segments",
+    "EventLog archive segments on disk.",
+    lambda: [({}, len(event_archive.segments()))]
+)
@@ -0,0 +1,216 @@
+"""
+event_writer.py — Write-behind batching for EventLog (audit) rows.
+
+Responsibilities:
+- Buffer audit events in memory and insert them in one transaction per
+  EVENT_LOG_BATCH_SIZE events or EVENT_LOG_FLUSH_MS milliseconds, whichever
+  comes first, instead of a commit per event.
+- Go through the single writer (app/db/write_queue.py) like every other write.
+- Update the hourly analytics rollups in the same transaction as each batch
+  (app/services/analytics.py), inside a savepoint: if the rollups fail they
+  are rolled back and logged, and the events are still written.
+- Flush everything still buffered on shutdown (app.main lifespan).
+- Synchronous mode (EVENT_LOG_WRITE_MODE="sync") writes each event before
+  returning, for tests and debugging.
+
+Events keep the timestamp of the moment they were logged, not of the flush.
+If a flush fails, its rows return to the buffer and are retried with the next
+batch. On shutdown the flusher is signalled rather than cancelled, so a
+flush in progress completes before the rest of the buffer is written.
+Buffered events are lost if the process is killed without shutdown.
+
+Future Changes:
+- Spill the buffer to disk when the database is unavailable for long.
+"""
+
+import asyncio
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import SITE_PROPERTIES
+from app.core.logger import logger
+from app.core.metrics import counter, gauge, histogram
+from app.db.database import AsyncSessionLocal
+from app.db.models import EventLog
+from app.db.write_queue import run_write
+from app.services.analytics import apply_event_rollups
+
+# ===== Settings =====
+WRITE_BEHIND = "behind"
+WRITE_SYNC = "sync"
+
+EVENT_LOG_WRITE_MODE = SITE_PROPERTIES.get("EVENT_LOG_WRITE_MODE", WRITE_BEHIND)
+EVENT_LOG_BATCH_SIZE = SITE_PROPERTIES.get("EVENT_LOG_BATCH_SIZE", 50)
+EVENT_LOG_FLUSH_MS = SITE_PROPERTIES.get("EVENT_LOG_FLUSH_MS", 200)
+# Hard cap on buffered rows while flushes are failing; the oldest are dropped
+EVENT_LOG_MAX_BUFFER = SITE_PROPERTIES.get("EVENT_LOG_MAX_BUFFER", 10000)
+ANALYTICS_ROLLUPS_ENABLED = SITE_PROPERTIES.get("ANALYTICS_ROLLUPS_ENABLED", True)
+
+# ===== Metrics =====
+FLUSH_ROWS = histogram(
+    "permitflow_event_log_flush_rows",
+    "EventLog rows inserted per flush.",
+    buckets=(1, 2, 5, 10, 25, 50, 100, 250, 500))
+FLUSH_SECONDS = histogram(
+    "permitflow_event_log_flush_seconds",
+    "Time to insert and commit one EventLog batch.",
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0))
+EVENTS = counter("permitflow_event_log_events_total", "EventLog rows by outcome.")
+ROLLUP_FAILURES = counter("permitflow_event_log_rollup_failures_total", "EventLog batches whose analytics rollups failed.")
+
+
+class EventLogWriter:
+    """Buffers EventLog rows and inserts them in batches."""
+
+    def __init__(
+        self,
+        mode: str = EVENT_LOG_WRITE_MODE,
+        batch_size: int = EVENT_LOG_BATCH_SIZE,
+        flush_ms: float = EVENT_LOG_FLUSH_MS,
+        max_buffer: int = EVENT_LOG_MAX_BUFFER,
+    ):
+        if mode not in (WRITE_BEHIND, WRITE_SYNC):
+            logger.warning(f"[EventLog] Unknown EVENT_LOG_WRITE_MODE '{mode}', using {WRITE_BEHIND}")
+            mode = WRITE_BEHIND
+        self.mode = mode
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = max(0.0, flush_ms) / 1000
+        self.max_buffer = max(self.batch_size, max_buffer)
+        self._buffer: List[Dict[str, Any]] = []
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._pending: Optional[asyncio.Event] = None
+        self._full: Optional[asyncio.Event] = None
+        self._stopping = False
+
+    def __len__(self) -> int:
+        return len(self._buffer)
+
+    async def log(self, app_id: Optional[int], event_type: str, details: Optional[dict] = None) -> None:
+        """Record an audit event; in write-behind mode this only buffers it."""
+        row = {
+            "application_id": app_id,
+            "event_type": event_type,
+            "details": details or {},
+            "timestamp": datetime.now(timezone.utc),
+        }
+        if self.mode == WRITE_SYNC:
+            await self._insert([row])
+            return
+
+        self._ensure_started()
+        self._buffer.append(row)
+        if len(self._buffer) > self.max_buffer:
+            dropped = len(self._buffer) - self.max_buffer
+            del self._buffer[:dropped]
+            EVENTS.inc(dropped, outcome="dropped")
+            logger.error(f"[EventLog] Buffer over {self.max_buffer} rows; dropped {dropped} oldest events")
+        self._pending.set()
+        if len(self._buffer) >= self.batch_size:
+            self._full.set()
+
+    async def flush(self) -> int:
+        """Insert everything buffered now. Returns the number of rows written."""
+        rows, self._buffer = self._buffer, []
+        if not rows:
+            return 0
+        try:
+            await self._insert(rows)
+        except Exception as e:
+            # Put them back ahead of anything logged meanwhile
+            self._buffer[:0] = rows
+            EVENTS.inc(len(rows), outcome="retry")
+            logger.warning(f"[EventLog] Flush of {len(rows)} events failed, will retry: {e}")
+            return 0
+        return len(rows)
+
+    async def stop(self) -> None:
+        """Stop the flusher and write out the remaining buffer."""
+        if self._task and self._loop is not asyncio.get_running_loop():
+            self._task = None  # left behind by a loop that is gone
+        if self._task:
+            # Let an in-flight flush finish rather than cancelling it: its rows
+            # are out of the buffer and its write may already be queued
+            self._stopping = True
+            self._pending.set()
+            self._full.set()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+            self._stopping = False
+        remaining = len(self._buffer)
+        if remaining:
+            written = await self.flush()
+            logger.info(f"[EventLog] Shutdown flush wrote {written}/{remaining} buffered events")
+
+    # ---------------------------------------------------------------
+    # Internals
+    # ---------------------------------------------------------------
+    def _ensure_started(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._task and self._loop is loop and not self._task.done():
+            return
+        self._loop = loop
+        self._pending = asyncio.Event()
+        self._full = asyncio.Event()
+        self._task = loop.create_task(self._flusher(), name="event-log-writer")
+
+    async def _flusher(self) -> None:
+        while not self._stopping:
+            await self._pending.wait()
+            # Give the batch until the flush interval to fill up
+            try:
+                await asyncio.wait_for(self._full.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._pending.clear()
+            self._full.clear()
+            written = await self.flush()
+            if self._buffer and not written and not self._stopping:
+                await asyncio.sleep(self.flush_interval or 0.1)  # back off while failing
+            if self._buffer:
+                self._pending.set()
+
+    @staticmethod
+    async def _insert(rows: List[Dict[str, Any]]) -> None:
+        async def work(db: AsyncSession) -> None:
+            await db.execute(insert(EventLog), rows)
+            if ANALYTICS_ROLLUPS_ENABLED:
+                await EventLogWriter._apply_rollups(db, rows)
+
+        started = time.perf_counter()
+        async with AsyncSessionLocal() as db:
+            await run_write(work, db)
+        FLUSH_SECONDS.observe(time.perf_counter() - started)
+        FLUSH_ROWS.observe(len(rows))
+        EVENTS.inc(len(rows), outcome="written")
+
+
+    @staticmethod
+    async def _apply_rollups(db: AsyncSession, rows: List[Dict[str, Any]]) -> None:
+        # Best effort, in a savepoint: a rollup failure never costs the events
+        try:
+            async with db.begin_nested():
+                await apply_event_rollups(db, rows)
+        except Exception as e:
+            ROLLUP_FAILURES.inc()
+            logger.error(f"[EventLog] Rollups for {len(rows)} events failed (rebuild with "
+                         f"scripts/backfill_analytics.py): {e}")
+
+
+# ===== Shared Instance =====
+event_writer = EventLogWriter()
+
+
+def get_event_writer() -> EventLogWriter:
+    return event_writer
+
+
+gauge(
+    "permitflow_event_log_buffered",
+    "EventLog rows waiting to be flushed.",
+    lambda: [({}, len(event_writer))]
+)
@@ -1,10 +1,65 @@
-from app.db.database import engine, Base
-from app.db.models import Application, Review, EventLog
+from sqlalchemy import text
+
+from app.db.database import engine, Base, is_sqlite
+from app.db.event_archive import get_event_archive
+from app.db.models import Application, Review, EventLog, Job, HourlyRollup
 
 def init_db():
     print("Creating database tables...")
     Base.metadata.create_all(bind=engine)
+    if is_sqlite():
+        _migrate_event_log_autoincrement()
+    # create_all skips existing tables, so add indexes introduced since
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+    _reserve_archived_event_ids()
     print("Tables created successfully.")
 
+
+def _migrate_event_log_autoincrement():
+    """
+    Rebuild an event_logs table created before ids were AUTOINCREMENT.
+    Without it SQLite reuses the ids of deleted (archived) rows.
+    """
+    with engine.begin() as conn:
+        row = conn.execute(text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'event_logs'")).first()
+        if row is None or "AUTOINCREMENT" in row.sql.upper():
+            return
+        print("Migrating event_logs to AUTOINCREMENT ids...")
+        indexes = conn.execute(text(
+            "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'event_logs' AND sql IS NOT NULL"
+        )).scalars().all()
+        for name in indexes:
+            conn.execute(text(f'DROP INDEX "{name}"'))
+        conn.execute(text("ALTER TABLE event_logs RENAME TO event_logs_old"))
+        EventLog.__table__.create(conn)
+        columns = ", ".join(column.name for column in EventLog.__table__.columns)
+        conn.execute(text(f"INSERT INTO event_logs ({columns}) SELECT {columns} FROM event_logs_old"))
+        conn.execute(text("DROP TABLE event_logs_old"))
+
+
+def _reserve_archived_event_ids():
+    """Keep new event ids above the archive watermark, e.g. after the database was recreated."""
+    watermark = get_event_archive().watermark
+    if not watermark:
+        return
+    with engine.begin() as conn:
+        if is_sqlite():
+            # AUTOINCREMENT never hands out ids at or below sqlite_sequence.seq
+            seq = conn.execute(text("SELECT seq FROM sqlite_sequence WHERE name = 'event_logs'")).scalar()
+            if seq is None:
+                conn.execute(text("INSERT INTO sqlite_sequence (name, seq) VALUES ('event_logs', :seq)"),
+                             {"seq": watermark})
+            elif seq < watermark:
+                conn.execute(text("UPDATE sqlite_sequence SET seq = :seq WHERE name = 'event_logs'"),
+                             {"seq": watermark})
+        elif engine.dialect.name == "postgresql":
+            sequence = conn.execute(text("SELECT pg_get_serial_sequence('event_logs', 'id')")).scalar()
+            last_value = conn.execute(text(f"SELECT last_value FROM {sequence}")).scalar()
+            if last_value < watermark:
+                conn.execute(text("SELECT setval(:sequence, :seq)"), {"sequence": sequence, "seq": watermark})
+
+
 if __name__ == "__main__":
     init_db()
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, JSON
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, JSON, Index, Float, UniqueConstraint
 from sqlalchemy.orm import relationship
 from datetime import datetime, timezone
 from .database import Base
@@ -17,15 +17,20 @@ class Application(Base):
     updated_at = Column(DateTime, default=lambda: datetime.now(
         timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
 
-    reviews = relationship("Review", back_populates="application")
-    events = relationship("EventLog", back_populates="application")
+    reviews = relationship("Review", back_populates="application", order_by="Review.id")
+    events = relationship("EventLog", back_populates="application", order_by="EventLog.id")
+
+    __table_args__ = (
+        # Active-application lookup: session_id = ? AND status IN (...) ORDER BY created_at DESC
+        Index("ix_applications_session_status_created", "session_id", "status", "created_at"),
+    )
 
 
 class Review(Base):
     __tablename__ = "reviews"
 
     id = Column(Integer, primary_key=True, index=True)
-    application_id = Column(Integer, ForeignKey("applications.id"))
+    application_id = Column(Integer, ForeignKey("applications.id"), index=True)
     sme_type = Column(String)  # cyber, infra, architecture
     decision = Column(String)  # approve, decline
     justification = Column(Text)
@@ -39,10 +44,63 @@ class EventLog(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     application_id = Column(Integer, ForeignKey(
-        "applications.id"), nullable=True)
+        "applications.id"), nullable=True, index=True)
     # app_started, sme_review_start, sme_decision, human_review_ready
     event_type = Column(String)
     details = Column(JSON, default={})
     timestamp = Column(DateTime, default=lambda: datetime.now(timezone.utc))
 
     application = relationship("Application", back_populates="events")
+
+    __table_args__ = (
+        # Filtered keyset pages and exports: event_type = ? AND id > ? ORDER BY id
+        Index("ix_event_logs_type_id", "event_type", "id"),
+        # Ids are never reused, even after retention archives every row
+        # (archived events keep their ids; see app/db/event_archive.py)
+        {"sqlite_autoincrement": True},
+    )
+
+
+class Job(Base):
+    __tablename__ = "jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    # Idempotency key, e.g. "sme_review:42" — enqueueing the same key twice is a no-op
+    job_key = Column(String, unique=True, index=True)
+    job_type = Column(String)
+    payload = Column(JSON, default={})
+    # pending, running, done, failed
+    status = Column(String, default="pending", index=True)
+    attempts = Column(Integer, default=0)
+    max_attempts = Column(Integer, default=3)
+    last_error = Column(Text, nullable=True)
+    run_after = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    # "<host>:<pid>" of the worker holding the job and when its lease lapses
+    locked_by = Column(String, nullable=True)
+    lease_expires_at = Column(DateTime, nullable=True)
+    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    updated_at = Column(DateTime, default=lambda: datetime.now(
+        timezone.utc), onupdate=lambda: datetime.now(timezone.utc))
+
+
+class HourlyRollup(Base):
+    """
+    Pre-aggregated analytics per UTC hour, maintained incrementally as events
+    are written (see app/services/analytics.py).
+    """
+    __tablename__ = "hourly_rollups"
+
+    id = Column(Integer, primary_key=True, index=True)
+    # Start of the UTC hour (naive)
+    bucket = Column(DateTime, nullable=False)
+    # e.g. sme_decisions, sme_latency_seconds
+    metric = Column(String, nullable=False)
+    # e.g. "cyber:approve"; "" when the metric has no dimension
+    dimension = Column(String, nullable=False, default="")
+    count = Column(Integer, nullable=False, default=0)
+    # Sum of the observed values (e.g. seconds) for averages
+    total = Column(Float, nullable=False, default=0.0)
+
+    __table_args__ = (
+        UniqueConstraint("metric", "dimension", "bucket", name="uq_hourly_rollups_metric_dim_bucket"),
+    )
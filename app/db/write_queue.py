@@ -0,0 +1,149 @@
+"""
+write_queue.py — Single-writer queue for SQLite.
+
+Responsibilities:
+- Serialize this worker's database writes through one task with its own
+  session and dedicated connection, so concurrent chat turns never compete for SQLite's write lock
+  (reads keep using the pooled connections and run concurrently under WAL).
+- Run each queued unit of work in its own transaction and hand the result,
+  or the exception, back to the awaiting caller.
+- Record queue wait and write time.
+
+Writers in other worker processes are still arbitrated by SQLite itself
+(WAL + busy_timeout, see app/db/database.py). Non-SQLite databases skip the
+queue and write on the caller's session.
+
+Future Changes:
+- Group several queued units into one commit when the queue is deep.
+"""
+
+import asyncio
+import os
+import time
+from typing import Any, Awaitable, Callable, Optional, TypeVar
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.logger import logger
+from app.core.metrics import gauge, histogram
+from app.db.database import AsyncWriteSessionLocal, is_sqlite
+
+T = TypeVar("T")
+WriteUnit = Callable[[AsyncSession], Awaitable[T]]
+
+# ===== Settings =====
+DB_SINGLE_WRITER = os.getenv("DB_SINGLE_WRITER", "1" if is_sqlite() else "0") == "1"
+
+# ===== Metrics =====
+WRITE_WAIT = histogram(
+    "permitflow_db_write_queue_wait_seconds",
+    "Time a write waited for the single writer.",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0))
+WRITE_DURATION = histogram(
+    "permitflow_db_write_seconds",
+    "Time the single writer spent executing and committing a write.",
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0))
+
+
+class WriteQueue:
+    """FIFO of write units executed one at a time by a background task."""
+
+    def __init__(self):
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @property
+    def depth(self) -> int:
+        return self._queue.qsize() if self._queue else 0
+
+    async def run(self, work: WriteUnit) -> T:
+        """Queue a write unit and wait for its committed result."""
+        self._ensure_started()
+        future = self._loop.create_future()
+        await self._queue.put((work, future, time.perf_counter()))
+        return await future
+
+    async def stop(self) -> None:
+        """Finish queued writes, then stop the writer task."""
+        if not self._task:
+            return
+        await self._queue.join()
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+        self._queue = None
+        logger.info("[WriteQueue] Stopped")
+
+    # ---------------------------------------------------------------
+    # Internals
+    # ---------------------------------------------------------------
+    def _ensure_started(self) -> None:
+        # Started lazily on the running loop: the module may be imported in a
+        # preloading gunicorn master or by sync scripts
+        loop = asyncio.get_running_loop()
+        if self._task and self._loop is loop and not self._task.done():
+            return
+        self._loop = loop
+        self._queue = asyncio.Queue()
+        self._task = loop.create_task(self._writer(), name="db-single-writer")
+
+    async def _writer(self) -> None:
+        while True:
+            work, future, queued_at = await self._queue.get()
+            started = time.perf_counter()
+            WRITE_WAIT.observe(started - queued_at)
+            try:
+                if not future.cancelled():
+                    result = await self._execute(work)
+                    if not future.cancelled():
+                        future.set_result(result)
+            except Exception as e:
+                if not future.cancelled():
+                    future.set_exception(e)
+            finally:
+                WRITE_DURATION.observe(time.perf_counter() - started)
+                self._queue.task_done()
+
+    @staticmethod
+    async def _execute(work: WriteUnit) -> Any:
+        async with AsyncWriteSessionLocal() as db:
+            result = await work(db)
+            await db.commit()
+            return result
+
+
+# ===== Shared Instance =====
+write_queue = WriteQueue()
+
+
+def get_write_queue() -> WriteQueue:
+    return write_queue
+
+
+async def run_write(work: WriteUnit, db: AsyncSession) -> T:
+    """
+    Execute a write unit through the single writer when enabled, otherwise
+    directly on `db` with its own commit.
+    """
+    if DB_SINGLE_WRITER:
+        if db.in_transaction():
+            # End the caller's read transaction so its pooled connection is
+            # free while the write waits (nothing is staged on it; loaded
+            # objects stay readable since sessions don't expire on commit)
+            await db.commit()
+        return await write_queue.run(work)
+    try:
+        result = await work(db)
+        await db.commit()
+    except Exception:
+        await db.rollback()
+        raise
+    return result
+
+
+gauge(
+    "permitflow_db_write_queue_depth",
+    "Writes waiting for the single writer.",
+    lambda: [({}, write_queue.depth)]
+)
@@ -4,14 +4,23 @@
 ⚙️ LangChain Configuration for PermitFlow
 
 Centralized config for LLM initialization, memory, and prompt templates.
-Supports both OpenAI and Azure OpenAI providers via .env settings.
+Supports OpenAI and Azure OpenAI providers via .env settings, plus an offline
+stub provider (LLM_PROVIDER=stub) for load testing.
 """
 
 import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable
+
+import httpx
 from dotenv import load_dotenv
 from langchain.prompts import PromptTemplate
 from langchain.memory import ConversationBufferMemory
 
+from app.core.metrics import gauge
+
 # 🌱 Load environment variables from .env
 load_dotenv()
 
@@ -25,52 +34,181 @@ except ImportError:
 # 🕒 Default timeout for all LLM calls (seconds)
 DEFAULT_LLM_TIMEOUT = 15
 
-# 🧠 Lazy-loaded LLM instance (cached after first init)
-_llm_instance = None
+# 🧺 Max number of distinct client configurations kept alive
+LLM_POOL_MAX_SIZE = int(os.getenv("LLM_POOL_MAX_SIZE", "8"))
+
+# ------------------------------------------------------------------------------
+# 🧺 LLM Client Pool
+# ------------------------------------------------------------------------------
+class LLMClientPool:
+    """
+    Bounded LRU pool of chat model clients keyed by
+    (provider, model, temperature, streaming, timeout).
+
+    All clients share one sync and one async HTTP connection pool, so a new
+    configuration reuses warm TLS connections instead of opening its own.
+    Per-key stats live and die with their client, so they stay bounded too.
+    """
+
+    def __init__(self, max_size: int = LLM_POOL_MAX_SIZE):
+        self.max_size = max(1, max_size)
+        self._clients: OrderedDict[tuple, Any] = OrderedDict()
+        self._stats: dict[tuple, dict[str, Any]] = {}
+        self._evictions = 0
+        self._lock = threading.Lock()
+        self._http_client: httpx.Client | None = None
+        self._http_async_client: httpx.AsyncClient | None = None
+
+    # Shared HTTP transport ----------------------------------------------------
+    def http_clients(self) -> tuple[httpx.Client, httpx.AsyncClient]:
+        if self._http_client is None:
+            limits = httpx.Limits(
+                max_connections=int(os.getenv("LLM_HTTP_MAX_CONNECTIONS", "50")),
+                max_keepalive_connections=int(os.getenv("LLM_HTTP_MAX_KEEPALIVE", "20")),
+            )
+            self._http_client = httpx.Client(limits=limits)
+            self._http_async_client = httpx.AsyncClient(limits=limits)
+        return self._http_client, self._http_async_client
+
+    # Pool operations ----------------------------------------------------------
+    def get(self, key: tuple, factory: Callable[[], Any]) -> Any:
+        with self._lock:
+            client = self._clients.get(key)
+            stats = self._stats.setdefault(key, {"hits": 0, "misses": 0, "created_at": None, "last_used": None})
+            stats["last_used"] = time.time()
+            if client is not None:
+                self._clients.move_to_end(key)
+                stats["hits"] += 1
+                return client
+
+            client = factory()
+            stats["misses"] += 1
+            stats["created_at"] = stats["last_used"]
+            self._clients[key] = client
+            while len(self._clients) > self.max_size:
+                evicted_key, _ = self._clients.popitem(last=False)
+                self._stats.pop(evicted_key, None)
+                self._evictions += 1
+                print(f"♻️ Evicted LLM client: {evicted_key}")
+            return client
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "size": len(self._clients),
+                "max_size": self.max_size,
+                "evictions": self._evictions,
+                "clients": [
+                    {
+                        "provider": key[0],
+                        "model": key[1],
+                        "temperature": key[2],
+                        "streaming": key[3],
+                        "timeout": key[4],
+                        **stats,
+                    }
+                    for key, stats in self._stats.items()
+                ],
+            }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._clients.clear()
+            self._stats.clear()
+            self._evictions = 0
+
+
+_llm_pool = LLMClientPool()
+
+gauge(
+    "permitflow_llm_pool_clients",
+    "Live LLM clients in the pool.",
+    lambda: [({}, _llm_pool.stats()["size"])]
+)
+gauge(
+    "permitflow_llm_pool_evictions",
+    "LLM clients evicted from the pool since startup.",
+    lambda: [({}, _llm_pool.stats()["evictions"])]
+)
 
 # ------------------------------------------------------------------------------
 # 🔧 LLM Initialization
 # ------------------------------------------------------------------------------
-def get_llm(temperature: float = 0.2, model: str | None = None, streaming: bool = False):
+def get_llm_provider() -> str:
+    """Returns the configured LLM_PROVIDER (lowercase, default "openai")."""
+    return (os.getenv("LLM_PROVIDER") or "openai").lower()
+
+
+def get_llm(
+    temperature: float = 0.2,
+    model: str | None = None,
+    streaming: bool = False,
+    timeout: float = DEFAULT_LLM_TIMEOUT,
+):
     """
     Returns a LangChain-compatible LLM based on LLM_PROVIDER in .env.
-    Lazily initializes the LLM on first call to reduce startup time and memory usage.
+    Clients are built lazily and pooled per (provider, model, temperature,
+    streaming, timeout), so each caller gets the settings it asked for.
     """
-    global _llm_instance
-    if _llm_instance is not None:
-        return _llm_instance
-
-    provider = (os.getenv("LLM_PROVIDER") or "openai").lower()
+    provider = get_llm_provider()
 
     if provider == "openai":
         model_name = model or os.getenv("OPENAI_MODEL", "gpt-4o-mini")
-        print(f"⚡ Initializing OpenAI LLM: {model_name}")
-        _llm_instance = ChatOpenAI(
-            model=model_name,
-            temperature=temperature,
-            streaming=streaming,
-            request_timeout=DEFAULT_LLM_TIMEOUT,
-            openai_api_key=os.getenv("OPENAI_API_KEY")  # ✅ Explicit key injection
-        )
-        return _llm_instance
+
+        def build():
+            print(f"⚡ Initializing OpenAI LLM: {model_name} (temperature={temperature}, streaming={streaming})")
+            http_client, http_async_client = _llm_pool.http_clients()
+            return ChatOpenAI(
+                model=model_name,
+                temperature=temperature,
+                streaming=streaming,
+                request_timeout=timeout,
+                openai_api_key=os.getenv("OPENAI_API_KEY"),  # ✅ Explicit key injection
+                http_client=http_client,
+                http_async_client=http_async_client
+            )
+
+        return _llm_pool.get((provider, model_name, temperature, streaming, timeout), build)
 
     if provider == "azure_openai":
         if AzureChatOpenAI is None:
             raise RuntimeError("langchain-openai package not installed")
-        print(f"⚡ Initializing Azure OpenAI LLM: {model or os.getenv('AZURE_OPENAI_DEPLOYMENT')}")
-        _llm_instance = AzureChatOpenAI(
-            azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT"),
-            api_key=os.getenv("AZURE_OPENAI_API_KEY"),
-            azure_deployment=model or os.getenv("AZURE_OPENAI_DEPLOYMENT"),
-            api_version=os.getenv("AZURE_OPENAI_API_VERSION", "2025-01-01-preview"),
-            temperature=temperature,
-            streaming=streaming,
-            request_timeout=DEFAULT_LLM_TIMEOUT
-        )
-        return _llm_instance
+        deployment = model or os.getenv("AZURE_OPENAI_DEPLOYMENT")
+
+        def build():
+            print(f"⚡ Initializing Azure OpenAI LLM: {deployment} (temperature={temperature}, streaming={streaming})")
+            http_client, http_async_client = _llm_pool.http_clients()
+            return AzureChatOpenAI(
+                azure_endpoint=os.getenv("AZURE_OPENAI_ENDPOINT"),
+                api_key=os.getenv("AZURE_OPENAI_API_KEY"),
+                azure_deployment=deployment,
+                api_version=os.getenv("AZURE_OPENAI_API_VERSION", "2025-01-01-preview"),
+                temperature=temperature,
+                streaming=streaming,
+                request_timeout=timeout,
+                http_client=http_client,
+                http_async_client=http_async_client
+            )
+
+        return _llm_pool.get((provider, deployment, temperature, streaming, timeout), build)
+
+    if provider == "stub":
+        from app.llm_stub import StubChatModel
+        model_name = model or "stub"
+
+        def build():
+            print(f"⚡ Initializing stub LLM: {model_name} (temperature={temperature}, streaming={streaming})")
+            return StubChatModel.from_env(model_name=model_name, temperature=temperature, streaming=streaming)
+
+        return _llm_pool.get((provider, model_name, temperature, streaming, timeout), build)
 
     raise ValueError(f"Unsupported LLM_PROVIDER: {provider}")
 
+
+def get_llm_pool_stats() -> dict[str, Any]:
+    """Returns size, evictions and per-key hit/miss stats of the LLM client pool."""
+    return _llm_pool.stats()
+
 # ------------------------------------------------------------------------------
 # 🧠 Memory
 # ------------------------------------------------------------------------------
@@ -1,49 +1,56 @@
-from typing import List, Dict
-from app.langchain_config import get_llm
+import time
+from typing import AsyncIterator, List, Dict, Tuple
+from app.langchain_config import get_llm, get_llm_provider
 from app.prompts.flowbot_prompts import build_flowbot_system_prompt
 from app.core.logger import logger
-from app.session.session_context import get_context_history  # hypothetical helper
+from app.session.session_context import get_context_history, get_context_summary, record_context_usage
 from app.core.config import SITE_PROPERTIES
+from app.core.metrics import trace, histogram
 
 MAX_CONTEXT_TURNS = SITE_PROPERTIES.get("MAX_CONTEXT_TURNS", 5)  # last N exchanges to include
 
+LLM_FIRST_TOKEN = histogram(
+    "permitflow_llm_first_token_seconds", "Time to first streamed token from the LLM.")
 
-async def validate_with_llm(
+
+class LLMStreamInterrupted(Exception):
+    """
+    Raised by stream_validate_with_llm when the model fails after part of the
+    reply was already yielded; `fallback` is the reply to use instead.
+    """
+
+    def __init__(self, fallback: str):
+        super().__init__("LLM stream failed after partial output")
+        self.fallback = fallback
+
+
+def _build_validation_messages(
     session_id: str,
     persona_key: str,
     style: str,
     user_message: str,
     candidate_reply: str
-) -> str:
+) -> Tuple[List[Dict[str, str]], int]:
     """
-    Validate or polish a candidate reply using the LLM with persona context
-    and recent conversation history.
-
-    Args:
-        session_id: Current FlowBot session identifier.
-        persona_key: The persona name (e.g., "mentor", "grumpy").
-        style: The persona's style string from personas.json.
-        user_message: The original message from the user.
-        candidate_reply: The locally generated reply from FlowBot.
+    Build the chat messages for a validation call.
 
     Returns:
-        The validated or rewritten reply from the LLM, or the original if unchanged/failed.
+        The system/user message list and the number of history turns included.
     """
-    if not user_message or not candidate_reply:
-        logger.debug("[LLM Validation] Skipped — missing user_message or candidate_reply")
-        return candidate_reply or ""
-
-    # Load LLM and persona system prompt
-    llm = get_llm(temperature=0.7)
+    # Load persona system prompt
     system_prompt = build_flowbot_system_prompt(persona_key)
 
     # Retrieve last N exchanges for rolling context
     history: List[Dict[str, str]] = get_context_history(session_id, limit=MAX_CONTEXT_TURNS)
 
-    # Build context string from history
+    # Build context string from history, led by the summary of older turns
     context_str = "\n".join(
         f"{turn['role'].capitalize()}: {turn['content']}" for turn in history
     )
+    summary = get_context_summary(session_id)
+    if summary:
+        context_str = f"Summary of earlier conversation: {summary}\n{context_str}"
+    record_context_usage(session_id, len(context_str), "validation")
 
     # Build validation instructions
     validation_prompt = (
@@ -55,16 +62,50 @@ async def validate_with_llm(
         "If fine, return unchanged. If not, rewrite it to match the persona's tone, demeanor, and style."
     )
 
+    return [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": validation_prompt}
+    ], len(history)
+
+
+async def validate_with_llm(
+    session_id: str,
+    persona_key: str,
+    style: str,
+    user_message: str,
+    candidate_reply: str
+) -> str:
+    """
+    Validate or polish a candidate reply using the LLM with persona context
+    and recent conversation history.
+
+    Args:
+        session_id: Current FlowBot session identifier.
+        persona_key: The persona name (e.g., "mentor", "grumpy").
+        style: The persona's style string from personas.json.
+        user_message: The original message from the user.
+        candidate_reply: The locally generated reply from FlowBot.
+
+    Returns:
+        The validated or rewritten reply from the LLM, or the original if unchanged/failed.
+    """
+    if not user_message or not candidate_reply:
+        logger.debug("[LLM Validation] Skipped — missing user_message or candidate_reply")
+        return candidate_reply or ""
+
+    llm = get_llm(temperature=0.7)
+    messages, context_turns = _build_validation_messages(
+        session_id, persona_key, style, user_message, candidate_reply
+    )
+
     try:
         logger.debug(
             f"[LLM Validation] persona={persona_key} | style={style} | "
-            f"context_turns={len(history)} | Sending to model for review"
+            f"context_turns={context_turns} | Sending to model for review"
         )
 
-        result = await llm.ainvoke([
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": validation_prompt}
-        ])
+        with trace("llm_validate", provider=get_llm_provider()):
+            result = await llm.ainvoke(messages)
 
         validated = (result.content or "").strip()
 
@@ -79,4 +120,66 @@ async def validate_with_llm(
             f"[LLM Validation Skipped] persona={persona_key} | Reason: {e}",
             exc_info=True
         )
-        return candidate_reply
\ No newline at end of file
+        return candidate_reply
+
+
+async def stream_validate_with_llm(
+    session_id: str,
+    persona_key: str,
+    style: str,
+    user_message: str,
+    candidate_reply: str
+) -> AsyncIterator[str]:
+    """
+    Streaming variant of validate_with_llm: yields reply text deltas as the
+    model produces them.
+
+    If the model fails before producing any text, the candidate reply is
+    yielded whole so callers always receive a reply.
+
+    Args:
+        See validate_with_llm.
+
+    Yields:
+        Text deltas of the validated reply.
+
+    Raises:
+        LLMStreamInterrupted: The model failed after some text was yielded;
+            the caller should replace the partial reply with its `fallback`.
+    """
+    if not user_message or not candidate_reply:
+        logger.debug("[LLM Stream] Skipped — missing user_message or candidate_reply")
+        if candidate_reply:
+            yield candidate_reply
+        return
+
+    llm = get_llm(temperature=0.7, streaming=True)
+    messages, context_turns = _build_validation_messages(
+        session_id, persona_key, style, user_message, candidate_reply
+    )
+
+    produced = False
+    provider = get_llm_provider()
+    started = time.perf_counter()
+    try:
+        logger.debug(
+            f"[LLM Stream] persona={persona_key} | context_turns={context_turns} | Streaming from model"
+        )
+        with trace("llm_stream", provider=provider):
+            async for chunk in llm.astream(messages):
+                delta = chunk.content or ""
+                if delta:
+                    if not produced:
+                        LLM_FIRST_TOKEN.observe(time.perf_counter() - started, provider=provider)
+                    produced = True
+                    yield delta
+    except Exception as e:
+        logger.warning(
+            f"[LLM Stream Interrupted] persona={persona_key} | produced={produced} | Reason: {e}",
+            exc_info=True
+        )
+        if produced:
+            raise LLMStreamInterrupted(candidate_reply) from e
+
+    if not produced:
+        yield candidate_reply
@@ -0,0 +1,245 @@
+"""
+llm_stub.py — Offline stub chat model for load testing and local runs.
+
+Responsibilities:
+- Stand in for OpenAI/Azure when LLM_PROVIDER=stub, with no network or token spend.
+- Simulate provider latency from a configurable distribution.
+- Inject errors at a configurable rate.
+- Return deterministic outputs shaped like the real prompts expect:
+  JSON for FormManager extraction and SME reviews, the candidate reply for
+  validate_with_llm, a compact running summary for history summarization,
+  and a short echo otherwise.
+
+Environment:
+- LLM_STUB_LATENCY_MS: "fixed:<ms>", "uniform:<lo>,<hi>", "normal:<mean>,<sd>"
+  or "lognormal:<median>,<sigma>" (default "fixed:0").
+- LLM_STUB_TOKEN_MS: delay between streamed chunks (default 0).
+- LLM_STUB_ERROR_RATE: probability in [0, 1] that a call raises, after its
+  sampled latency (default 0).
+- LLM_STUB_SME_DECISION: decision returned by SME prompts (default "approve").
+- LLM_STUB_SEED: seed for latency and error sampling (default unseeded).
+"""
+
+import asyncio
+import json
+import math
+import os
+import random
+import re
+import time
+from typing import Any, AsyncIterator, Iterator, List, Optional
+
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+from pydantic import PrivateAttr
+
+
+class StubLLMError(RuntimeError):
+    """Raised when the stub injects a failure."""
+
+
+# ===== Canned Outputs =====
+def _prompt_text(messages: List[BaseMessage]) -> str:
+    return "\n".join(str(m.content) for m in messages)
+
+
+def _extraction_output(prompt: str) -> str:
+    missing = re.search(r"Current missing fields: (.*)", prompt)
+    message = re.search(r"User Message:\n(.*?)\n\nExtract values", prompt, re.S)
+    fields = [f.strip() for f in missing.group(1).split(",")] if missing else []
+    text = message.group(1).strip() if message else ""
+    lowered = text.lower()
+
+    if any(word in lowered for word in ("cancel", "stop")):
+        return json.dumps({"intent": "cancel"})
+    if any(word in lowered for word in ("yes", "submit")):
+        return json.dumps({"intent": "submit"})
+    if fields and fields[0] and text:
+        return json.dumps({fields[0]: text})
+    return "{}"
+
+
+def _sme_output(prompt: str, decision: str) -> str:
+    role = re.search(r"You are an? (.*?) SME", prompt)
+    return json.dumps({
+        "decision": decision,
+        "justification": f"Stub {role.group(1) if role else 'SME'} review: no blocking issues found.",
+        "confidence": 0.9,
+    })
+
+
+def _validation_output(prompt: str) -> Optional[str]:
+    candidate = re.search(r"Candidate reply: (.*?)\n\nPersona style:", prompt, re.S)
+    return candidate.group(1) if candidate else None
+
+
+def _summary_output(prompt: str) -> str:
+    current = re.search(r"Current summary:\n(.*?)\n\nNew lines of conversation:\n(.*?)\n\nUpdated summary:", prompt, re.S)
+    if not current:
+        return "Stub summary."
+    previous = "" if current.group(1).strip() == "(none)" else current.group(1).strip() + " "
+    lines = [line for line in current.group(2).splitlines() if line.strip()]
+    return f"{previous}[{len(lines)} messages: {lines[0][:60]} ... {lines[-1][:60]}]"
+
+
+def stub_response(messages: List[BaseMessage], sme_decision: str = "approve") -> str:
+    """Deterministic reply for a prompt, keyed off the prompt's shape."""
+    prompt = _prompt_text(messages)
+    if "Extract values for any of the missing fields" in prompt:
+        return _extraction_output(prompt)
+    if "SME evaluating a permit application" in prompt:
+        return _sme_output(prompt, sme_decision)
+    if "Progressively summarize a conversation" in prompt:
+        return _summary_output(prompt)
+    candidate = _validation_output(prompt)
+    if candidate is not None:
+        return candidate
+    last = str(messages[-1].content) if messages else ""
+    return f"Stub reply: {last[:200]}"
+
+
+# ===== Latency =====
+def parse_latency_spec(spec: str) -> tuple[str, list[float]]:
+    kind, _, args = (spec or "fixed:0").partition(":")
+    params = [float(a) for a in args.split(",") if a.strip()] or [0.0]
+    if kind not in ("fixed", "uniform", "normal", "lognormal"):
+        raise ValueError(f"Unsupported LLM_STUB_LATENCY_MS distribution: {kind}")
+    return kind, params
+
+
+def sample_latency_ms(rng: random.Random, kind: str, params: list[float]) -> float:
+    if kind == "uniform":
+        return rng.uniform(params[0], params[1] if len(params) > 1 else params[0])
+    if kind == "normal":
+        return max(0.0, rng.gauss(params[0], params[1] if len(params) > 1 else 0.0))
+    if kind == "lognormal":
+        sigma = params[1] if len(params) > 1 else 0.5
+        return rng.lognormvariate(math.log(max(params[0], 1e-3)), sigma)
+    return params[0]
+
+
+# ===== Chat Model =====
+class StubChatModel(BaseChatModel):
+    """
+    LangChain chat model that never leaves the process. Supports
+    invoke/ainvoke and stream/astream like the real providers.
+    """
+
+    model_name: str = "stub"
+    temperature: float = 0.0
+    streaming: bool = False
+    latency: str = "fixed:0"
+    token_ms: float = 0.0
+    error_rate: float = 0.0
+    sme_decision: str = "approve"
+    seed: Optional[int] = None
+
+    _rng: random.Random = PrivateAttr()
+    _latency_kind: str = PrivateAttr()
+    _latency_params: list = PrivateAttr()
+
+    def model_post_init(self, __context: Any) -> None:
+        self._rng = random.Random(self.seed)
+        self._latency_kind, self._latency_params = parse_latency_spec(self.latency)
+
+    @classmethod
+    def from_env(cls, **kwargs: Any) -> "StubChatModel":
+        seed = os.getenv("LLM_STUB_SEED")
+        return cls(
+            latency=os.getenv("LLM_STUB_LATENCY_MS", "fixed:0"),
+            token_ms=float(os.getenv("LLM_STUB_TOKEN_MS", "0")),
+            error_rate=float(os.getenv("LLM_STUB_ERROR_RATE", "0")),
+            sme_decision=os.getenv("LLM_STUB_SME_DECISION", "approve"),
+            seed=int(seed) if seed else None,
+            **kwargs,
+        )
+
+    @property
+    def _llm_type(self) -> str:
+        return "stub"
+
+    # ----- Simulation -----
+    def _next_call(self) -> tuple[float, bool]:
+        """
+        Sample this call's latency (seconds) and whether it fails. Callers
+        wait out the latency before raising, like a provider timing out or
+        erroring after a round trip.
+        """
+        delay = sample_latency_ms(self._rng, self._latency_kind, self._latency_params) / 1000
+        failed = bool(self.error_rate) and self._rng.random() < self.error_rate
+        return delay, failed
+
+    @staticmethod
+    def _raise_if(failed: bool) -> None:
+        if failed:
+            raise StubLLMError("Stub LLM injected error")
+
+    @staticmethod
+    def _chunks(text: str) -> List[str]:
+        return re.findall(r"\S+\s*|\s+", text) or [text]
+
+    # ----- Sync -----
+    def _generate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        delay, failed = self._next_call()
+        time.sleep(delay)
+        self._raise_if(failed)
+        text = stub_response(messages, self.sme_decision)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=text))])
+
+    def _stream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[CallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        delay, failed = self._next_call()
+        time.sleep(delay)
+        self._raise_if(failed)
+        for i, piece in enumerate(self._chunks(stub_response(messages, self.sme_decision))):
+            if i and self.token_ms:
+                time.sleep(self.token_ms / 1000)
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=piece))
+            if run_manager:
+                run_manager.on_llm_new_token(piece, chunk=chunk)
+            yield chunk
+
+    # ----- Async -----
+    async def _agenerate(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        delay, failed = self._next_call()
+        await asyncio.sleep(delay)
+        self._raise_if(failed)
+        text = stub_response(messages, self.sme_decision)
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=text))])
+
+    async def _astream(
+        self,
+        messages: List[BaseMessage],
+        stop: Optional[List[str]] = None,
+        run_manager: Optional[AsyncCallbackManagerForLLMRun] = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        delay, failed = self._next_call()
+        await asyncio.sleep(delay)
+        self._raise_if(failed)
+        for i, piece in enumerate(self._chunks(stub_response(messages, self.sme_decision))):
+            if i and self.token_ms:
+                await asyncio.sleep(self.token_ms / 1000)
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=piece))
+            if run_manager:
+                await run_manager.on_llm_new_token(piece, chunk=chunk)
+            yield chunk
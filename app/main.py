@@ -9,12 +9,23 @@ Responsibilities:
 
 from fastapi import FastAPI
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi.responses import FileResponse, JSONResponse, PlainTextResponse
 from contextlib import asynccontextmanager
+import asyncio
 import os
 
-from app.routers import flowbot_ws, site_properties, persona_preview, db_inspector
+from app.routers import flowbot_ws, site_properties, persona_preview, db_inspector, analytics
 from app.db.init_db import init_db
+from app.db.database import dispose_engines
+from app.db.write_queue import write_queue
+from app.db.event_writer import event_writer
+from app.core.metrics import render_prometheus
+from app.services.job_queue import job_queue
+from app.services.review_jobs import register_review_jobs
+from app.session.memory_manager import sweep_memory_periodically
+from app.services.event_retention import EVENT_LOG_RETENTION_ENABLED, run_retention_periodically
+from app.services.session_bus import session_bus
+from app.services.flowbot_service import deliver_local
 
 # -------------------------
 # Lifecycle Management
@@ -29,8 +40,33 @@ async def lifespan(app: FastAPI):
         init_db()
     except Exception as e:
         print(f"❌ Database initialization failed: {e}")
+
+    # Session bus: deliver broadcasts from any worker to this worker's clients
+    session_bus.set_handler(deliver_local)
+    await session_bus.start()
+
+    # Background jobs: resume anything left unfinished by a previous worker
+    register_review_jobs(job_queue)
+    await job_queue.start()
+
+    # Session memory: evict idle conversations in the background
+    memory_sweeper = asyncio.create_task(sweep_memory_periodically())
+
+    # Event log retention: compact and archive old audit events in the background
+    retention = asyncio.create_task(run_retention_periodically()) if EVENT_LOG_RETENTION_ENABLED else None
     yield
-    # Shutdown logic (if any) goes here
+    # Shutdown: stop workers; interrupted jobs resume on next startup
+    memory_sweeper.cancel()
+    if retention:
+        # An interrupted pass is finished by the next one
+        retention.cancel()
+        await asyncio.gather(retention, return_exceptions=True)
+    await job_queue.stop()
+    await session_bus.stop()
+    # Audit events are write-behind: flush them before the writer stops
+    await event_writer.stop()
+    await write_queue.stop()
+    await dispose_engines()
 
 # -------------------------
 # FastAPI App Initialization
@@ -45,6 +81,7 @@ app.include_router(flowbot_ws.router)
 app.include_router(site_properties.router)
 app.include_router(persona_preview.router)
 app.include_router(db_inspector.router)
+app.include_router(analytics.router)
 
 # -------------------------
 # Serve Chat UI + Static Assets
@@ -69,6 +106,15 @@ app.mount("/static", StaticFiles(directory="public"), name="static")
 def health():
     return {"status": "ok"}
 
+# -------------------------
+# Prometheus Metrics
+# -------------------------
+
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    return PlainTextResponse(render_prometheus(), media_type="text/plain; version=0.0.4")
+
 # -------------------------
 # Version Endpoint
 # -------------------------
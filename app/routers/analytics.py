@@ -0,0 +1,69 @@
+"""
+analytics.py — Router for throughput and decision statistics.
+
+Every endpoint reads the hourly rollups (app/services/analytics.py), so the
+cost grows with the number of hour buckets in range, not with history.
+Time ranges are [since, until) in UTC, at hour granularity.
+"""
+
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+
+from app.db.database import get_db
+from app.services import analytics
+
+router = APIRouter(prefix="/analytics", tags=["Analytics"])
+
+SERIES_METRICS = (
+    analytics.APPLICATIONS_STARTED,
+    analytics.STATUS_ENTERED,
+    analytics.STATUS_NET,
+    analytics.SME_DECISIONS,
+    analytics.SME_LATENCY,
+    analytics.HUMAN_REVIEW_LATENCY,
+)
+
+
+@router.get("/applications")
+def application_stats(since: Optional[datetime] = None, until: Optional[datetime] = None,
+                      db: Session = Depends(get_db)) -> Dict[str, Any]:
+    """Current applications per status, plus starts and status entries in the range."""
+    return {
+        "by_status": analytics.status_counts(db),
+        "entered": analytics.status_entered(db, since, until),
+        "started": analytics.applications_started(db, since, until),
+    }
+
+
+@router.get("/sme/decisions")
+def sme_decisions(since: Optional[datetime] = None, until: Optional[datetime] = None,
+                  db: Session = Depends(get_db)) -> Dict[str, Dict[str, Any]]:
+    """Decision counts and approval rate per SME type."""
+    return analytics.sme_decision_stats(db, since, until)
+
+
+@router.get("/sme/latency")
+def sme_latency(since: Optional[datetime] = None, until: Optional[datetime] = None,
+                db: Session = Depends(get_db)) -> Dict[str, Dict[str, Any]]:
+    """Average time from app_submitted to each SME's decision."""
+    return analytics.latency_stats(db, analytics.SME_LATENCY, since, until)
+
+
+@router.get("/human_review/latency")
+def human_review_latency(since: Optional[datetime] = None, until: Optional[datetime] = None,
+                         db: Session = Depends(get_db)) -> Dict[str, Dict[str, Any]]:
+    """Average time from app_started to human_review_ready."""
+    return analytics.latency_stats(db, analytics.HUMAN_REVIEW_LATENCY, since, until)
+
+
+@router.get("/series/{metric}")
+def metric_series(metric: str, dimension: Optional[str] = None,
+                  since: Optional[datetime] = None, until: Optional[datetime] = None,
+                  db: Session = Depends(get_db)) -> List[Dict[str, Any]]:
+    """Raw hourly buckets of one rollup metric, for charts."""
+    if metric not in SERIES_METRICS:
+        raise HTTPException(status_code=404, detail=f"Unknown metric '{metric}'. Available: {', '.join(SERIES_METRICS)}")
+    return analytics.series(db, metric, dimension, since, until)
@@ -1,12 +1,23 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import List, Optional, Dict, Any
-from pydantic import BaseModel
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.orm import Session, selectinload
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Literal, Optional, Type
+from pydantic import BaseModel, TypeAdapter
 from datetime import datetime
 
-from app.db.database import get_db
+from app.db.database import SessionLocal, get_db
+from app.db.event_archive import get_event_archive
 from app.db.models import Application, Review, EventLog
 
+# Rows fetched per round trip while streaming an NDJSON export
+EXPORT_YIELD_PER = 1000
+MAX_PAGE_SIZE = 1000
+
+# Response header carrying the cursor for the next page
+NEXT_CURSOR_HEADER = "X-Next-After-Id"
+
 # --- Pydantic Schemas for Serialization ---
 
 
@@ -41,14 +52,23 @@ class ApplicationSchema(BaseModel):
     data: Optional[Dict[str, Any]]
     created_at: Optional[datetime]
     updated_at: Optional[datetime]
-    # We can include related items if we want, but keeping it simple for now to avoid recursion issues
-    # reviews: List[ReviewSchema] = []
-    # events: List[EventLogSchema] = []
+    # Related rows are only on ApplicationDetailSchema, which is loaded eagerly
 
     class Config:
         from_attributes = True
 
 
+class ApplicationDetailSchema(ApplicationSchema):
+    reviews: List[ReviewSchema] = []
+    events: List[EventLogSchema] = []
+
+
+# Detail responses are validated and serialized in one pass here instead of
+# again through FastAPI's response_model
+DETAIL_ADAPTER = TypeAdapter(ApplicationDetailSchema)
+DETAIL_LIST_ADAPTER = TypeAdapter(List[ApplicationDetailSchema])
+
+
 router = APIRouter(
     prefix="/db",
     tags=["Database Inspector"],
@@ -56,28 +76,210 @@ router = APIRouter(
 )
 
 
+# --- Keyset Pagination / Export Helpers ---
+
+
+def _keyset(model, stmt, after_id: Optional[int], time_column=None,
+            since: Optional[datetime] = None, until: Optional[datetime] = None):
+    """Apply the id cursor and an optional [since, until) time range, ordered by id."""
+    if after_id is not None:
+        stmt = stmt.where(model.id > after_id)
+    if time_column is not None and since is not None:
+        stmt = stmt.where(time_column >= since)
+    if time_column is not None and until is not None:
+        stmt = stmt.where(time_column < until)
+    return stmt.order_by(model.id)
+
+
+def _page(db: Session, stmt, limit: int, skip: int, after_id: Optional[int], response: Response) -> list:
+    """One page of rows; sets the next cursor header when more rows may follow."""
+    if skip and after_id is not None:
+        # The cursor already positions the page; an offset on top skips rows
+        raise HTTPException(status_code=422, detail="skip cannot be combined with after_id")
+    rows = db.execute(stmt.offset(skip).limit(limit)).scalars().all()
+    if len(rows) == limit:
+        response.headers[NEXT_CURSOR_HEADER] = str(rows[-1].id)
+    return rows
+
+
+def _ndjson(stmt, schema: Type[BaseModel], archived: Iterable[dict] = ()) -> Iterator[bytes]:
+    # Archived rows (all older ids) go first, in chunks of the same size
+    archived = iter(archived)
+    while rows := list(islice(archived, EXPORT_YIELD_PER)):
+        yield b"".join(schema.model_validate(row).model_dump_json().encode() + b"\n" for row in rows)
+
+    # Own session: the request's dependency is closed before streaming starts
+    db = SessionLocal()
+    try:
+        result = db.execute(stmt.execution_options(yield_per=EXPORT_YIELD_PER))
+        # One chunk per fetched partition keeps the per-row cost off the threadpool
+        for rows in result.scalars().partitions():
+            yield b"".join(schema.model_validate(row).model_dump_json().encode() + b"\n" for row in rows)
+    finally:
+        db.close()
+
+
+def _with_related(stmt):
+    # One extra IN (...) query per relationship, however many applications
+    return stmt.options(selectinload(Application.reviews), selectinload(Application.events))
+
+
+def _parse_ids(ids: str) -> List[int]:
+    try:
+        parsed = [int(part) for part in ids.split(",") if part.strip()]
+    except ValueError:
+        raise HTTPException(status_code=422, detail="ids must be comma-separated integers")
+    if len(parsed) > MAX_PAGE_SIZE:
+        raise HTTPException(status_code=422, detail=f"At most {MAX_PAGE_SIZE} ids per request")
+    return parsed
+
+
+def _json(adapter: TypeAdapter, value: Any) -> Response:
+    return Response(adapter.dump_json(adapter.validate_python(value, from_attributes=True)),
+                    media_type="application/json")
+
+
+def _export(stmt, schema: Type[BaseModel], name: str, archived: Iterable[dict] = ()) -> StreamingResponse:
+    return StreamingResponse(
+        _ndjson(stmt, schema, archived),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="{name}.ndjson"'},
+    )
+
+
+Format = Literal["json", "ndjson"]
+
+
 @router.get("/applications", response_model=List[ApplicationSchema])
-def read_applications(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+def read_applications(
+    response: Response,
+    after_id: Optional[int] = None,
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    skip: int = Query(0, ge=0, description="Deprecated: use after_id"),
+    status: Optional[str] = None,
+    session_id: Optional[str] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    format: Format = "json",
+    db: Session = Depends(get_db),
+):
+    """
+    Get applications ordered by id. Pass the X-Next-After-Id response header
+    back as `after_id` for the next page; `format=ndjson` streams every match.
+    """
+    stmt = select(Application)
+    if status:
+        stmt = stmt.where(Application.status == status)
+    if session_id:
+        stmt = stmt.where(Application.session_id == session_id)
+    stmt = _keyset(Application, stmt, after_id, Application.created_at, since, until)
+    if format == "ndjson":
+        return _export(stmt, ApplicationSchema, "applications")
+    return _page(db, stmt, limit, skip, after_id, response)
+
+
+# Declared before /applications/{app_id}, which would otherwise match "batch"
+@router.get("/applications/batch", response_model=List[ApplicationDetailSchema])
+def read_applications_batch(
+    ids: str = Query(..., description="Comma-separated application ids"),
+    db: Session = Depends(get_db),
+):
     """
-    Get all applications.
+    Get several applications (as in /db/applications/{id}, including reviews
+    and events) in three queries total, ordered by id.
     """
-    applications = db.query(Application).offset(skip).limit(limit).all()
-    return applications
+    stmt = _with_related(select(Application).where(Application.id.in_(_parse_ids(ids))).order_by(Application.id))
+    return _json(DETAIL_LIST_ADAPTER, db.execute(stmt).scalars().all())
+
+
+@router.get("/applications/{app_id}", response_model=ApplicationDetailSchema)
+def read_application(app_id: int, db: Session = Depends(get_db)):
+    """
+    Get one application with its reviews and events (three queries).
+    """
+    app = db.execute(_with_related(select(Application).where(Application.id == app_id))).scalars().first()
+    if app is None:
+        raise HTTPException(status_code=404, detail=f"Application {app_id} not found")
+    return _json(DETAIL_ADAPTER, app)
 
 
 @router.get("/reviews", response_model=List[ReviewSchema])
-def read_reviews(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+def read_reviews(
+    response: Response,
+    after_id: Optional[int] = None,
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    skip: int = Query(0, ge=0, description="Deprecated: use after_id"),
+    sme_type: Optional[str] = None,
+    decision: Optional[str] = None,
+    application_id: Optional[int] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    format: Format = "json",
+    db: Session = Depends(get_db),
+):
     """
-    Get all reviews.
+    Get reviews ordered by id, with the same cursor and export options as
+    /db/applications.
     """
-    reviews = db.query(Review).offset(skip).limit(limit).all()
-    return reviews
+    stmt = select(Review)
+    if sme_type:
+        stmt = stmt.where(Review.sme_type == sme_type)
+    if decision:
+        stmt = stmt.where(Review.decision == decision)
+    if application_id is not None:
+        stmt = stmt.where(Review.application_id == application_id)
+    stmt = _keyset(Review, stmt, after_id, Review.created_at, since, until)
+    if format == "ndjson":
+        return _export(stmt, ReviewSchema, "reviews")
+    return _page(db, stmt, limit, skip, after_id, response)
 
 
 @router.get("/event_logs", response_model=List[EventLogSchema])
-def read_event_logs(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+def read_event_logs(
+    response: Response,
+    after_id: Optional[int] = None,
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    skip: int = Query(0, ge=0, description="Deprecated: use after_id"),
+    event_type: Optional[str] = None,
+    application_id: Optional[int] = None,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    format: Format = "json",
+    include_archived: bool = Query(False, description="With format=ndjson, also stream events moved to the archive"),
+    db: Session = Depends(get_db),
+):
+    """
+    Get event logs ordered by id, with the same cursor and export options as
+    /db/applications. `format=ndjson` exports the full audit trail in
+    constant memory; add `include_archived=true` to start it with the
+    archived events (see /db/event_logs/archive).
+
+    sme_decision events reference their review by `review_id` instead of
+    repeating its justification.
+    """
+    stmt = select(EventLog)
+    if event_type:
+        stmt = stmt.where(EventLog.event_type == event_type)
+    if application_id is not None:
+        stmt = stmt.where(EventLog.application_id == application_id)
+    stmt = _keyset(EventLog, stmt, after_id, EventLog.timestamp, since, until)
+    if format == "ndjson":
+        if not include_archived:
+            return _export(stmt, EventLogSchema, "event_logs")
+        archive = get_event_archive()
+        watermark = archive.watermark
+        # Rows at or below the watermark may linger after an interrupted retention pass
+        stmt = stmt.where(EventLog.id > watermark)
+        archived = archive.read(after_id=after_id, event_type=event_type, application_id=application_id,
+                                since=since, until=until, through_id=watermark)
+        return _export(stmt, EventLogSchema, "event_logs", archived)
+    return _page(db, stmt, limit, skip, after_id, response)
+
+
+@router.get("/event_logs/archive")
+def read_event_log_archive() -> Dict[str, Any]:
     """
-    Get all event logs.
+    Archive totals and its segment index (id and time range, event types).
     """
-    logs = db.query(EventLog).offset(skip).limit(limit).all()
-    return logs
+    archive = get_event_archive()
+    return {**archive.stats(), "segment_index": archive.segments()}
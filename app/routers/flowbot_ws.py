@@ -12,11 +12,14 @@ Future Enhancements:
 - Room targeting and persona preview via query params
 """
 
+from typing import Optional
+
 from fastapi import APIRouter, WebSocket, Query, Request
 from fastapi.responses import StreamingResponse
 
 from app.core.logger import logger
 from app.services import flowbot_service
+from app.services.replay_buffer import parse_last_event_id
 
 router = APIRouter(tags=["FlowBot Chat"])
 
@@ -29,7 +32,8 @@ def get_client_host(source) -> str:
 async def websocket_flowbot(
     websocket: WebSocket,
     avatar: str = Query("FlowBot", description="Avatar name to personalize the bot persona"),
-    session: str = Query(..., description="Unique session/room identifier")
+    session: str = Query(..., description="Unique session/room identifier"),
+    last_event_id: Optional[str] = Query(None, description="Last event id received, to replay missed events")
 ):
     """
     Handle a WebSocket connection for FlowBot chat.
@@ -38,12 +42,14 @@ async def websocket_flowbot(
         websocket: Active WebSocket connection
         avatar: Avatar name to personalize the bot persona
         session: Unique session/room identifier
+        last_event_id: Last event id the client saw before reconnecting
     """
     client_host = get_client_host(websocket)
     logger.info(f"[WS][{session}] Connection opened from {client_host} (avatar={avatar})")
 
     try:
-        await flowbot_service.handle_ws_connection(websocket, avatar, session_id=session)
+        await flowbot_service.handle_ws_connection(
+            websocket, avatar, session_id=session, last_event_id=parse_last_event_id(last_event_id))
     finally:
         logger.info(f"[WS][{session}] Connection closed from {client_host} (avatar={avatar})")
 
@@ -51,7 +57,8 @@ async def websocket_flowbot(
 @router.get("/events")
 async def sse_events(
     request: Request,
-    session: str = Query(..., description="Unique session/room identifier")
+    session: str = Query(..., description="Unique session/room identifier"),
+    last_event_id: Optional[str] = Query(None, description="Fallback for the Last-Event-ID header")
 ):
     """
     Establish an SSE stream for clients without WebSocket support.
@@ -59,11 +66,13 @@ async def sse_events(
     Args:
         request: Incoming HTTP request
         session: Unique session/room identifier
+        last_event_id: Last event id seen; the Last-Event-ID header takes precedence
     """
     client_host = get_client_host(request)
-    logger.info(f"[SSE][{session}] Connection opened from {client_host}")
+    resume_from = parse_last_event_id(request.headers.get("last-event-id") or last_event_id)
+    logger.info(f"[SSE][{session}] Connection opened from {client_host} (last_event_id={resume_from})")
 
-    return await flowbot_service.sse_event_stream(session_id=session)
+    return await flowbot_service.sse_event_stream(session_id=session, last_event_id=resume_from)
 
 # ===== SSE Send Endpoint =====
 @router.post("/send")
@@ -0,0 +1,111 @@
+"""
+active_app_cache.py — Per-session cache of the active application.
+
+Responsibilities:
+- Answer "which application is active for this session?" from memory on
+  the chat hot path, including the common "none" answer (negative caching),
+  so small talk in sessions without an application never touches the DB.
+- Stay current by write-through: AsyncApplicationService create/update/submit
+  and unit-of-work commits store the new state (or "none" once the
+  application leaves the active statuses).
+- Bound memory with the shared SessionManager LRU / idle eviction.
+
+Entries expire after ACTIVE_APP_CACHE_TTL_SECONDS. Writes from other worker
+processes are not seen until then, so with a shared session state backend
+(several workers) the TTL is capped at ACTIVE_APP_CACHE_SHARED_TTL_SECONDS.
+
+Future Changes:
+- Invalidate across workers over the session bus instead of a short TTL.
+"""
+
+import copy
+import time
+from typing import Optional, Tuple
+
+from app.core.config import SITE_PROPERTIES
+from app.core.metrics import counter, gauge
+from app.db.models import Application
+from app.services.session_manager import SessionManager
+from app.services.session_state import get_session_state
+
+# ===== Settings =====
+ACTIVE_APP_CACHE_ENABLED = SITE_PROPERTIES.get("ACTIVE_APP_CACHE_ENABLED", True)
+ACTIVE_APP_CACHE_TTL_SECONDS = SITE_PROPERTIES.get("ACTIVE_APP_CACHE_TTL_SECONDS", 300)
+ACTIVE_APP_CACHE_SHARED_TTL_SECONDS = SITE_PROPERTIES.get("ACTIVE_APP_CACHE_SHARED_TTL_SECONDS", 2)
+ACTIVE_APP_CACHE_MAX_SESSIONS = SITE_PROPERTIES.get("SESSION_MAX_COUNT", 5000)
+ACTIVE_APP_CACHE_IDLE_MINUTES = SITE_PROPERTIES.get("SESSION_IDLE_TIMEOUT_MINUTES", 60)
+
+ACTIVE_STATUSES = ("draft", "submitted", "reviewing")
+
+SNAPSHOT_FIELDS = ("id", "session_id", "permit_type", "status", "data", "created_at", "updated_at")
+
+LOOKUPS = counter("permitflow_active_app_cache_lookups_total", "Active-application cache lookups by result.")
+
+_MISSING = object()
+
+
+class ActiveApplicationCache:
+    """session_id -> snapshot of its active application, or None for "no active application"."""
+
+    def __init__(
+        self,
+        ttl_seconds: float = ACTIVE_APP_CACHE_TTL_SECONDS,
+        max_sessions: int = ACTIVE_APP_CACHE_MAX_SESSIONS,
+        idle_minutes: int = ACTIVE_APP_CACHE_IDLE_MINUTES,
+        enabled: bool = ACTIVE_APP_CACHE_ENABLED,
+    ):
+        if get_session_state().shared:
+            ttl_seconds = min(ttl_seconds, ACTIVE_APP_CACHE_SHARED_TTL_SECONDS)
+        self.ttl = ttl_seconds
+        self.enabled = enabled and ttl_seconds > 0
+        self._entries = SessionManager(timeout_minutes=idle_minutes, max_sessions=max_sessions, name="active_apps")
+
+    def lookup(self, session_id: str) -> Tuple[bool, Optional[Application]]:
+        """
+        (hit, application). On a hit the application is a detached copy, or
+        None when the session is known to have no active application.
+        """
+        if not self.enabled:
+            return False, None
+        entry = self._entries.get_session(session_id)
+        snapshot = entry.get("snapshot", _MISSING) if entry else _MISSING
+        if snapshot is _MISSING or time.monotonic() - entry["cached_at"] > self.ttl:
+            LOOKUPS.inc(result="miss")
+            return False, None
+        if snapshot is None:
+            LOOKUPS.inc(result="negative_hit")
+            return True, None
+        LOOKUPS.inc(result="hit")
+        return True, Application(**copy.deepcopy(snapshot))
+
+    def store(self, session_id: str, app: Optional[Application]) -> None:
+        """Write through the session's current active application (None = no active application)."""
+        if not self.enabled:
+            return
+        snapshot = None
+        if app is not None and app.status in ACTIVE_STATUSES:
+            snapshot = {field: copy.deepcopy(getattr(app, field)) for field in SNAPSHOT_FIELDS}
+        entry = self._entries.get_or_create_session(session_id)
+        entry["snapshot"] = snapshot
+        entry["cached_at"] = time.monotonic()
+
+    def invalidate(self, session_id: str) -> None:
+        self._entries.remove_session(session_id)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+# ===== Shared Instance =====
+active_app_cache = ActiveApplicationCache()
+
+
+def get_active_app_cache() -> ActiveApplicationCache:
+    return active_app_cache
+
+
+gauge(
+    "permitflow_active_app_cache_sessions",
+    "Sessions with a cached active-application answer.",
+    lambda: [({}, len(active_app_cache))]
+)
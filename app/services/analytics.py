@@ -0,0 +1,397 @@
+"""
+analytics.py — Incremental hourly rollups and the queries behind /analytics.
+
+Responsibilities:
+- Turn each batch of EventLog rows into per-hour rollup deltas and upsert
+  them into `hourly_rollups` in the same transaction as the events (called
+  by the EventLog writer), so statistics never need a scan of event_logs.
+- Rebuild the rollups from existing event_logs and the event archive
+  (backfill).
+- Answer dashboard questions from the rollups in O(buckets):
+  applications per status, SME approval rates, SME decision latency
+  (app_submitted -> sme_decision) and time to human review
+  (app_started -> human_review_ready).
+
+Metrics (hourly_rollups.metric / dimension):
+- applications_started / permit_type
+- status_entered / status: applications entering a status that hour
+- status_net / status: +1 entering, -1 leaving; summing all buckets gives
+  the current count per status
+- sme_decisions / "<sme_type>:<decision>"
+- sme_latency_seconds / sme_type: count and total seconds
+- human_review_ready_seconds / "": count and total seconds
+
+Latency start times come from event_logs, or from the event archive once
+retention has moved an application's start events there.
+
+Status rollups follow the lifecycle events (app_started -> draft,
+app_submitted -> submitted); status changes without an event are not seen.
+
+Future Changes:
+- Daily rollups for long ranges.
+"""
+
+import asyncio
+from collections import defaultdict
+from datetime import datetime, timezone
+from itertools import islice
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import delete, func, insert, select, text, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.logger import logger
+from app.db.event_archive import get_event_archive
+from app.db.models import EventLog, HourlyRollup
+
+# ===== Metrics =====
+APPLICATIONS_STARTED = "applications_started"
+STATUS_ENTERED = "status_entered"
+STATUS_NET = "status_net"
+SME_DECISIONS = "sme_decisions"
+SME_LATENCY = "sme_latency_seconds"
+HUMAN_REVIEW_LATENCY = "human_review_ready_seconds"
+
+# Lifecycle event -> (status left, status entered)
+STATUS_EVENTS = {
+    "app_started": (None, "draft"),
+    "app_submitted": ("draft", "submitted"),
+}
+# Events whose latency is measured from an earlier lifecycle event
+START_EVENTS = ("app_started", "app_submitted")
+
+BACKFILL_BATCH_SIZE = 5000
+# Applications whose archived start times are remembered between flushes
+ARCHIVED_STARTS_CACHE_SIZE = 10000
+# Rows per upsert statement (keeps SQLite under its bound-parameter limit)
+UPSERT_CHUNK_ROWS = 1000
+# Dialects with INSERT .. ON CONFLICT; others increment row by row
+UPSERT_DIALECTS = ("sqlite", "postgresql")
+
+# (bucket, metric, dimension) -> [count, total]
+Deltas = Dict[Tuple[datetime, str, str], List[float]]
+# application_id -> {start event type: timestamp}
+StartTimes = Dict[int, Dict[str, datetime]]
+
+# application_id -> archived start times, plus the "watermark" they are valid for
+_archived_starts_cache: Dict[Any, Any] = {}
+
+
+def _naive_utc(ts: datetime) -> datetime:
+    if ts.tzinfo is not None:
+        ts = ts.astimezone(timezone.utc).replace(tzinfo=None)
+    return ts
+
+
+def _bucket(ts: datetime) -> datetime:
+    return _naive_utc(ts).replace(minute=0, second=0, microsecond=0)
+
+
+# ---------------------------------------------------------------
+# Delta computation
+# ---------------------------------------------------------------
+def compute_deltas(events: Iterable[Dict[str, Any]], start_times: StartTimes) -> Deltas:
+    """
+    Rollup deltas for a batch of events (dicts with application_id,
+    event_type, details, timestamp). `start_times` holds each application's
+    app_started / app_submitted timestamps for latency metrics.
+    """
+    deltas: Deltas = defaultdict(lambda: [0, 0.0])
+
+    def add(ts: datetime, metric: str, dimension: str = "", count: int = 1, value: float = 0.0) -> None:
+        entry = deltas[(_bucket(ts), metric, dimension)]
+        entry[0] += count
+        entry[1] += value
+
+    def seconds_since(app_id: Optional[int], start_event: str, ts: datetime) -> Optional[float]:
+        started = start_times.get(app_id, {}).get(start_event)
+        if started is None:
+            return None
+        return max(0.0, (_naive_utc(ts) - _naive_utc(started)).total_seconds())
+
+    for event in events:
+        event_type = event["event_type"]
+        details = event.get("details") or {}
+        ts = event["timestamp"]
+        app_id = event.get("application_id")
+
+        if event_type == "app_started":
+            add(ts, APPLICATIONS_STARTED, details.get("permit_type") or "")
+        if event_type in STATUS_EVENTS:
+            left, entered = STATUS_EVENTS[event_type]
+            if left:
+                add(ts, STATUS_NET, left, count=-1)
+            add(ts, STATUS_NET, entered)
+            add(ts, STATUS_ENTERED, entered)
+        elif event_type == "sme_decision":
+            sme_type = details.get("sme_type") or "unknown"
+            add(ts, SME_DECISIONS, f"{sme_type}:{details.get('decision')}")
+            latency = seconds_since(app_id, "app_submitted", ts)
+            if latency is not None:
+                add(ts, SME_LATENCY, sme_type, value=latency)
+        elif event_type == "sme_review_cancelled":
+            for sme_type in details.get("sme_types") or []:
+                add(ts, SME_DECISIONS, f"{sme_type}:cancelled")
+        elif event_type == "human_review_ready":
+            latency = seconds_since(app_id, "app_started", ts)
+            if latency is not None:
+                add(ts, HUMAN_REVIEW_LATENCY, value=latency)
+    return deltas
+
+
+def _start_times_query(app_ids: Iterable[int]):
+    return (
+        select(EventLog.application_id, EventLog.event_type, func.min(EventLog.timestamp))
+        .where(EventLog.application_id.in_(set(app_ids)), EventLog.event_type.in_(START_EVENTS))
+        .group_by(EventLog.application_id, EventLog.event_type)
+    )
+
+
+def _latency_app_ids(events: Iterable[Dict[str, Any]]) -> List[int]:
+    return [
+        e["application_id"] for e in events
+        if e.get("application_id") is not None and e["event_type"] in ("sme_decision", "human_review_ready")
+    ]
+
+
+def _collect_start_times(rows) -> StartTimes:
+    start_times: StartTimes = defaultdict(dict)
+    for app_id, event_type, ts in rows:
+        start_times[app_id][event_type] = ts
+    return start_times
+
+
+def _values(deltas: Deltas) -> List[Dict[str, Any]]:
+    return [
+        {"bucket": bucket, "metric": metric, "dimension": dimension, "count": int(count), "total": total}
+        for (bucket, metric, dimension), (count, total) in deltas.items()
+    ]
+
+
+def _upserts(dialect_name: str, deltas: Deltas):
+    """One ON CONFLICT statement per chunk (dialects in UPSERT_DIALECTS)."""
+    values = _values(deltas)
+    for start in range(0, len(values), UPSERT_CHUNK_ROWS):
+        yield _upsert(dialect_name, values[start:start + UPSERT_CHUNK_ROWS])
+
+
+def _upsert(dialect_name: str, values: List[Dict[str, Any]]):
+    stmt = postgresql.insert(HourlyRollup) if dialect_name == "postgresql" else sqlite.insert(HourlyRollup)
+    return stmt.values(values).on_conflict_do_update(
+        index_elements=["metric", "dimension", "bucket"],
+        set_={
+            "count": HourlyRollup.count + stmt.excluded["count"],
+            "total": HourlyRollup.total + stmt.excluded["total"],
+        },
+    )
+
+
+def _increment(values: Dict[str, Any]):
+    """Portable fallback: add to an existing bucket row (insert it when nothing matched)."""
+    return (
+        update(HourlyRollup)
+        .where(HourlyRollup.metric == values["metric"], HourlyRollup.dimension == values["dimension"],
+               HourlyRollup.bucket == values["bucket"])
+        .values(count=HourlyRollup.count + values["count"], total=HourlyRollup.total + values["total"])
+    )
+
+
+def _apply_deltas(db: Session, deltas: Deltas) -> None:
+    dialect_name = db.get_bind().dialect.name
+    if dialect_name in UPSERT_DIALECTS:
+        for stmt in _upserts(dialect_name, deltas):
+            db.execute(stmt)
+        return
+    for values in _values(deltas):
+        if db.execute(_increment(values)).rowcount == 0:
+            db.execute(insert(HourlyRollup).values(values))
+
+
+async def _apply_deltas_async(db: AsyncSession, deltas: Deltas) -> None:
+    dialect_name = db.get_bind().dialect.name
+    if dialect_name in UPSERT_DIALECTS:
+        for stmt in _upserts(dialect_name, deltas):
+            await db.execute(stmt)
+        return
+    for values in _values(deltas):
+        if (await db.execute(_increment(values))).rowcount == 0:
+            await db.execute(insert(HourlyRollup).values(values))
+
+
+async def _archived_start_times(app_ids: List[int]) -> StartTimes:
+    """
+    Start events already moved to the event archive (decisions on long-running
+    applications). Archived data only grows, so answers, including "not
+    archived", are cached until the archive watermark moves.
+    """
+    archive = get_event_archive()
+    watermark = archive.watermark
+    if not watermark:
+        return {}
+    if _archived_starts_cache.get("watermark") != watermark or len(_archived_starts_cache) > ARCHIVED_STARTS_CACHE_SIZE:
+        _archived_starts_cache.clear()
+        _archived_starts_cache["watermark"] = watermark
+    unknown = [app_id for app_id in app_ids if app_id not in _archived_starts_cache]
+    if unknown:
+        found = await asyncio.to_thread(archive.start_times, unknown, START_EVENTS)
+        for app_id in unknown:
+            _archived_starts_cache[app_id] = found.get(app_id, {})
+    return {app_id: _archived_starts_cache[app_id] for app_id in app_ids if _archived_starts_cache[app_id]}
+
+
+# ---------------------------------------------------------------
+# Incremental updates (EventLog writer)
+# ---------------------------------------------------------------
+async def apply_event_rollups(db: AsyncSession, events: List[Dict[str, Any]]) -> int:
+    """
+    Add a just-inserted batch of events to the rollups, in the caller's
+    transaction. Returns the number of rollup rows touched.
+    """
+    app_ids = _latency_app_ids(events)
+    start_times: StartTimes = {}
+    if app_ids:
+        start_times = _collect_start_times((await db.execute(_start_times_query(app_ids))).all())
+        missing = [app_id for app_id in set(app_ids) if len(start_times.get(app_id, ())) < len(START_EVENTS)]
+        if missing:
+            for app_id, archived in (await _archived_start_times(missing)).items():
+                start_times[app_id] = {**archived, **start_times.get(app_id, {})}
+    deltas = compute_deltas(events, start_times)
+    await _apply_deltas_async(db, deltas)
+    return len(deltas)
+
+
+# ---------------------------------------------------------------
+# Backfill
+# ---------------------------------------------------------------
+def backfill_rollups(db: Session, batch_size: int = BACKFILL_BATCH_SIZE) -> Dict[str, int]:
+    """
+    Rebuild hourly_rollups from the event archive and event_logs in one
+    transaction.
+
+    The rollups are cleared before the event watermark is read, under a
+    lock that makes the EventLog writer wait: the write lock on SQLite, an
+    EXCLUSIVE table lock on Postgres. Events committed before the watermark
+    are rebuilt here; events still uncommitted are rolled up by the writer
+    after this commits. Nothing is counted twice or lost. Other backends
+    take no lock, so run the backfill there with the app stopped.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        db.execute(text("LOCK TABLE hourly_rollups IN EXCLUSIVE MODE"))
+    db.execute(delete(HourlyRollup))
+    watermark = db.execute(select(func.max(EventLog.id))).scalar() or 0
+
+    # Archived events come first (lower ids); their start times are kept in
+    # memory for the latency of events archived later or still in the DB
+    archive = get_event_archive()
+    after_id = archive.watermark
+    archived_starts: StartTimes = defaultdict(dict)
+    processed = buckets = 0
+    archived = archive.read(through_id=after_id)
+    while events := list(islice(archived, batch_size)):
+        for e in events:
+            if e["event_type"] in START_EVENTS and e.get("application_id") is not None:
+                archived_starts[e["application_id"]].setdefault(e["event_type"], e["timestamp"])
+        deltas = compute_deltas(events, archived_starts)
+        _apply_deltas(db, deltas)
+        processed += len(events)
+        buckets += len(deltas)
+    if processed:
+        logger.info(f"[Analytics] Backfill processed={processed} archived events up_to_id={after_id}")
+
+    while after_id < watermark:
+        rows = db.execute(
+            select(EventLog.id, EventLog.application_id, EventLog.event_type, EventLog.details, EventLog.timestamp)
+            .where(EventLog.id > after_id, EventLog.id <= watermark)
+            .order_by(EventLog.id)
+            .limit(batch_size)
+        ).all()
+        if not rows:
+            break
+        events = [row._asdict() for row in rows]
+        app_ids = _latency_app_ids(events)
+        start_times = _collect_start_times(db.execute(_start_times_query(app_ids)).all()) if app_ids else {}
+        for app_id in app_ids:
+            if app_id in archived_starts:
+                start_times[app_id] = {**archived_starts[app_id], **start_times.get(app_id, {})}
+        deltas = compute_deltas(events, start_times)
+        _apply_deltas(db, deltas)
+        processed += len(rows)
+        buckets += len(deltas)
+        after_id = rows[-1].id
+        logger.info(f"[Analytics] Backfill processed={processed} up_to_id={after_id}/{watermark}")
+
+    db.commit()
+    return {"events": processed, "rollup_upserts": buckets, "watermark": watermark}
+
+
+# ---------------------------------------------------------------
+# Queries (O(buckets))
+# ---------------------------------------------------------------
+def _range(stmt, since: Optional[datetime], until: Optional[datetime]):
+    if since is not None:
+        stmt = stmt.where(HourlyRollup.bucket >= _bucket(since))
+    if until is not None:
+        stmt = stmt.where(HourlyRollup.bucket < _naive_utc(until))
+    return stmt
+
+
+def _totals(db: Session, metric: str, since: Optional[datetime], until: Optional[datetime]) -> Dict[str, Tuple[int, float]]:
+    stmt = (
+        select(HourlyRollup.dimension, func.sum(HourlyRollup.count), func.sum(HourlyRollup.total))
+        .where(HourlyRollup.metric == metric)
+        .group_by(HourlyRollup.dimension)
+    )
+    return {dim: (int(count or 0), float(total or 0.0)) for dim, count, total in db.execute(_range(stmt, since, until))}
+
+
+def status_counts(db: Session) -> Dict[str, int]:
+    """Current number of applications per status."""
+    return {status: count for status, (count, _) in _totals(db, STATUS_NET, None, None).items() if count}
+
+
+def status_entered(db: Session, since: Optional[datetime] = None, until: Optional[datetime] = None) -> Dict[str, int]:
+    return {status: count for status, (count, _) in _totals(db, STATUS_ENTERED, since, until).items()}
+
+
+def applications_started(db: Session, since: Optional[datetime] = None, until: Optional[datetime] = None) -> Dict[str, int]:
+    """Applications started per permit type."""
+    return {permit_type or "unknown": count for permit_type, (count, _) in _totals(db, APPLICATIONS_STARTED, since, until).items()}
+
+
+def sme_decision_stats(db: Session, since: Optional[datetime] = None, until: Optional[datetime] = None) -> Dict[str, Dict[str, Any]]:
+    """Decision counts and approval rate per SME type."""
+    stats: Dict[str, Dict[str, Any]] = {}
+    for dimension, (count, _) in _totals(db, SME_DECISIONS, since, until).items():
+        sme_type, _, decision = dimension.partition(":")
+        entry = stats.setdefault(sme_type, {"decisions": {}, "total": 0})
+        entry["decisions"][decision] = count
+        entry["total"] += count
+    for entry in stats.values():
+        approved = entry["decisions"].get("approve", 0)
+        entry["approval_rate"] = round(approved / entry["total"], 4) if entry["total"] else None
+    return stats
+
+
+def latency_stats(db: Session, metric: str, since: Optional[datetime] = None, until: Optional[datetime] = None) -> Dict[str, Dict[str, Any]]:
+    return {
+        dimension or "all": {
+            "count": count,
+            "avg_seconds": round(total / count, 3) if count else None,
+        }
+        for dimension, (count, total) in _totals(db, metric, since, until).items()
+    }
+
+
+def series(db: Session, metric: str, dimension: Optional[str] = None,
+           since: Optional[datetime] = None, until: Optional[datetime] = None) -> List[Dict[str, Any]]:
+    """Hourly buckets of one metric, oldest first."""
+    stmt = select(HourlyRollup).where(HourlyRollup.metric == metric)
+    if dimension is not None:
+        stmt = stmt.where(HourlyRollup.dimension == dimension)
+    stmt = _range(stmt, since, until).order_by(HourlyRollup.bucket, HourlyRollup.dimension)
+    return [
+        {"bucket": r.bucket, "dimension": r.dimension, "count": r.count, "total": r.total}
+        for r in db.execute(stmt).scalars()
+    ]
@@ -1,6 +1,13 @@
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from app.core.metrics import trace
 from app.db.models import Application, Review, EventLog
-from app.db.database import SessionLocal
+from app.db.database import SessionLocal, AsyncSessionLocal
+from app.db.event_writer import get_event_writer
+from app.db.write_queue import run_write
+from app.services.active_app_cache import ACTIVE_STATUSES, get_active_app_cache
 import json
 from datetime import datetime, timezone
 
@@ -62,13 +69,17 @@ class ApplicationService:
         self.db.add(review)
         self.db.commit()
         self.db.refresh(review)
+        # The justification lives on the review; the event references it
         self.log_event(app_id, "sme_decision", {
+            "review_id": review.id,
             "sme_type": sme_type,
-            "decision": decision,
-            "justification": justification
+            "decision": decision
         })
         return review
 
+    def get_reviews(self, app_id: int) -> list[Review]:
+        return self.db.query(Review).filter(Review.application_id == app_id).order_by(Review.id).all()
+
     def log_event(self, app_id: int, event_type: str, details: dict):
         event = EventLog(
             application_id=app_id,
@@ -80,3 +91,226 @@ class ApplicationService:
 
     def close(self):
         self.db.close()
+
+
+class AsyncApplicationService:
+    """
+    Awaitable ApplicationService on the async engine, for use from request
+    handlers and the chat loop so DB round trips never block the event loop.
+
+    Reads run on this service's session (opened lazily, returned to the pool
+    by close()); writes go through run_write, i.e. the single-writer queue on
+    SQLite. Audit events go to the write-behind EventLogWriter. Reads
+    overwrite already-loaded rows so they see writes made by the writer.
+    The active-application lookup is served from, and written through to,
+    the ActiveApplicationCache.
+    """
+
+    def __init__(self, db: AsyncSession = None):
+        self._db = db
+        self._owns_session = db is None
+
+    @property
+    def db(self) -> AsyncSession:
+        if self._db is None:
+            self._db = AsyncSessionLocal()
+        return self._db
+
+    async def create_application(self, session_id: str, permit_type: str, initial_data: dict = None) -> Application:
+        async def work(db: AsyncSession) -> Application:
+            app = Application(
+                session_id=session_id,
+                permit_type=permit_type,
+                status="draft",
+                data=initial_data or {}
+            )
+            db.add(app)
+            return app
+        app = await run_write(work, self.db)
+        get_active_app_cache().store(session_id, app)
+        await self.log_event(app.id, "app_started", {"permit_type": permit_type})
+        return app
+
+    def unit_of_work(self, session_id: str) -> "ApplicationUnitOfWork":
+        """Load-once / commit-once scope for one chat turn on the session's active application."""
+        return ApplicationUnitOfWork(self, session_id)
+
+    async def get_application(self, app_id: int) -> Optional[Application]:
+        return await self.db.get(Application, app_id, populate_existing=True)
+
+    async def get_active_application_by_session(self, session_id: str) -> Optional[Application]:
+        cache = get_active_app_cache()
+        hit, app = cache.lookup(session_id)
+        if hit:
+            return app
+        # Assuming one active application per session for now
+        result = await self.db.execute(
+            select(Application)
+            .where(Application.session_id == session_id, Application.status.in_(ACTIVE_STATUSES))
+            .order_by(Application.created_at.desc())
+            .limit(1)
+            .execution_options(populate_existing=True)
+        )
+        app = result.scalars().first()
+        cache.store(session_id, app)
+        return app
+
+    async def update_application_data(self, app_id: int, data_update: dict) -> Optional[Application]:
+        async def work(db: AsyncSession) -> Optional[Application]:
+            app = await db.get(Application, app_id)
+            if app:
+                # Merge new data into existing data
+                current_data = dict(app.data) if app.data else {}
+                current_data.update(data_update)
+                app.data = current_data
+            return app
+        app = await run_write(work, self.db)
+        if app:
+            get_active_app_cache().store(app.session_id, app)
+        return app
+
+    async def submit_application(self, app_id: int) -> Optional[Application]:
+        async def work(db: AsyncSession) -> Optional[Application]:
+            app = await db.get(Application, app_id)
+            if app:
+                app.status = "submitted"
+            return app
+        app = await run_write(work, self.db)
+        if app:
+            get_active_app_cache().store(app.session_id, app)
+            await self.log_event(app.id, "app_submitted", {})
+        return app
+
+    async def add_review(self, app_id: int, sme_type: str, decision: str, justification: str) -> Review:
+        async def work(db: AsyncSession) -> Review:
+            review = Review(
+                application_id=app_id,
+                sme_type=sme_type,
+                decision=decision,
+                justification=justification
+            )
+            db.add(review)
+            return review
+        review = await run_write(work, self.db)
+        await self.log_event(app_id, "sme_decision", {
+            "review_id": review.id,
+            "sme_type": sme_type,
+            "decision": decision
+        })
+        return review
+
+    async def get_reviews(self, app_id: int) -> list[Review]:
+        result = await self.db.execute(
+            select(Review)
+            .where(Review.application_id == app_id)
+            .order_by(Review.id)
+            .execution_options(populate_existing=True)
+        )
+        return list(result.scalars().all())
+
+    async def log_event(self, app_id: int, event_type: str, details: dict):
+        await get_event_writer().log(app_id, event_type, details)
+
+    async def close(self):
+        if self._db is None:
+            return
+        await self._db.close()
+        if self._owns_session:
+            self._db = None
+
+
+class ApplicationUnitOfWork:
+    """
+    One chat turn's view of the session's active application.
+
+    The application is loaded once on entry and detached, mutations and
+    events are staged on it in memory, and commit() (or leaving the block
+    without an error) writes them in a single UPDATE, so a turn costs one
+    SELECT plus at most one UPDATE. `application` always reflects the staged
+    state; nothing is re-read after the commit.
+
+        async with service.unit_of_work(session_id) as uow:
+            if uow.application:
+                uow.update_data({"budget": "$10k"})
+    """
+
+    def __init__(self, service: AsyncApplicationService, session_id: str):
+        self.service = service
+        self.session_id = session_id
+        self.application: Optional[Application] = None
+        self._changes: Dict[str, Any] = {}
+        self._events: List[Tuple[str, dict]] = []
+
+    async def __aenter__(self) -> "ApplicationUnitOfWork":
+        db = self.service.db
+        with trace("db_active_application"):
+            self.application = await self.service.get_active_application_by_session(self.session_id)
+        if self.application is not None and self.application in db:
+            # Staged edits must not be flushed by the reader session
+            db.expunge(self.application)
+        if db.in_transaction():
+            await db.commit()  # end the read; the connection goes back to the pool
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            await self.commit()
+        else:
+            self._changes.clear()
+            self._events.clear()
+
+    @property
+    def dirty(self) -> bool:
+        return bool(self._changes or self._events)
+
+    def update_data(self, data_update: dict) -> None:
+        """Merge fields into the application's data."""
+        app = self._require_application()
+        # Merge new data into existing data
+        current_data = dict(app.data) if app.data else {}
+        current_data.update(data_update)
+        app.data = current_data
+        self._changes["data"] = current_data
+
+    def set_status(self, status: str) -> None:
+        self._require_application().status = status
+        self._changes["status"] = status
+
+    def submit(self) -> None:
+        self.set_status("submitted")
+        self.log_event("app_submitted", {})
+
+    def log_event(self, event_type: str, details: dict) -> None:
+        self._require_application()
+        self._events.append((event_type, details))
+
+    async def commit(self) -> None:
+        """Write staged changes in one statement and hand staged events to the EventLog writer."""
+        if not self.dirty:
+            return
+        app = self.application
+        changes, self._changes = self._changes, {}
+        events, self._events = self._events, []
+
+        if changes:
+            changes["updated_at"] = datetime.now(timezone.utc)
+
+            async def work(db: AsyncSession) -> None:
+                await db.execute(update(Application).where(Application.id == app.id).values(**changes))
+            cache = get_active_app_cache()
+            try:
+                with trace("db_update_application"):
+                    await run_write(work, self.service.db)
+            except Exception:
+                cache.invalidate(self.session_id)
+                raise
+            app.updated_at = changes["updated_at"]
+            cache.store(self.session_id, app)
+
+        for event_type, details in events:
+            await self.service.log_event(app.id, event_type, details)
+
+    def _require_application(self) -> Application:
+        if self.application is None:
+            raise ValueError(f"No active application for session {self.session_id}")
+        return self.application
@@ -0,0 +1,164 @@
+"""
+bot_cache.py — Bounded cache of FlowBot instances per session and avatar.
+
+Responsibilities:
+- Reuse FlowBot instances across /send POSTs, reconnects, persona switches
+  and fallbacks instead of rebuilding them per request.
+- Build a new persona for a cached conversation by rebinding a shallow
+  copy: the new bot shares the existing FormManager and DB session.
+- Serialize turns within a session so a shared bot never handles two
+  messages at once.
+- Remember the persona a session switched to; with a shared state backend
+  (see session_state) every worker picks it up.
+- Release each bot's DB connection after every turn and close bots when
+  their session is evicted (LRU / idle, via SessionManager).
+
+Future Changes:
+- Warm the cache for sessions with open applications at startup.
+"""
+
+import asyncio
+import weakref
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict
+
+from app.agents.flowbot.flowbot import FlowBot
+from app.core.config import SITE_PROPERTIES
+from app.core.logger import logger
+from app.core.metrics import counter, gauge
+from app.services.session_manager import SessionManager
+from app.services.session_state import get_session_state
+
+# ===== Settings =====
+BOT_CACHE_MAX_SESSIONS = SITE_PROPERTIES.get("BOT_CACHE_MAX_SESSIONS", 1000)
+BOT_CACHE_IDLE_MINUTES = SITE_PROPERTIES.get("BOT_CACHE_IDLE_MINUTES", 30)
+
+BOT_LOOKUPS = counter("permitflow_bot_cache_lookups_total", "FlowBot cache lookups by result.")
+
+
+def _persona_key(session_id: str) -> str:
+    return f"persona:{session_id}"
+
+
+class BotCache:
+    """
+    Session-keyed LRU of {avatar: FlowBot}, plus one turn lock per session.
+
+    Locks live outside the evictable entries (weakly referenced, kept alive
+    by the entry and by any turn holding or awaiting them), so evicting a
+    session mid-turn never gives it a second lock.
+    """
+
+    def __init__(self, max_sessions: int = BOT_CACHE_MAX_SESSIONS, idle_minutes: int = BOT_CACHE_IDLE_MINUTES):
+        self._sessions = SessionManager(timeout_minutes=idle_minutes, max_sessions=max_sessions, name="bots")
+        self._sessions.on_evict(self._close_session)
+        self._locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()
+
+    def get(self, session_id: str, avatar: str) -> FlowBot:
+        """Cached bot for (session, avatar), rebinding a sibling persona when possible."""
+        entry = self._entry(session_id)
+        bots: Dict[str, FlowBot] = entry["bots"]
+        bot = bots.get(avatar)
+        if bot is not None:
+            BOT_LOOKUPS.inc(result="hit")
+            return bot
+
+        sibling = next(iter(bots.values()), None)
+        if sibling is not None:
+            bot = sibling.with_persona(avatar)
+            BOT_LOOKUPS.inc(result="rebind")
+        else:
+            bot = FlowBot(user_id=session_id, avatar=avatar)
+            BOT_LOOKUPS.inc(result="miss")
+        bots[avatar] = bot
+        return bot
+
+    def active_avatar(self, session_id: str, requested: str) -> str:
+        """The persona the session last switched to (on any worker), else `requested`."""
+        entry = self._entry(session_id)
+        state = get_session_state()
+        if state.shared:
+            # Reload only when another worker changed it
+            version = state.version(_persona_key(session_id))
+            if version and version != entry.get("persona_version"):
+                loaded = state.get(_persona_key(session_id))
+                if loaded:
+                    entry["persona_version"], value = loaded
+                    entry["persona"] = value.get("avatar")
+        return entry.get("persona") or requested
+
+    def set_active_avatar(self, session_id: str, avatar: str) -> None:
+        """Record a persona switch for the session and publish it to other workers."""
+        entry = self._entry(session_id)
+        entry["persona"] = avatar
+        state = get_session_state()
+        if state.shared:
+            entry["persona_version"] = state.put(_persona_key(session_id), {"avatar": avatar})
+
+    @asynccontextmanager
+    async def turn(self, session_id: str) -> AsyncIterator[None]:
+        """
+        Hold the session's turn lock; afterwards release the bots' DB
+        connection so idle cached bots hold none.
+        """
+        entry = self._entry(session_id)
+        async with self._lock(session_id):
+            try:
+                yield
+            finally:
+                for bot in entry["bots"].values():
+                    await bot.close()
+                    break  # bots of a session share one FormManager
+
+    def discard(self, session_id: str) -> bool:
+        return self._sessions.remove_session(session_id)
+
+    def stats(self) -> Dict[str, Any]:
+        return self._sessions.stats()
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    # ---------------------------------------------------------------
+    # Internals
+    # ---------------------------------------------------------------
+    def _entry(self, session_id: str) -> Dict[str, Any]:
+        entry = self._sessions.get_or_create_session(session_id)
+        if "bots" not in entry:
+            entry["bots"] = {}
+            entry["lock"] = self._lock(session_id)  # keeps the lock alive while cached
+        return entry
+
+    def _lock(self, session_id: str) -> asyncio.Lock:
+        lock = self._locks.get(session_id)
+        if lock is None:
+            lock = self._locks[session_id] = asyncio.Lock()
+        return lock
+
+    @staticmethod
+    def _close_session(session_id: str, entry: Dict[str, Any], reason: str) -> None:
+        bots = entry.get("bots") or {}
+        for bot in bots.values():
+            # Connections are returned after every turn; this only covers an
+            # eviction racing an in-flight turn
+            try:
+                asyncio.get_running_loop().create_task(bot.close())
+            except RuntimeError:
+                pass
+            break
+        logger.debug(f"[BotCache] Closed {len(bots)} bots for session {session_id} ({reason})")
+
+
+# ===== Shared Instance =====
+bot_cache = BotCache()
+
+
+def get_bot_cache() -> BotCache:
+    return bot_cache
+
+
+gauge(
+    "permitflow_bot_cache_sessions",
+    "Sessions with cached FlowBot instances.",
+    lambda: [({}, len(bot_cache))]
+)
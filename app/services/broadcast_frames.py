@@ -0,0 +1,56 @@
+"""
+broadcast_frames.py — Structured frames for session broadcasts.
+
+Responsibilities:
+- Carry every broadcast as a Frame(kind, payload) through the session bus,
+  the replay buffer and the client outboxes, so nothing downstream has to
+  recognise a frame from its serialized text.
+- Serialize frames only at the edge: one JSON object per WS message, one
+  named event per SSE message.
+
+Kinds:
+- "message": a complete reply; payload {"text"}.
+- "chunk": part of a streamed reply; payload {"id", "delta"}.
+- "done": end of a streamed reply; payload {"id", "text"} with the full text.
+"""
+
+import json
+from typing import Any, Dict, NamedTuple
+
+MESSAGE = "message"
+CHUNK = "chunk"
+DONE = "done"
+
+
+class Frame(NamedTuple):
+    kind: str
+    payload: Dict[str, Any]
+
+
+def message_frame(text: str) -> Frame:
+    return Frame(MESSAGE, {"text": text})
+
+
+def chunk_frame(stream_id: str, delta: str) -> Frame:
+    return Frame(CHUNK, {"id": stream_id, "delta": delta})
+
+
+def done_frame(stream_id: str, text: str) -> Frame:
+    return Frame(DONE, {"id": stream_id, "text": text})
+
+
+def ws_frame(event_id: int, frame: Frame) -> str:
+    """A WS message: the payload plus "type" and "event_id"."""
+    return json.dumps({**frame.payload, "event_id": event_id, "type": frame.kind})
+
+
+def sse_event(event_id: int, frame: Frame) -> Dict[str, str]:
+    """
+    An SSE event named after the frame kind. Plain messages keep their text
+    as the data; stream frames send {"type", ...payload} as JSON.
+    """
+    if frame.kind == MESSAGE:
+        data = frame.payload.get("text", "")
+    else:
+        data = json.dumps({**frame.payload, "type": frame.kind})
+    return {"id": str(event_id), "event": frame.kind, "data": data}
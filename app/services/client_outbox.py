@@ -0,0 +1,206 @@
+"""
+client_outbox.py — Bounded per-connection send queues.
+
+Responsibilities:
+- Give every WS/SSE connection its own outbound queue so a broadcast is a
+  non-blocking enqueue per client and one slow tab cannot stall the others.
+- Bound each queue and apply an overflow policy when a consumer falls behind:
+  - drop_oldest: discard the oldest queued stream "chunk" frame.
+  - coalesce: merge queued stream "chunk" frames of the same reply into one
+    frame (the text is preserved), then drop the oldest chunk if still full.
+  - disconnect: close the connection; the client reconnects and catches up.
+  Only chunk frames are ever dropped: the reply's "done" frame carries its
+  full text. Complete messages and "done" frames are not droppable, so a
+  queue holding nothing else disconnects under every policy.
+- Record queue lag (time from enqueue to send), depth and drops.
+
+The WS writer task and the SSE event generator both drain the queue with
+`await outbox.get()`.
+"""
+
+import asyncio
+import itertools
+import time
+from collections import deque
+from typing import Deque, Dict, Optional, Tuple
+
+from app.core.config import SITE_PROPERTIES
+from app.core.logger import logger
+from app.core.metrics import counter, gauge, histogram
+from app.services.broadcast_frames import CHUNK, Frame
+
+# Queued item: (enqueued_at, event_id, frame)
+QueuedItem = Tuple[float, int, Frame]
+
+# ===== Settings =====
+DROP_OLDEST = "drop_oldest"
+COALESCE = "coalesce"
+DISCONNECT = "disconnect"
+OVERFLOW_POLICIES = (DROP_OLDEST, COALESCE, DISCONNECT)
+
+CLIENT_QUEUE_MAX = SITE_PROPERTIES.get("CLIENT_QUEUE_MAX", 256)
+CLIENT_OVERFLOW_POLICY = SITE_PROPERTIES.get("CLIENT_OVERFLOW_POLICY", COALESCE)
+
+# ===== Metrics =====
+QUEUE_LAG = histogram(
+    "permitflow_client_queue_lag_seconds",
+    "Time a message waited in a connection's send queue.",
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0))
+OVERFLOWS = counter(
+    "permitflow_client_queue_overflow_total",
+    "Send-queue overflows by transport and policy action.")
+
+_conn_ids = itertools.count(1)
+_open_outboxes: Dict[int, "ClientOutbox"] = {}
+
+
+class OutboxClosed(Exception):
+    """Raised by get() once the outbox is closed and drained."""
+
+
+class ClientOutbox:
+    """Bounded FIFO of outbound messages for one connection."""
+
+    def __init__(
+        self,
+        session_id: str,
+        transport: str,
+        max_size: int = CLIENT_QUEUE_MAX,
+        policy: str = CLIENT_OVERFLOW_POLICY,
+    ):
+        if policy not in OVERFLOW_POLICIES:
+            logger.warning(f"[Outbox] Unknown overflow policy '{policy}', using {DROP_OLDEST}")
+            policy = DROP_OLDEST
+        self.conn_id = next(_conn_ids)
+        self.session_id = session_id
+        self.transport = transport
+        self.max_size = max(1, max_size)
+        self.policy = policy
+        self.closed = False
+        self.close_reason = ""
+        self.dropped = 0
+        self.last_lag = 0.0
+        self._items: Deque[QueuedItem] = deque()
+        self._ready = asyncio.Event()
+        _open_outboxes[self.conn_id] = self
+
+    # ---------------------------------------------------------------
+    # Producer side
+    # ---------------------------------------------------------------
+    def offer(self, frame: Frame, event_id: int = 0) -> bool:
+        """
+        Enqueue without waiting. Returns False if the outbox is (or just got)
+        closed, so the caller can drop the client.
+        """
+        if self.closed:
+            return False
+        if len(self._items) >= self.max_size and not self._make_room():
+            return False
+        self._items.append((time.monotonic(), event_id, frame))
+        self._ready.set()
+        return True
+
+    def close(self, reason: str = "closed") -> None:
+        if self.closed:
+            return
+        self.closed = True
+        self.close_reason = reason
+        self._ready.set()
+        _open_outboxes.pop(self.conn_id, None)
+
+    # ---------------------------------------------------------------
+    # Consumer side
+    # ---------------------------------------------------------------
+    async def get(self) -> Tuple[int, Frame]:
+        """Next (event_id, frame), waiting if empty. Raises OutboxClosed once closed."""
+        while not self._items:
+            if self.closed:
+                raise OutboxClosed(self.close_reason)
+            self._ready.clear()
+            await self._ready.wait()
+        if self.closed and self.close_reason == DISCONNECT:
+            raise OutboxClosed(self.close_reason)
+        enqueued_at, event_id, frame = self._items.popleft()
+        self.last_lag = time.monotonic() - enqueued_at
+        QUEUE_LAG.observe(self.last_lag, transport=self.transport)
+        return event_id, frame
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    # ---------------------------------------------------------------
+    # Overflow
+    # ---------------------------------------------------------------
+    def _make_room(self) -> bool:
+        if self.policy == COALESCE and self._coalesce_chunks():
+            OVERFLOWS.inc(transport=self.transport, action="coalesce")
+            if len(self._items) < self.max_size:
+                return True
+
+        if self.policy != DISCONNECT and self._drop_oldest_chunk():
+            self.dropped += 1
+            OVERFLOWS.inc(transport=self.transport, action="drop_oldest")
+            return True
+
+        OVERFLOWS.inc(transport=self.transport, action="disconnect")
+        logger.warning(
+            f"[Outbox][{self.session_id}] {self.transport}#{self.conn_id} fell {len(self._items)} "
+            f"messages behind — disconnecting")
+        self.close(DISCONNECT)
+        return False
+
+    def _drop_oldest_chunk(self) -> bool:
+        for index, (_, _, frame) in enumerate(self._items):
+            if frame.kind == CHUNK:
+                del self._items[index]
+                return True
+        return False
+
+    def _coalesce_chunks(self) -> bool:
+        """
+        Merge runs of queued chunk frames for the same reply; the merged frame
+        keeps the last event id. Returns True if any merged.
+        """
+        merged: Deque[QueuedItem] = deque()
+        run: Optional[list] = None  # [enqueued_at, event_id, payload]
+        changed = False
+
+        def flush():
+            if run:
+                merged.append((run[0], run[1], Frame(CHUNK, run[2])))
+
+        for enqueued_at, event_id, frame in self._items:
+            if frame.kind == CHUNK and run and run[2]["id"] == frame.payload["id"]:
+                run[2]["delta"] += frame.payload["delta"]
+                run[1] = event_id
+                changed = True
+                continue
+            flush()
+            if frame.kind == CHUNK:
+                run = [enqueued_at, event_id, dict(frame.payload)]
+            else:
+                run = None
+                merged.append((enqueued_at, event_id, frame))
+        flush()
+
+        if changed:
+            self._items = merged
+        return changed
+
+
+gauge(
+    "permitflow_client_queue_depth",
+    "Queued outbound messages per connection.",
+    lambda: [
+        ({"session": o.session_id, "transport": o.transport, "conn": str(o.conn_id)}, len(o))
+        for o in list(_open_outboxes.values())
+    ]
+)
+gauge(
+    "permitflow_client_queue_last_lag_seconds",
+    "Lag of the most recently sent message per connection.",
+    lambda: [
+        ({"session": o.session_id, "transport": o.transport, "conn": str(o.conn_id)}, o.last_lag)
+        for o in list(_open_outboxes.values())
+    ]
+)
@@ -0,0 +1,299 @@
+"""
+event_retention.py — Retention, archival and compaction for EventLog rows.
+
+Responsibilities:
+- Age policy: archive events older than EVENT_LOG_RETENTION_DAYS.
+- Size policy: archive the oldest events beyond EVENT_LOG_MAX_ROWS.
+- Move archived events into gzip JSONL segments (app/db/event_archive.py)
+  and delete them from the database.
+- Compact duplicate payloads: sme_decision events used to copy the SME's
+  justification that is already stored on the Review row. Compaction
+  replaces the copy with a `review_id` reference (new events are written
+  that way by ApplicationService.add_review).
+- Run both in the background (app.main lifespan), one worker at a time.
+
+Everything is done in small batches so no write holds the database lock for
+long: reads run outside write transactions, and each delete/update batch is
+its own short write through the single writer (app/db/write_queue.py),
+followed by a pause. Archiving always takes an id prefix of event_logs; it
+stops at the first event that no policy selects.
+
+Only the ids written to a segment are deleted. A pass interrupted after a
+segment is written but before its rows are deleted is finished by the next
+pass, which deletes the leftover rows that match the archive (id, type and
+timestamp), so no event is archived twice or lost. Event ids are
+AUTOINCREMENT on SQLite (and a sequence on Postgres), so archived ids are
+never handed out again.
+
+Events are archived without touching the analytics rollups; latency for a
+decision whose start events were archived is looked up in the archive.
+
+Future Changes:
+- Byte-based size policy (per-dialect table size queries).
+"""
+
+import asyncio
+import time
+from collections import defaultdict, deque
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import SITE_PROPERTIES
+from app.core.logger import logger
+from app.core.metrics import counter
+from app.db.database import AsyncSessionLocal
+from app.db.event_archive import EventArchive, get_event_archive
+from app.db.models import EventLog, Review
+from app.db.write_queue import run_write
+
+try:
+    import fcntl
+except ImportError:  # Windows: single-process deployments only
+    fcntl = None
+
+# ===== Settings =====
+EVENT_LOG_RETENTION_ENABLED = SITE_PROPERTIES.get("EVENT_LOG_RETENTION_ENABLED", True)
+EVENT_LOG_RETENTION_INTERVAL_SECONDS = SITE_PROPERTIES.get("EVENT_LOG_RETENTION_INTERVAL_SECONDS", 3600)
+# 0 disables a policy
+EVENT_LOG_RETENTION_DAYS = SITE_PROPERTIES.get("EVENT_LOG_RETENTION_DAYS", 90)
+EVENT_LOG_MAX_ROWS = SITE_PROPERTIES.get("EVENT_LOG_MAX_ROWS", 0)
+# Events per archive segment
+EVENT_LOG_SEGMENT_ROWS = SITE_PROPERTIES.get("EVENT_LOG_SEGMENT_ROWS", 10000)
+# Rows deleted or compacted per write transaction, and the pause between them
+EVENT_LOG_RETENTION_BATCH_SIZE = SITE_PROPERTIES.get("EVENT_LOG_RETENTION_BATCH_SIZE", 500)
+EVENT_LOG_RETENTION_PAUSE_MS = SITE_PROPERTIES.get("EVENT_LOG_RETENTION_PAUSE_MS", 50)
+
+LOCK_FILE = ".retention.lock"
+
+# ===== Metrics =====
+RETAINED = counter("permitflow_event_log_retention_rows_total", "EventLog rows processed by retention, by action.")
+
+
+class EventLogRetention:
+    """Archives and compacts event_logs in small background batches."""
+
+    def __init__(
+        self,
+        archive: Optional[EventArchive] = None,
+        retention_days: float = EVENT_LOG_RETENTION_DAYS,
+        max_rows: int = EVENT_LOG_MAX_ROWS,
+        segment_rows: int = EVENT_LOG_SEGMENT_ROWS,
+        batch_size: int = EVENT_LOG_RETENTION_BATCH_SIZE,
+        pause_ms: float = EVENT_LOG_RETENTION_PAUSE_MS,
+    ):
+        self.archive = archive or get_event_archive()
+        self.retention_days = retention_days
+        self.max_rows = max_rows
+        self.segment_rows = max(1, segment_rows)
+        self.batch_size = max(1, batch_size)
+        self.pause = max(0.0, pause_ms) / 1000
+        # sme_decision events up to this id are already compact
+        self._compacted_through = 0
+        self._running = False
+
+    async def run_once(self) -> Optional[Dict[str, int]]:
+        """One compaction + archive pass; None when another pass holds the lock."""
+        if self._running:
+            return None
+        self._running = True
+        lock = self._acquire_lock()
+        try:
+            if lock is False:
+                logger.info("[Retention] Another worker is running retention — skipping")
+                return None
+            started = time.perf_counter()
+            result = {"compacted": await self.compact()}
+            result.update(await self.archive_expired())
+            logger.info(
+                f"[Retention] compacted={result['compacted']} archived={result['archived']} "
+                f"segments={result['segments']} elapsed_s={time.perf_counter() - started:.2f}")
+            return result
+        finally:
+            self._running = False
+            if lock:
+                lock.close()
+
+    # ---------------------------------------------------------------
+    # Compaction
+    # ---------------------------------------------------------------
+    async def compact(self) -> int:
+        """Replace justification copies in sme_decision events with review ids."""
+        compacted = 0
+        after_id = max(self._compacted_through, self.archive.watermark)
+        while True:
+            async with AsyncSessionLocal() as db:
+                events = (await db.execute(
+                    select(EventLog.id, EventLog.application_id, EventLog.details)
+                    .where(EventLog.event_type == "sme_decision", EventLog.id > after_id)
+                    .order_by(EventLog.id)
+                    .limit(self.batch_size)
+                )).all()
+                if not events:
+                    break
+                updates = await self._compacted_details(db, events)
+            if updates:
+                async with AsyncSessionLocal() as db:
+                    await run_write(self._update_details(updates), db)
+                compacted += len(updates)
+                RETAINED.inc(len(updates), action="compacted")
+                await asyncio.sleep(self.pause)
+            after_id = self._compacted_through = events[-1].id
+        return compacted
+
+    @staticmethod
+    async def _compacted_details(db: AsyncSession, events) -> List[Dict[str, Any]]:
+        duplicates = [
+            e for e in events
+            if e.application_id is not None and isinstance(e.details, dict) and "justification" in e.details
+        ]
+        if not duplicates:
+            return []
+        reviews = (await db.execute(
+            select(Review.id, Review.application_id, Review.sme_type, Review.decision, Review.justification)
+            .where(Review.application_id.in_({e.application_id for e in duplicates}))
+            .order_by(Review.id)
+        )).all()
+        # Each add_review wrote one review and one event, in the same order
+        by_key = defaultdict(deque)
+        for review in reviews:
+            by_key[(review.application_id, review.sme_type, review.decision, review.justification)].append(review.id)
+
+        updates = []
+        for event in duplicates:
+            details = event.details
+            key = (event.application_id, details.get("sme_type"), details.get("decision"), details["justification"])
+            if by_key[key]:
+                compact = {k: v for k, v in details.items() if k != "justification"}
+                updates.append({"id": event.id, "details": {**compact, "review_id": by_key[key].popleft()}})
+        return updates
+
+    @staticmethod
+    def _update_details(updates: List[Dict[str, Any]]):
+        async def work(db: AsyncSession) -> None:
+            # ORM bulk UPDATE by primary key: one executemany
+            await db.execute(update(EventLog), updates)
+        return work
+
+    # ---------------------------------------------------------------
+    # Archival
+    # ---------------------------------------------------------------
+    async def archive_expired(self, now: Optional[datetime] = None) -> Dict[str, int]:
+        """Archive the id prefix of event_logs selected by the age and size policies."""
+        await self._finish_interrupted()
+
+        now = now or datetime.now(timezone.utc)
+        cutoff = (now - timedelta(days=self.retention_days)).replace(tzinfo=None) if self.retention_days else None
+        async with AsyncSessionLocal() as db:
+            total = (await db.execute(select(func.count()).select_from(EventLog))).scalar() or 0
+        excess = max(0, total - self.max_rows) if self.max_rows else 0
+
+        archived = segments = 0
+        while True:
+            watermark = self.archive.watermark
+            async with AsyncSessionLocal() as db:
+                rows = (await db.execute(
+                    select(EventLog.id, EventLog.application_id, EventLog.event_type,
+                           EventLog.details, EventLog.timestamp)
+                    .where(EventLog.id > watermark)
+                    .order_by(EventLog.id)
+                    .limit(self.segment_rows)
+                )).all()
+            events = []
+            for row in rows:
+                expired = cutoff is not None and (row.timestamp is None or _naive(row.timestamp) < cutoff)
+                if not (expired or archived + len(events) < excess):
+                    break
+                events.append(row._asdict())
+            if not events:
+                break
+
+            await asyncio.to_thread(self.archive.write_segment, events)
+            segments += 1
+            archived += await self._delete_ids([e["id"] for e in events])
+            if len(events) < len(rows) or len(rows) < self.segment_rows:
+                break
+        return {"archived": archived, "segments": segments}
+
+    async def _finish_interrupted(self) -> int:
+        """
+        Delete rows left at or below the watermark by a pass that wrote its
+        segment but did not get to delete it. Only rows whose id, type and
+        timestamp are in a segment are deleted; anything else is kept.
+        """
+        watermark = self.archive.watermark
+        async with AsyncSessionLocal() as db:
+            rows = (await db.execute(
+                select(EventLog.id, EventLog.event_type, EventLog.timestamp)
+                .where(EventLog.id <= watermark)
+                .order_by(EventLog.id)
+            )).all()
+        if not rows:
+            return 0
+        archived = await asyncio.to_thread(self.archive.fingerprints, rows[0].id, rows[-1].id)
+        ids = [
+            row.id for row in rows
+            if archived.get(row.id) == (row.event_type, _naive(row.timestamp) if row.timestamp else None)
+        ]
+        if len(ids) < len(rows):
+            logger.error(f"[Retention] {len(rows) - len(ids)} events at or below the archive watermark "
+                         f"{watermark} are not in the archive; keeping them")
+        if ids:
+            logger.warning(f"[Retention] Deleting {len(ids)} archived events left over from an interrupted pass")
+        return await self._delete_ids(ids)
+
+    async def _delete_ids(self, ids: List[int]) -> int:
+        """Delete the given (archived) event_logs rows in short batches."""
+        for start in range(0, len(ids), self.batch_size):
+            batch = ids[start:start + self.batch_size]
+            async with AsyncSessionLocal() as db:
+                await run_write(self._delete_batch(batch), db)
+            RETAINED.inc(len(batch), action="archived")
+            await asyncio.sleep(self.pause)
+        return len(ids)
+
+    @staticmethod
+    def _delete_batch(ids: List[int]):
+        async def work(db: AsyncSession) -> None:
+            await db.execute(delete(EventLog).where(EventLog.id.in_(ids)))
+        return work
+
+    # ---------------------------------------------------------------
+    # Internals
+    # ---------------------------------------------------------------
+    def _acquire_lock(self):
+        """Open lock file (held), None without fcntl, or False when another process holds it."""
+        if fcntl is None:
+            return None
+        self.archive.directory.mkdir(parents=True, exist_ok=True)
+        handle = open(self.archive.directory / LOCK_FILE, "a")
+        try:
+            fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            handle.close()
+            return False
+        return handle
+
+
+def _naive(ts: datetime) -> datetime:
+    return ts.astimezone(timezone.utc).replace(tzinfo=None) if ts.tzinfo is not None else ts
+
+
+# ===== Shared Instance =====
+event_retention = EventLogRetention()
+
+
+def get_event_retention() -> EventLogRetention:
+    return event_retention
+
+
+async def run_retention_periodically(interval: float = EVENT_LOG_RETENTION_INTERVAL_SECONDS) -> None:
+    """Background task: compact and archive event_logs every `interval` seconds."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await event_retention.run_once()
+        except Exception as e:
+            logger.error(f"[Retention] Pass failed, will retry next interval: {e}")
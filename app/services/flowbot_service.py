@@ -3,51 +3,216 @@
 
 Responsibilities:
 - Manage WebSocket and SSE client connections
-- Instantiate FlowBot with persona-aware avatar
+- Reuse cached FlowBot instances per session and avatar (see bot_cache)
 - Broadcast messages to all clients in a session
 - Send proactive greeting on connect
-- Support dynamic persona switching and fallback injection
+- Support dynamic persona switching (remembered per session, see bot_cache)
+  and fallback injection
+- Stream LLM replies as incremental "chunk" frames closed by a "done" frame,
+  merging deltas so a reply costs one frame per STREAM_COALESCE_MS at most
+- Publish broadcasts on the session bus so clients on other workers get them
+- Give each connection a bounded send queue drained by its own writer
+- Tag every broadcast with an event id and replay missed events when a
+  client reconnects with Last-Event-ID (SSE) or last_event_id (WS)
 """
 
 import asyncio
-from typing import Dict, Set, Optional
+import uuid
+from typing import Any, AsyncIterator, Dict, List, Set, Optional
 from fastapi import WebSocket
 from starlette.websockets import WebSocketDisconnect, WebSocketState
 from sse_starlette.sse import EventSourceResponse
 
 from app.agents.flowbot.flowbot import FlowBot
 from app.prompts.flowbot_prompts import AVATAR_MAP, PERSONAS
+from app.core.config import STREAM_COALESCE_MS, STREAM_LLM_REPLIES
 from app.core.logger import logger
+from app.core.metrics import trace, start_request, gauge
+from app.llm_client import LLMStreamInterrupted
+from app.services.session_bus import get_session_bus
+from app.services.client_outbox import ClientOutbox, OutboxClosed, DISCONNECT
+from app.services import replay_buffer
+from app.services.bot_cache import get_bot_cache
+from app.services.broadcast_frames import Frame, chunk_frame, done_frame, message_frame, sse_event, ws_frame
+
+WS_FLUSH_TIMEOUT_SECONDS = 2
 
 # ===== Client Tracking =====
-ws_clients: Dict[str, Set[WebSocket]] = {}
-sse_clients: Dict[str, Set[asyncio.Queue]] = {}
+ws_clients: Dict[str, Set[ClientOutbox]] = {}
+sse_clients: Dict[str, Set[ClientOutbox]] = {}
+
+
+def _discard_client(registry: Dict[str, Set[Any]], session_id: str, client: Any) -> None:
+    """Remove a client and drop the session's entry once it has none left."""
+    clients = registry.get(session_id)
+    if clients is None:
+        return
+    clients.discard(client)
+    if not clients:
+        del registry[session_id]
+
+
+gauge(
+    "permitflow_connected_clients",
+    "Connected chat clients by transport.",
+    lambda: [
+        ({"transport": "ws"}, sum(len(c) for c in ws_clients.values())),
+        ({"transport": "sse"}, sum(len(c) for c in sse_clients.values())),
+    ]
+)
 
 
 # ===== Broadcast Helper =====
-async def broadcast_message(session_id: str, message: str) -> None:
-    """Send a message to all WS and SSE clients in the session."""
-    logger.info(f"[BROADCAST][{session_id}] {message!r}")
+async def broadcast_message(session_id: str, message: str, log: bool = True) -> None:
+    """Send a message to all WS and SSE clients in the session, on every worker."""
+    if log:
+        logger.info(f"[BROADCAST][{session_id}] {message!r}")
+    await broadcast_frame(session_id, message_frame(message))
 
-    # WS clients
-    for ws in list(ws_clients.get(session_id, [])):
-        try:
-            if ws.application_state == WebSocketState.CONNECTED:
-                await ws.send_text(message)
-            else:
-                logger.debug(f"[WS][{session_id}] Skipping closed connection")
-                ws_clients[session_id].discard(ws)
-        except Exception as e:
-            logger.warning(f"[WS][{session_id}] Broadcast failed: {e}")
-            ws_clients[session_id].discard(ws)
 
-    # SSE clients
-    for queue in list(sse_clients.get(session_id, [])):
+async def broadcast_frame(session_id: str, frame: Frame) -> None:
+    """Publish a frame to the session's clients on every worker."""
+    with trace("broadcast"):
+        await get_session_bus().publish(session_id, frame, replay_buffer.next_event_id())
+
+
+async def deliver_local(session_id: str, frame: Frame, event_id: int) -> None:
+    """
+    Session bus handler: buffer the event for replay and enqueue it for this
+    worker's clients. Never waits on the network; each connection's writer
+    drains its own queue.
+    """
+    replay_buffer.record(session_id, event_id, frame)
+    for registry in (ws_clients, sse_clients):
+        for outbox in list(registry.get(session_id, ())):
+            if not outbox.offer(frame, event_id):
+                _discard_client(registry, session_id, outbox)
+
+
+def _attach_client(registry: Dict[str, Set[ClientOutbox]], outbox: ClientOutbox, last_event_id: int) -> int:
+    """
+    Queue the events a reconnecting client missed, then register it. Both
+    happen without yielding to the loop, so no broadcast slips in between.
+    Returns the number of events replayed.
+    """
+    missed = replay_buffer.events_after(outbox.session_id, last_event_id) if last_event_id else []
+    for event_id, frame in missed:
+        outbox.offer(frame, event_id)
+    registry.setdefault(outbox.session_id, set()).add(outbox)
+    return len(missed)
+
+
+async def _ws_writer(websocket: WebSocket, outbox: ClientOutbox) -> None:
+    """Drain a WebSocket's outbox until it closes or a send fails."""
+    try:
+        while True:
+            event_id, frame = await outbox.get()
+            await websocket.send_text(ws_frame(event_id, frame))
+    except OutboxClosed:
+        if outbox.close_reason == DISCONNECT and websocket.application_state == WebSocketState.CONNECTED:
+            # 1013 = "try again later"; the client reconnects with a fresh queue
+            await websocket.close(code=1013)
+    except Exception as e:
+        logger.warning(f"[WS][{outbox.session_id}] Send failed: {e}")
+        outbox.close("send_failed")
+
+
+# ===== Streaming Broadcast =====
+_STREAM_END = object()
+
+
+async def coalesce_deltas(deltas: AsyncIterator[str], window: float) -> AsyncIterator[str]:
+    """
+    Re-batch a delta stream so at most one piece is yielded per `window`
+    seconds. A delta after a quiet window goes out at once; deltas arriving
+    sooner are merged and sent when the window closes.
+
+    The source is drained by its own task, so waiting out a window never
+    cancels the source mid-await.
+    """
+    if window <= 0:
+        async for delta in deltas:
+            yield delta
+        return
+
+    queue: asyncio.Queue = asyncio.Queue()
+
+    async def pump() -> None:
         try:
-            await queue.put(message)
+            async for delta in deltas:
+                queue.put_nowait(delta)
         except Exception as e:
-            logger.warning(f"[SSE][{session_id}] Broadcast failed: {e}")
-            sse_clients[session_id].discard(queue)
+            queue.put_nowait(e)
+        queue.put_nowait(_STREAM_END)
+
+    loop = asyncio.get_running_loop()
+    pumping = asyncio.create_task(pump())
+    pending: List[str] = []
+    next_flush = 0.0
+    try:
+        while True:
+            timeout = max(0.0, next_flush - loop.time()) if pending else None
+            try:
+                item = await asyncio.wait_for(queue.get(), timeout)
+            except asyncio.TimeoutError:
+                item = None
+            if isinstance(item, str):
+                pending.append(item)
+                if loop.time() < next_flush:
+                    continue
+            if pending:
+                yield "".join(pending)
+                pending = []
+                next_flush = loop.time() + window
+            if isinstance(item, Exception):
+                raise item
+            if item is _STREAM_END:
+                return
+    finally:
+        pumping.cancel()
+        await asyncio.gather(pumping, return_exceptions=True)
+
+
+async def broadcast_stream(session_id: str, deltas: AsyncIterator[str]) -> str:
+    """
+    Relay a streamed reply to all clients in the session.
+
+    Deltas are merged per STREAM_COALESCE_MS window (see coalesce_deltas)
+    and sent as "chunk" frames {"id", "delta"}; the stream is
+    closed by a "done" frame {"id", "text"} carrying the full reply
+    so clients can reconcile anything they missed. If the reply fails
+    mid-stream, the "done" frame carries the fallback reply instead, which
+    replaces the partial text on the client. See broadcast_frames.
+
+    Returns:
+        The assembled reply text.
+    """
+    message_id = uuid.uuid4().hex
+    parts = []
+    try:
+        async for delta in coalesce_deltas(deltas, STREAM_COALESCE_MS / 1000):
+            parts.append(delta)
+            await broadcast_frame(session_id, chunk_frame(message_id, delta))
+        text = "".join(parts)
+    except LLMStreamInterrupted as e:
+        logger.warning(f"[BROADCAST][{session_id}] stream id={message_id} interrupted after {len(parts)} chunks")
+        text = e.fallback
+
+    await broadcast_frame(session_id, done_frame(message_id, text))
+    logger.info(f"[BROADCAST][{session_id}] streamed id={message_id} chunks={len(parts)} {text!r}")
+    return text
+
+
+async def _reply(bot: FlowBot, session_id: str, message_text: str, transport: str) -> str:
+    """Answer a message, streaming when enabled. Returns the reply text."""
+    start_request(session_id)
+    with trace("chat_turn", transport=transport):
+        if STREAM_LLM_REPLIES:
+            return await broadcast_stream(session_id, bot.stream_message(message_text))
+        reply_text = await bot.handle_message(message_text)
+        if reply_text.strip():
+            await broadcast_message(session_id, reply_text)
+        return reply_text
 
 
 # ===== Persona Switching Helper =====
@@ -62,15 +227,21 @@ def get_persona_switch(message: str) -> Optional[str]:
 
 
 # ===== WebSocket Connection Handler =====
-async def handle_ws_connection(websocket: WebSocket, avatar: str, session_id: str) -> None:
+async def handle_ws_connection(websocket: WebSocket, avatar: str, session_id: str, last_event_id: int = 0) -> None:
     """Manage a single WebSocket connection for FlowBot."""
     await websocket.accept()
-    ws_clients.setdefault(session_id, set()).add(websocket)
+    outbox = ClientOutbox(session_id, "ws")
+    replayed = _attach_client(ws_clients, outbox, last_event_id)
+    if replayed:
+        logger.info(f"[WS][{session_id}] Replaying {replayed} events after {last_event_id}")
+    writer = asyncio.create_task(_ws_writer(websocket, outbox))
 
     if avatar not in AVATAR_MAP:
         logger.warning(f"[WS][{session_id}] Unknown avatar '{avatar}', defaulting to 'default'")
 
-    bot = FlowBot(user_id=session_id, avatar=avatar)
+    bots = get_bot_cache()
+    avatar = bots.active_avatar(session_id, avatar)
+    bot = bots.get(session_id, avatar)
     logger.info(f"[WS][{session_id}] Client connected (avatar={avatar})")
 
     # Proactive greeting
@@ -86,22 +257,27 @@ async def handle_ws_connection(websocket: WebSocket, avatar: str, session_id: st
             new_persona = get_persona_switch(message_text)
             if new_persona:
                 logger.info(f"[WS][{session_id}] Persona switch → {new_persona}")
-                avatar = new_persona
-                bot = FlowBot(user_id=session_id, avatar=avatar)
-
-            # Handle message
-            reply_text = await bot.handle_message(message_text)
-
-            # Fallback injection
-            if not reply_text.strip():
-                logger.warning(f"[WS][{session_id}] Empty response — injecting fallback persona")
-                fallback_avatar = "resilient"
-                bot = FlowBot(user_id=session_id, avatar=fallback_avatar)
-                reply_text = await bot.handle_message(
-                    "Sorry, we lost connection. Want to pick up where we left off?"
-                )
+                bots.set_active_avatar(session_id, new_persona)
 
-            await broadcast_message(session_id, reply_text)
+            # Picks up a switch made on this or another worker
+            active = bots.active_avatar(session_id, avatar)
+            if new_persona or active != avatar:
+                avatar = active
+                bot = bots.get(session_id, avatar)
+
+            async with bots.turn(session_id):
+                # Handle message (broadcasts the reply)
+                reply_text = await _reply(bot, session_id, message_text, "ws")
+
+                # Fallback injection
+                if not reply_text.strip():
+                    logger.warning(f"[WS][{session_id}] Empty response — injecting fallback persona")
+                    fallback_avatar = "resilient"
+                    bot = bots.get(session_id, fallback_avatar)
+                    reply_text = await bot.handle_message(
+                        "Sorry, we lost connection. Want to pick up where we left off?"
+                    )
+                    await broadcast_message(session_id, reply_text)
 
     except WebSocketDisconnect as e:
         logger.info(f"[WS][{session_id}] Client disconnected cleanly: {e.code}")
@@ -109,13 +285,20 @@ async def handle_ws_connection(websocket: WebSocket, avatar: str, session_id: st
         logger.exception(f"[WS][{session_id}] Connection error: {e}")
         if websocket.application_state == WebSocketState.CONNECTED:
             fallback_avatar = "empathetic"
-            bot = FlowBot(user_id=session_id, avatar=fallback_avatar)
-            fallback_msg = await bot.handle_message(
-                "Something went wrong, but I'm here to help you get back on track."
-            )
+            bot = bots.get(session_id, fallback_avatar)
+            async with bots.turn(session_id):
+                fallback_msg = await bot.handle_message(
+                    "Something went wrong, but I'm here to help you get back on track."
+                )
             await broadcast_message(session_id, fallback_msg)
     finally:
-        ws_clients[session_id].discard(websocket)
+        # Let the writer flush what is already queued (e.g. a fallback reply)
+        outbox.close()
+        _discard_client(ws_clients, session_id, outbox)
+        try:
+            await asyncio.wait_for(writer, timeout=WS_FLUSH_TIMEOUT_SECONDS)
+        except (asyncio.TimeoutError, Exception):
+            writer.cancel()
         try:
             await websocket.close()
         except Exception:
@@ -124,21 +307,26 @@ async def handle_ws_connection(websocket: WebSocket, avatar: str, session_id: st
 
 
 # ===== SSE Event Stream =====
-async def sse_event_stream(session_id: str) -> EventSourceResponse:
+async def sse_event_stream(session_id: str, last_event_id: int = 0) -> EventSourceResponse:
     """Async generator for SSE connections."""
-    queue: asyncio.Queue[str] = asyncio.Queue()
-    sse_clients.setdefault(session_id, set()).add(queue)
+    outbox = ClientOutbox(session_id, "sse")
+    replayed = _attach_client(sse_clients, outbox, last_event_id)
+    if replayed:
+        logger.info(f"[SSE][{session_id}] Replaying {replayed} events after {last_event_id}")
     logger.info(f"[SSE][{session_id}] Client connected (total SSE clients: {len(sse_clients[session_id])})")
 
     async def event_generator():
         try:
             while True:
-                message = await queue.get()
-                yield {"event": "message", "data": message}
+                event_id, frame = await outbox.get()
+                yield sse_event(event_id, frame)
+        except OutboxClosed:
+            logger.warning(f"[SSE][{session_id}] Closing stream: {outbox.close_reason}")
         except asyncio.CancelledError:
             pass
         finally:
-            sse_clients[session_id].discard(queue)
+            outbox.close()
+            _discard_client(sse_clients, session_id, outbox)
             logger.info(f"[SSE][{session_id}] Client disconnected")
 
     return EventSourceResponse(event_generator())
@@ -150,17 +338,19 @@ async def handle_sse_send(session_id: str, text: str, avatar: str) -> None:
     if avatar not in AVATAR_MAP:
         logger.warning(f"[SSE][{session_id}] Unknown avatar '{avatar}', defaulting to 'default'")
 
-    bot = FlowBot(user_id=session_id, avatar=avatar)
+    bots = get_bot_cache()
+    avatar = bots.active_avatar(session_id, avatar)
+    bot = bots.get(session_id, avatar)
     logger.info(f"[SSE][{session_id}] Processing POST message from avatar={avatar}: {text!r}")
 
-    reply_text = await bot.handle_message(text)
+    async with bots.turn(session_id):
+        reply_text = await _reply(bot, session_id, text, "sse")
 
-    if not reply_text.strip():
-        logger.warning(f"[SSE][{session_id}] Empty response — injecting fallback persona")
-        fallback_avatar = "resilient"
-        bot = FlowBot(user_id=session_id, avatar=fallback_avatar)
-        reply_text = await bot.handle_message(
-            "Sorry, we lost connection. Want to pick up where we left off?"
-        )
-
-    await broadcast_message(session_id=session_id, message=reply_text)
\ No newline at end of file
+        if not reply_text.strip():
+            logger.warning(f"[SSE][{session_id}] Empty response — injecting fallback persona")
+            fallback_avatar = "resilient"
+            bot = bots.get(session_id, fallback_avatar)
+            reply_text = await bot.handle_message(
+                "Sorry, we lost connection. Want to pick up where we left off?"
+            )
+            await broadcast_message(session_id=session_id, message=reply_text)
\ No newline at end of file
@@ -0,0 +1,208 @@
+"""
+intent_matcher.py — Precompiled intent index for FlowBot.
+
+Responsibilities:
+- Compile GENERAL_INTENTS once into a matcher over normalized, synonym-expanded patterns.
+- Resolve a message to the first matching intent in catalog order.
+- Score each match so callers can skip LLM polishing on exact hits. The
+  score is the best over all of the chosen intent's patterns, so a message
+  hitting several of its phrases scores at least as high as its best hit.
+
+Matching semantics mirror the original nested loop in FlowBot.handle_message:
+a message variant and a pattern variant match when they are equal or either
+is a substring of the other, and the winner is the first intent/pattern in
+catalog order. Two structures cover the two substring directions:
+- "pattern in message": an Aho-Corasick automaton over all pattern variants.
+- "message in pattern": one corpus string of all pattern variants in catalog
+  order, so the first `str.find` hit is the earliest-ranked pattern.
+
+Future Changes:
+- Token-level scoring for fuzzy matches.
+"""
+
+from bisect import bisect_right
+from typing import Any, Dict, List, NamedTuple, Optional, Set, Tuple
+
+from app.core.config import GENERAL_INTENTS
+from app.core.logger import logger
+from app.utils.text_utils import expand_with_synonyms
+
+# Pattern variants never contain a newline (normalize_text collapses whitespace),
+# so it is safe to use as a corpus separator.
+_CORPUS_SEPARATOR = "\n"
+_NO_MATCH = float("inf")
+
+
+class IntentMatch(NamedTuple):
+    """Result of a successful match."""
+    intent: str
+    # 1.0 for an exact variant match, else the best length ratio over the
+    # intent's patterns
+    confidence: float
+    exact: bool
+
+
+class _AhoCorasick:
+    """
+    Minimal Aho-Corasick automaton that reports the best (lowest) rank of any
+    keyword occurring in a text. Each node keeps the min rank over its own
+    keyword and everything reachable through its failure chain, so scanning
+    a text is a single pass with no output-list walks.
+    """
+
+    def __init__(self, keywords: Dict[str, int]):
+        self.goto: List[Dict[str, int]] = [{}]
+        self.fail: List[int] = [0]
+        self.best: List[float] = [_NO_MATCH]
+
+        for keyword, rank in keywords.items():
+            node = 0
+            for ch in keyword:
+                nxt = self.goto[node].get(ch)
+                if nxt is None:
+                    nxt = len(self.goto)
+                    self.goto[node][ch] = nxt
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.best.append(_NO_MATCH)
+                node = nxt
+            self.best[node] = min(self.best[node], rank)
+
+        # BFS to wire failure links and propagate best ranks
+        queue = list(self.goto[0].values())
+        head = 0
+        while head < len(queue):
+            node = queue[head]
+            head += 1
+            for ch, child in self.goto[node].items():
+                queue.append(child)
+                f = self.fail[node]
+                while f and ch not in self.goto[f]:
+                    f = self.fail[f]
+                target = self.goto[f].get(ch, 0)
+                self.fail[child] = target if target != child else 0
+                self.best[child] = min(self.best[child], self.best[self.fail[child]])
+
+    def best_rank(self, text: str) -> float:
+        goto, fail, best = self.goto, self.fail, self.best
+        node = 0
+        found = best[0]
+        for ch in text:
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            if best[node] < found:
+                found = best[node]
+        return found
+
+
+class IntentMatcher:
+    """
+    Compiled view of an intent catalog.
+
+    Ranks are positions in (intent order, pattern order); a lower rank wins,
+    which reproduces the first-match behavior of the original loop.
+    """
+
+    def __init__(self, intents: Dict[str, Any]):
+        # rank -> (intent_name, pattern variants)
+        self._patterns: List[Tuple[str, Set[str]]] = []
+        # intent_name -> variants of each of its patterns, for scoring
+        self._intent_variants: Dict[str, List[Set[str]]] = {}
+        keyword_ranks: Dict[str, int] = {}
+        corpus_parts: List[str] = []
+        self._corpus_offsets: List[int] = []
+        self._corpus_ranks: List[int] = []
+
+        offset = 0
+        for intent_name, intent_data in intents.items():
+            for pattern in intent_data.get("patterns", []):
+                rank = len(self._patterns)
+                variants = expand_with_synonyms(pattern)
+                self._patterns.append((intent_name, variants))
+                self._intent_variants.setdefault(intent_name, []).append(variants)
+                for variant in sorted(variants):
+                    keyword_ranks.setdefault(variant, rank)
+                    self._corpus_offsets.append(offset)
+                    self._corpus_ranks.append(rank)
+                    corpus_parts.append(variant)
+                    offset += len(variant) + len(_CORPUS_SEPARATOR)
+
+        self._corpus = _CORPUS_SEPARATOR.join(corpus_parts)
+        # Empty pattern variants are a substring of every message
+        self._empty_rank = keyword_ranks.pop("", _NO_MATCH)
+        self._automaton = _AhoCorasick(keyword_ranks)
+
+        logger.info(
+            f"[IntentMatcher] Compiled {len(intents)} intents, "
+            f"{len(self._patterns)} patterns, {len(corpus_parts)} variants"
+        )
+
+    def _rank_for_variant(self, variant: str) -> float:
+        # Pattern variant contained in (or equal to) the message variant
+        rank = min(self._empty_rank, self._automaton.best_rank(variant))
+
+        # Message variant contained in a pattern variant; corpus is in rank order
+        pos = self._corpus.find(variant)
+        if pos != -1:
+            idx = bisect_right(self._corpus_offsets, pos) - 1
+            rank = min(rank, self._corpus_ranks[idx])
+        return rank
+
+    @staticmethod
+    def _confidence(msg_variants: Set[str], pattern_variants: Set[str]) -> float:
+        """
+        Score how much of the longer string the shorter one covers, taking the
+        best pair. Equal variants score 1.0.
+        """
+        score = 0.0
+        for mv in msg_variants:
+            for pv in pattern_variants:
+                if mv == pv:
+                    return 1.0
+                if pv in mv or mv in pv:
+                    longer = max(len(mv), len(pv))
+                    score = max(score, min(len(mv), len(pv)) / longer)
+        return score
+
+    def match(self, message: str) -> Optional[IntentMatch]:
+        """
+        Return the first intent matching the message, or None.
+
+        Args:
+            message: Raw user message.
+
+        Returns:
+            IntentMatch with the intent name and a confidence in [0, 1].
+        """
+        if not self._patterns:
+            return None
+
+        msg_variants = expand_with_synonyms(message)
+        best = _NO_MATCH
+        for variant in msg_variants:
+            best = min(best, self._rank_for_variant(variant))
+            if best == 0:
+                break
+
+        if best == _NO_MATCH:
+            return None
+
+        intent_name, _ = self._patterns[int(best)]
+        # Score against every pattern of the intent, not just the winning one
+        confidence = max(
+            self._confidence(msg_variants, variants) for variants in self._intent_variants[intent_name]
+        )
+        return IntentMatch(intent_name, confidence, confidence == 1.0)
+
+
+# ===== Shared Instance =====
+_matcher: Optional[IntentMatcher] = None
+
+
+def get_intent_matcher() -> IntentMatcher:
+    """Return the matcher compiled from GENERAL_INTENTS (built on first use)."""
+    global _matcher
+    if _matcher is None:
+        _matcher = IntentMatcher(GENERAL_INTENTS)
+    return _matcher
@@ -0,0 +1,272 @@
+"""
+job_queue.py — Durable in-process background job queue.
+
+Responsibilities:
+- Persist jobs in the `jobs` table so work survives worker restarts.
+- Run handlers on a bounded pool of asyncio workers.
+- Retry failed jobs with exponential backoff up to max_attempts.
+- De-duplicate jobs by idempotency key; a key whose job failed for good can
+  be enqueued again, which re-arms that job.
+- Resume unfinished jobs at startup (see app.main lifespan).
+
+Job rows are read and written with the sync engine on a worker thread
+(asyncio.to_thread), so queue bookkeeping never blocks the event loop.
+
+Jobs are claimed with a conditional UPDATE plus a lease, so a job whose
+worker died is picked up again once its lease lapses; at startup, jobs held
+by dead processes on this host are released immediately.
+
+Future Changes:
+- Priorities and per-type concurrency limits.
+"""
+
+import asyncio
+import os
+import socket
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from sqlalchemy import and_, or_
+from sqlalchemy.exc import IntegrityError
+
+from app.core.config import SITE_PROPERTIES
+from app.core.logger import logger
+from app.db.database import SessionLocal
+from app.db.models import Job
+
+# ===== Settings =====
+JOB_QUEUE_WORKERS = SITE_PROPERTIES.get("JOB_QUEUE_WORKERS", 4)
+JOB_MAX_ATTEMPTS = SITE_PROPERTIES.get("JOB_MAX_ATTEMPTS", 3)
+JOB_RETRY_BACKOFF_SECONDS = SITE_PROPERTIES.get("JOB_RETRY_BACKOFF_SECONDS", 2)
+JOB_LEASE_SECONDS = SITE_PROPERTIES.get("JOB_LEASE_SECONDS", 300)
+JOB_POLL_SECONDS = 1.0
+MAX_BACKOFF_SECONDS = 300
+
+# Handlers receive the job payload and the (detached) Job row for attempt info
+JobHandler = Callable[[Dict[str, Any], Job], Awaitable[None]]
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class JobQueue:
+    """
+    Bounded worker pool over the persistent `jobs` table.
+    """
+
+    # ---------------------------------------------------------------
+    # Initialization
+    # ---------------------------------------------------------------
+    def __init__(self, workers: int = JOB_QUEUE_WORKERS, lease_seconds: float = JOB_LEASE_SECONDS):
+        self.workers = max(1, workers)
+        self.lease = timedelta(seconds=lease_seconds)
+        self.worker_id = ""
+        self._handlers: Dict[str, JobHandler] = {}
+        self._tasks: list[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+
+    @property
+    def is_running(self) -> bool:
+        return bool(self._tasks)
+
+    # ---------------------------------------------------------------
+    # Public API
+    # ---------------------------------------------------------------
+    def register(self, job_type: str, handler: JobHandler) -> None:
+        """Register the coroutine that processes jobs of a given type."""
+        self._handlers[job_type] = handler
+
+    async def enqueue(
+        self,
+        job_type: str,
+        payload: Dict[str, Any],
+        job_key: str,
+        max_attempts: int = JOB_MAX_ATTEMPTS,
+    ) -> int:
+        """
+        Persist a job and wake a worker. Enqueueing an existing job_key
+        returns the existing job's id instead of creating a duplicate; if that
+        job has failed, it is reset to pending with a fresh attempt budget.
+        """
+        job_id = await asyncio.to_thread(self._insert_job, job_type, payload, job_key, max_attempts)
+        if self._wakeup:
+            self._wakeup.set()
+        return job_id
+
+    async def start(self) -> None:
+        """Release jobs orphaned by dead local workers and start the pool."""
+        if self.is_running:
+            return
+        # Resolved here rather than at import: with preload_app the module is
+        # imported in the gunicorn master, not the worker process.
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        resumed = await asyncio.to_thread(self._release_orphaned_jobs)
+        self._wakeup = asyncio.Event()
+        self._tasks = [
+            asyncio.create_task(self._worker(i), name=f"job-worker-{i}")
+            for i in range(self.workers)
+        ]
+        logger.info(f"[JobQueue] Started workers={self.workers} resumed={resumed} worker_id={self.worker_id}")
+
+    async def stop(self) -> None:
+        """Cancel workers. Interrupted jobs are resumed on the next start."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        logger.info("[JobQueue] Stopped")
+
+    # ---------------------------------------------------------------
+    # Internals
+    # ---------------------------------------------------------------
+    def _insert_job(self, job_type: str, payload: Dict[str, Any], job_key: str, max_attempts: int) -> int:
+        db = SessionLocal()
+        try:
+            existing = db.query(Job.id).filter(Job.job_key == job_key).first()
+            if existing:
+                # Conditional so two concurrent re-submits re-arm the job once
+                rearmed = db.query(Job).filter(Job.id == existing[0], Job.status == "failed").update({
+                    Job.status: "pending",
+                    Job.payload: payload,
+                    Job.attempts: 0,
+                    Job.max_attempts: max_attempts,
+                    Job.run_after: _utcnow(),
+                }, synchronize_session=False)
+                db.commit()
+                if rearmed:
+                    logger.info(f"[JobQueue] Re-enqueued failed id={existing[0]} key={job_key}")
+                else:
+                    logger.info(f"[JobQueue] Duplicate enqueue ignored key={job_key}")
+                return existing[0]
+
+            job = Job(job_key=job_key, job_type=job_type, payload=payload, max_attempts=max_attempts)
+            db.add(job)
+            try:
+                db.commit()
+            except IntegrityError:
+                db.rollback()
+                return db.query(Job.id).filter(Job.job_key == job_key).scalar()
+            logger.info(f"[JobQueue] Enqueued id={job.id} type={job_type} key={job_key}")
+            return job.id
+        finally:
+            db.close()
+
+    def _release_orphaned_jobs(self) -> int:
+        host = socket.gethostname()
+        db = SessionLocal()
+        try:
+            released = 0
+            for job in db.query(Job).filter(Job.status == "running").all():
+                owner_host, _, owner_pid = (job.locked_by or "").rpartition(":")
+                if owner_host == host and owner_pid.isdigit() and _pid_alive(int(owner_pid)) \
+                        and int(owner_pid) != os.getpid():
+                    continue
+                if owner_host and owner_host != host:
+                    continue  # another host's job; its lease decides
+                job.status = "pending"
+                job.locked_by = None
+                job.lease_expires_at = None
+                released += 1
+            db.commit()
+            if released:
+                logger.info(f"[JobQueue] Released {released} orphaned running jobs")
+            return db.query(Job).filter(Job.status == "pending").count()
+        finally:
+            db.close()
+
+    def _claim_next(self) -> Optional[Job]:
+        now = _utcnow()
+        claimable = or_(
+            and_(Job.status == "pending", Job.run_after <= now),
+            and_(Job.status == "running", Job.lease_expires_at < now),
+        )
+        db = SessionLocal()
+        try:
+            candidates = db.query(Job.id).filter(claimable).order_by(Job.run_after, Job.id).limit(self.workers).all()
+            for (job_id,) in candidates:
+                claimed = db.query(Job).filter(Job.id == job_id, claimable).update({
+                    Job.status: "running",
+                    Job.locked_by: self.worker_id,
+                    Job.lease_expires_at: now + self.lease,
+                    Job.attempts: Job.attempts + 1,
+                }, synchronize_session=False)
+                db.commit()
+                if claimed:
+                    job = db.query(Job).filter(Job.id == job_id).first()
+                    db.expunge(job)
+                    return job
+            return None
+        finally:
+            db.close()
+
+    def _finish(self, job_id: int, error: Optional[str] = None) -> None:
+        db = SessionLocal()
+        try:
+            job = db.query(Job).filter(Job.id == job_id).first()
+            if job is None:
+                return
+            job.locked_by = None
+            job.lease_expires_at = None
+            if error is None:
+                job.status = "done"
+                job.last_error = None
+            elif job.attempts >= job.max_attempts:
+                job.status = "failed"
+                job.last_error = error
+                logger.error(f"[JobQueue] Failed id={job.id} type={job.job_type} attempts={job.attempts}: {error}")
+            else:
+                delay = min(JOB_RETRY_BACKOFF_SECONDS * 2 ** (job.attempts - 1), MAX_BACKOFF_SECONDS)
+                job.status = "pending"
+                job.last_error = error
+                job.run_after = _utcnow() + timedelta(seconds=delay)
+                logger.warning(f"[JobQueue] Retry id={job.id} type={job.job_type} in {delay}s: {error}")
+            db.commit()
+        finally:
+            db.close()
+
+    async def _worker(self, index: int) -> None:
+        while True:
+            job = await asyncio.to_thread(self._claim_next)
+            if job is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=JOB_POLL_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            handler = self._handlers.get(job.job_type)
+            if handler is None:
+                await asyncio.to_thread(
+                    self._finish, job.id, f"No handler registered for job type '{job.job_type}'")
+                continue
+
+            logger.info(f"[JobQueue] worker={index} running id={job.id} type={job.job_type} attempt={job.attempts}")
+            try:
+                await handler(job.payload or {}, job)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"[JobQueue] id={job.id} raised: {e}", exc_info=True)
+                await asyncio.to_thread(self._finish, job.id, str(e))
+            else:
+                await asyncio.to_thread(self._finish, job.id)
+
+
+# ===== Shared Instance =====
+job_queue = JobQueue()
+
+
+def get_job_queue() -> JobQueue:
+    return job_queue
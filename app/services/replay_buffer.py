@@ -0,0 +1,117 @@
+"""
+replay_buffer.py — Per-session replay of recent broadcast events.
+
+Responsibilities:
+- Assign every broadcast an increasing event id, sent as the SSE `id:` field
+  and as `event_id` in WS frames so clients can resume and de-duplicate.
+- Keep the last REPLAY_BUFFER_SIZE events per session in a ring buffer.
+- Return only the events after a client's Last-Event-ID on reconnect.
+- Drop a streamed reply's "chunk" events once its "done" event (which carries
+  the full text) is buffered, so a replay resends one event per reply.
+
+Event ids are microsecond timestamps made strictly increasing. With a shared
+state backend they come from one counter in the state store, so workers never
+hand out the same or an out-of-order id because of clock skew; the timestamp
+floor keeps them increasing across restarts. Every worker records every event
+it receives from the session bus. Events from different workers can still
+arrive out of id order, so the buffer is kept sorted by id on insert.
+
+Future Changes:
+- Persist buffers in the shared state backend for replay across hosts.
+"""
+
+import bisect
+import time
+from collections import deque
+from typing import Deque, List, Optional, Tuple
+
+from app.core.config import SITE_PROPERTIES
+from app.core.logger import logger
+from app.core.metrics import counter
+from app.services.broadcast_frames import CHUNK, DONE, Frame
+from app.services.session_manager import SessionManager
+from app.services.session_state import get_session_state
+
+# ===== Settings =====
+REPLAY_BUFFER_SIZE = SITE_PROPERTIES.get("REPLAY_BUFFER_SIZE", 200)
+REPLAY_BUFFER_SESSIONS = SITE_PROPERTIES.get("SESSION_MAX_COUNT", 5000)
+REPLAY_IDLE_TIMEOUT_MINUTES = SITE_PROPERTIES.get("SESSION_IDLE_TIMEOUT_MINUTES", 60)
+EVENT_ID_SEQUENCE = "sequence:event_id"
+
+Event = Tuple[int, Frame]
+
+REPLAYED = counter("permitflow_replay_events_total", "Events replayed to reconnecting clients.")
+
+_buffers = SessionManager(
+    timeout_minutes=REPLAY_IDLE_TIMEOUT_MINUTES,
+    max_sessions=REPLAY_BUFFER_SESSIONS,
+    name="replay"
+)
+_last_event_id = 0
+
+
+def next_event_id() -> int:
+    global _last_event_id
+    floor = max(_last_event_id + 1, time.time_ns() // 1000)
+    state = get_session_state()
+    _last_event_id = state.next_sequence(EVENT_ID_SEQUENCE, floor) if state.shared else floor
+    return _last_event_id
+
+
+def _events(session_id: str) -> Deque[Event]:
+    session = _buffers.get_or_create_session(session_id)
+    events = session.get("events")
+    if events is None:
+        events = session["events"] = deque(maxlen=REPLAY_BUFFER_SIZE)
+    return events
+
+
+def record(session_id: str, event_id: int, frame: Frame) -> None:
+    """Buffer a broadcast event for later replay."""
+    events = _events(session_id)
+    if frame.kind == DONE:
+        stream_id = frame.payload.get("id")
+        superseded = [e for e in events if e[1].kind == CHUNK and e[1].payload.get("id") == stream_id]
+        for event in superseded:
+            events.remove(event)
+    _insert_sorted(events, (event_id, frame))
+
+
+def _insert_sorted(events: Deque[Event], event: Event) -> None:
+    if not events or events[-1][0] <= event[0]:
+        events.append(event)  # the usual case: newest event
+        return
+    if len(events) == events.maxlen:
+        if event[0] < events[0][0]:
+            return  # older than everything the full buffer keeps
+        events.popleft()
+    events.insert(bisect.bisect_right(events, event[0], key=lambda e: e[0]), event)
+
+
+def events_after(session_id: str, last_event_id: int) -> List[Event]:
+    """
+    Buffered events newer than last_event_id, oldest first. If the client is
+    further behind than the buffer reaches, everything buffered is returned.
+    """
+    session = _buffers.get_session(session_id)
+    events = session.get("events") if session else None
+    if not events:
+        return []
+    missed: List[Event] = []
+    for event in reversed(events):
+        if event[0] <= last_event_id:
+            break
+        missed.append(event)
+    missed.reverse()
+    if missed and len(missed) == len(events) and last_event_id:
+        logger.info(f"[Replay][{session_id}] last_event_id={last_event_id} older than buffer; replaying all {len(missed)}")
+    REPLAYED.inc(len(missed))
+    return missed
+
+
+def parse_last_event_id(value: Optional[str]) -> int:
+    """Parse a Last-Event-ID header/query value; invalid or missing means 0."""
+    try:
+        return max(0, int(value)) if value else 0
+    except ValueError:
+        return 0
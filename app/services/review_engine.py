@@ -0,0 +1,147 @@
+"""
+review_engine.py — Concurrent SME review fan-out.
+
+Responsibilities:
+- Run every configured SME tool for an application concurrently.
+- Bound each SME with its own timeout so one slow reviewer cannot stall submission.
+- Persist each decision via AsyncApplicationService.add_review as soon as it arrives.
+- Optionally cancel outstanding SMEs once a decline makes the outcome certain.
+- Summarize the outcome for the applicant.
+
+Future Changes:
+- Load the SME roster per permit type instead of from site properties.
+"""
+
+import asyncio
+from typing import Any, Callable, Dict, List, Optional
+
+from app.agents.smes.architecture_sme import get_architecture_sme_tool
+from app.agents.smes.cyber_sme import get_cyber_sme_tool
+from app.agents.smes.infra_sme import get_infra_sme_tool
+from app.core.config import SITE_PROPERTIES
+from app.core.logger import logger
+from app.core.metrics import trace
+from app.langchain_config import get_llm_provider
+from app.services.application_service import AsyncApplicationService
+
+# ===== SME Registry =====
+SME_TOOL_FACTORIES: Dict[str, Callable[[], Any]] = {
+    "cyber": get_cyber_sme_tool,
+    "architecture": get_architecture_sme_tool,
+    "infra": get_infra_sme_tool,
+}
+
+SME_LABELS: Dict[str, str] = {
+    "cyber": "Cybersecurity",
+    "architecture": "Architecture",
+    "infra": "Infrastructure",
+}
+
+# ===== Settings =====
+SME_REVIEWERS: List[str] = SITE_PROPERTIES.get("SME_REVIEWERS", ["cyber", "architecture"])
+SME_REVIEW_TIMEOUT_SECONDS: float = SITE_PROPERTIES.get("SME_REVIEW_TIMEOUT_SECONDS", 30)
+SME_CANCEL_ON_DECLINE: bool = SITE_PROPERTIES.get("SME_CANCEL_ON_DECLINE", False)
+
+CANCELLED = "cancelled"
+
+# Job type used to run reviews on the background job queue
+SME_REVIEW_JOB = "sme_review"
+
+
+def _error_result(justification: str) -> Dict[str, Any]:
+    return {"decision": "error", "justification": justification, "confidence": 0.0}
+
+
+async def _run_sme(sme_type: str, application_str: str, timeout: float) -> Dict[str, Any]:
+    """Run one SME tool, converting timeouts and failures into an error decision."""
+    tool = SME_TOOL_FACTORIES[sme_type]()
+    try:
+        with trace("sme_review", sme=sme_type, provider=get_llm_provider()):
+            result = await asyncio.wait_for(tool.ainvoke(application_str), timeout=timeout)
+    except asyncio.TimeoutError:
+        logger.warning(f"[SME Review] sme={sme_type} timed out after {timeout}s")
+        return _error_result(f"Review timed out after {timeout}s")
+    except Exception as e:
+        logger.warning(f"[SME Review] sme={sme_type} failed: {e}", exc_info=True)
+        return _error_result(f"Review failed: {e}")
+
+    if not isinstance(result, dict):
+        return _error_result("Invalid SME response")
+    return result
+
+
+async def run_sme_reviews(
+    app_service: AsyncApplicationService,
+    app_id: int,
+    application_str: str,
+    sme_types: Optional[List[str]] = None,
+    timeout: float = SME_REVIEW_TIMEOUT_SECONDS,
+    cancel_on_decline: bool = SME_CANCEL_ON_DECLINE,
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Run SME reviews concurrently and persist decisions as they complete.
+
+    Args:
+        app_service: Service used to persist reviews and events.
+        app_id: Application under review.
+        application_str: Serialized application data passed to each SME.
+        sme_types: SMEs to run; defaults to SME_REVIEWERS.
+        timeout: Per-SME timeout in seconds.
+        cancel_on_decline: Cancel outstanding SMEs after the first decline.
+
+    Returns:
+        Mapping of sme_type to its result dict, in the order requested.
+        SMEs cancelled after a decline have decision "cancelled".
+    """
+    sme_types = [s for s in (sme_types or SME_REVIEWERS) if s in SME_TOOL_FACTORIES]
+    tasks = {
+        asyncio.create_task(_run_sme(sme_type, application_str, timeout)): sme_type
+        for sme_type in sme_types
+    }
+    logger.info(f"[SME Review] app_id={app_id} started smes={sme_types} timeout={timeout}s")
+
+    results: Dict[str, Dict[str, Any]] = {}
+    pending = set(tasks)
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                sme_type = tasks[task]
+                result = task.result()
+                results[sme_type] = result
+                await app_service.add_review(
+                    app_id, sme_type, result.get("decision"), result.get("justification"))
+                logger.info(f"[SME Review] app_id={app_id} sme={sme_type} decision={result.get('decision')}")
+
+            declined = any(r.get("decision") == "decline" for r in results.values())
+            if cancel_on_decline and declined and pending:
+                cancelled = [tasks[t] for t in pending]
+                for task in pending:
+                    task.cancel()
+                for sme_type in cancelled:
+                    results[sme_type] = {"decision": CANCELLED, "justification": "Outcome already decided"}
+                await app_service.log_event(app_id, "sme_review_cancelled", {"sme_types": cancelled})
+                logger.info(f"[SME Review] app_id={app_id} cancelled={cancelled} after decline")
+                pending = set()
+    finally:
+        for task in pending:
+            task.cancel()
+
+    return {sme_type: results[sme_type] for sme_type in sme_types if sme_type in results}
+
+
+async def summarize_reviews(app_service: AsyncApplicationService, app_id: int, reviews: Dict[str, Dict[str, Any]]) -> str:
+    """
+    Build the applicant-facing summary and flag the application for human
+    review when every SME approved.
+    """
+    results = [
+        f"{SME_LABELS.get(sme_type, sme_type)}: {review.get('decision')}"
+        for sme_type, review in reviews.items()
+    ]
+
+    # Check if all approved
+    if reviews and all(r.get("decision") == "approve" for r in reviews.values()):
+        await app_service.log_event(app_id, "human_review_ready", {})
+        return "SME Reviews Complete. All approved! Application is now ready for Human Review.\n" + "\n".join(results)
+    return "SME Reviews Complete. Issues found:\n" + "\n".join(results)
@@ -0,0 +1,66 @@
+"""
+review_jobs.py — Background job handlers for SME reviews.
+
+Responsibilities:
+- Run SME reviews for a submitted application on the job queue.
+- Skip SMEs that already recorded a decision, so retries and resumed jobs
+  only redo the missing reviews.
+- Raise on SME errors while attempts remain so the queue retries them.
+- Push the outcome to the applicant's session when reviews complete.
+"""
+
+import json
+from typing import Any, Dict
+
+from app.core.logger import logger
+from app.services.application_service import AsyncApplicationService
+from app.services.flowbot_service import broadcast_message
+from app.db.models import Job
+from app.services.job_queue import JobQueue
+from app.services.review_engine import (
+    SME_REVIEW_JOB,
+    SME_REVIEWERS,
+    run_sme_reviews,
+    summarize_reviews,
+)
+
+
+async def handle_sme_review_job(payload: Dict[str, Any], job: Job) -> None:
+    app_id = payload["app_id"]
+    session_id = payload["session_id"]
+
+    app_service = AsyncApplicationService()
+    try:
+        app = await app_service.get_application(app_id)
+        if app is None:
+            logger.warning(f"[SME Review Job] app_id={app_id} not found — skipping")
+            return
+
+        # Latest decision per SME already on record (from an earlier attempt)
+        reviews: Dict[str, Dict[str, Any]] = {}
+        for review in await app_service.get_reviews(app_id):
+            if review.decision not in (None, "error"):
+                reviews[review.sme_type] = {
+                    "decision": review.decision,
+                    "justification": review.justification,
+                }
+
+        remaining = [sme for sme in SME_REVIEWERS if sme not in reviews]
+        if remaining:
+            reviews.update(await run_sme_reviews(
+                app_service, app_id, json.dumps(app.data), sme_types=remaining))
+
+        failed = [sme for sme, review in reviews.items() if review.get("decision") == "error"]
+        if failed and job.attempts < job.max_attempts:
+            raise RuntimeError(f"SME reviews failed for {failed}")
+
+        ordered = {sme: reviews[sme] for sme in SME_REVIEWERS if sme in reviews}
+        summary = await summarize_reviews(app_service, app_id, ordered)
+    finally:
+        await app_service.close()
+
+    await broadcast_message(session_id, summary)
+
+
+def register_review_jobs(queue: JobQueue) -> None:
+    queue.register(SME_REVIEW_JOB, handle_sme_review_job)
@@ -0,0 +1,209 @@
+"""
+session_bus.py — Pub/sub for session broadcasts across worker processes.
+
+Responsibilities:
+- Deliver a session message to every client connected to any worker.
+- In-process backend for a single worker (the default).
+- Unix-datagram backend for several workers on one Linux host: each worker
+  binds a socket in SESSION_BUS_DIR and publishes by sending the message to
+  every other worker's socket; received messages are fed to the local handler
+  in arrival order.
+
+Select the backend with the SESSION_BUS_BACKEND env var ("inprocess" or
+"unix"). gunicorn_conf.py switches to "unix" when it runs more than one worker.
+
+Future Changes:
+- Redis/NATS backend for multi-host deployments.
+"""
+
+import asyncio
+import json
+import os
+import socket
+import tempfile
+import time
+from typing import Awaitable, Callable, List, Optional
+
+from app.core.logger import logger
+from app.core.metrics import counter
+from app.services.broadcast_frames import Frame
+
+# ===== Settings =====
+SESSION_BUS_BACKEND = os.getenv("SESSION_BUS_BACKEND", "inprocess").lower()
+SESSION_BUS_DIR = os.getenv("SESSION_BUS_DIR", os.path.join(tempfile.gettempdir(), "permitflow-bus"))
+PEER_REFRESH_SECONDS = 1.0
+MAX_DATAGRAM_BYTES = 256 * 1024
+
+# Local delivery: handler(session_id, frame, event_id)
+DeliverHandler = Callable[[str, Frame, int], Awaitable[None]]
+
+BUS_MESSAGES = counter("permitflow_bus_messages_total", "Session bus messages by direction and outcome.")
+
+
+class InProcessBus:
+    """Single-worker bus: publishing delivers straight to local clients."""
+
+    name = "inprocess"
+
+    def __init__(self):
+        self._handler: Optional[DeliverHandler] = None
+
+    def set_handler(self, handler: DeliverHandler) -> None:
+        self._handler = handler
+
+    async def start(self) -> None:
+        pass
+
+    async def stop(self) -> None:
+        pass
+
+    async def publish(self, session_id: str, frame: Frame, event_id: int = 0) -> None:
+        if self._handler:
+            await self._handler(session_id, frame, event_id)
+
+
+class UnixSocketBus(InProcessBus):
+    """
+    One SOCK_DGRAM socket per worker in a shared directory. Datagrams keep
+    message boundaries and the kernel queues them per receiver, so no broker
+    process is needed.
+    """
+
+    name = "unix"
+
+    def __init__(self, directory: str = SESSION_BUS_DIR):
+        super().__init__()
+        self.directory = directory
+        self.path = ""
+        self._sock: Optional[socket.socket] = None
+        self._inbox: Optional[asyncio.Queue] = None
+        self._dispatcher: Optional[asyncio.Task] = None
+        self._peers: List[str] = []
+        self._peers_at = 0.0
+
+    async def start(self) -> None:
+        if self._sock:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        # Bound per process at startup, not import (gunicorn preloads in the master)
+        self.path = os.path.join(self.directory, f"worker-{os.getpid()}.sock")
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4 * MAX_DATAGRAM_BYTES)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 2 * MAX_DATAGRAM_BYTES)
+        sock.bind(self.path)
+        sock.setblocking(False)
+        self._sock = sock
+
+        self._inbox = asyncio.Queue()
+        loop = asyncio.get_running_loop()
+        loop.add_reader(sock.fileno(), self._on_readable)
+        self._dispatcher = asyncio.create_task(self._dispatch(), name="session-bus-dispatch")
+        logger.info(f"[SessionBus] unix bus listening at {self.path}")
+
+    async def stop(self) -> None:
+        if not self._sock:
+            return
+        asyncio.get_running_loop().remove_reader(self._sock.fileno())
+        if self._dispatcher:
+            self._dispatcher.cancel()
+            await asyncio.gather(self._dispatcher, return_exceptions=True)
+        self._sock.close()
+        self._sock = None
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+        logger.info("[SessionBus] unix bus stopped")
+
+    async def publish(self, session_id: str, frame: Frame, event_id: int = 0) -> None:
+        await super().publish(session_id, frame, event_id)
+        if not self._sock:
+            return
+
+        data = json.dumps({"s": session_id, "i": event_id, "k": frame.kind, "p": frame.payload}).encode()
+        if len(data) > MAX_DATAGRAM_BYTES:
+            logger.warning(f"[SessionBus] Message for {session_id} too large for peers ({len(data)} bytes)")
+            BUS_MESSAGES.inc(direction="out", outcome="too_large")
+            return
+
+        for peer in self._current_peers():
+            try:
+                self._sock.sendto(data, peer)
+                BUS_MESSAGES.inc(direction="out", outcome="sent")
+            except (ConnectionRefusedError, FileNotFoundError):
+                # Worker is gone; remove its socket so others skip it too
+                self._forget_peer(peer)
+            except BlockingIOError:
+                logger.warning(f"[SessionBus] Peer {peer} is not draining; dropped message for {session_id}")
+                BUS_MESSAGES.inc(direction="out", outcome="dropped")
+            except OSError as e:
+                logger.warning(f"[SessionBus] Send to {peer} failed: {e}")
+                BUS_MESSAGES.inc(direction="out", outcome="error")
+
+    # ---------------------------------------------------------------
+    # Internals
+    # ---------------------------------------------------------------
+    def _current_peers(self) -> List[str]:
+        now = time.monotonic()
+        if now - self._peers_at > PEER_REFRESH_SECONDS:
+            try:
+                self._peers = [
+                    entry.path for entry in os.scandir(self.directory)
+                    if entry.name.endswith(".sock") and entry.path != self.path
+                ]
+            except FileNotFoundError:
+                self._peers = []
+            self._peers_at = now
+        return self._peers
+
+    def _forget_peer(self, peer: str) -> None:
+        if peer in self._peers:
+            self._peers.remove(peer)
+        try:
+            os.unlink(peer)
+            logger.info(f"[SessionBus] Removed stale peer socket {peer}")
+        except FileNotFoundError:
+            pass
+
+    def _on_readable(self) -> None:
+        while True:
+            try:
+                data = self._sock.recv(MAX_DATAGRAM_BYTES)
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError as e:
+                logger.warning(f"[SessionBus] Receive failed: {e}")
+                return
+            self._inbox.put_nowait(data)
+
+    async def _dispatch(self) -> None:
+        # Single consumer keeps remote messages (e.g. stream chunks) in order
+        while True:
+            data = await self._inbox.get()
+            try:
+                envelope = json.loads(data)
+                BUS_MESSAGES.inc(direction="in", outcome="received")
+                if self._handler:
+                    frame = Frame(envelope["k"], envelope["p"])
+                    await self._handler(envelope["s"], frame, envelope.get("i", 0))
+            except Exception as e:
+                logger.warning(f"[SessionBus] Dropped bad message: {e}")
+
+
+def create_session_bus(backend: str = SESSION_BUS_BACKEND) -> InProcessBus:
+    if backend == "unix":
+        return UnixSocketBus()
+    if backend != "inprocess":
+        logger.warning(f"[SessionBus] Unknown SESSION_BUS_BACKEND '{backend}', using inprocess")
+    return InProcessBus()
+
+
+# ===== Shared Instance =====
+session_bus = create_session_bus()
+
+
+def get_session_bus() -> InProcessBus:
+    return session_bus
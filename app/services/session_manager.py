@@ -5,53 +5,110 @@ Responsibilities:
 - Track active sessions and their metadata.
 - Handle session timeouts and recovery.
 - Provide a single source of truth for session state.
+- Bound memory: evict least-recently-used sessions past `max_sessions` and
+  sessions idle longer than the timeout.
+- Notify eviction callbacks so evicted state can be persisted.
+
+Sessions are kept in recency order, so idle sessions are always at the
+front and a sweep only touches the sessions it evicts.
 
 Future Changes:
 - Persist sessions to DB for multi-instance deployments.
 - Add session-scoped variables for personalization.
 """
 
+import threading
+from collections import OrderedDict
 from datetime import datetime, timedelta
-from typing import Dict, Any
+from typing import Any, Callable, Dict, List, Optional
 from app.core.logger import logger
+from app.core.metrics import counter
+
+# Called as callback(session_id, session, reason) with reason "lru", "idle" or "removed"
+EvictionCallback = Callable[[str, Dict[str, Any], str], None]
+
+# Several stores (memory, replay, bots, active apps) churn through sessions;
+# per-session lines are debug-level and the counts go to metrics
+SESSIONS_CREATED = counter("permitflow_sessions_created_total", "Sessions created by store.")
+SESSIONS_EVICTED = counter("permitflow_sessions_evicted_total", "Sessions evicted by store and reason.")
 
 
 class SessionManager:
     """
-    Manages user sessions, including timeout and recovery.
+    Manages user sessions, including timeout, LRU eviction and recovery.
     """
 
     # ---------------------------------------------------------------
     # Initialization
     # ---------------------------------------------------------------
-    def __init__(self, timeout_minutes: int = 30):
+    def __init__(self, timeout_minutes: int = 30, max_sessions: Optional[int] = None, name: str = "sessions"):
         self.timeout = timedelta(minutes=timeout_minutes)
-        self.sessions: Dict[str, Dict[str, Any]] = {}
+        self.max_sessions = max_sessions
+        self.name = name
+        self.sessions: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._callbacks: List[EvictionCallback] = []
+        self._lock = threading.RLock()
+        self._created = 0
+        self._evictions = {"lru": 0, "idle": 0, "removed": 0}
 
     # ---------------------------------------------------------------
     # Public API
     # ---------------------------------------------------------------
+    def on_evict(self, callback: EvictionCallback) -> None:
+        """
+        Registers a callback run with (session_id, session, reason) whenever
+        a session leaves the store.
+        """
+        self._callbacks.append(callback)
+
     def get_or_create_session(self, user_id: str) -> Dict[str, Any]:
         """
         Returns an existing session or creates a new one.
         """
-        if user_id not in self.sessions:
-            self.sessions[user_id] = {
-                "created_at": datetime.utcnow(),
-                "last_active": datetime.utcnow(),
+        with self._lock:
+            self.sweep()
+            session = self.sessions.get(user_id)
+            if session is not None:
+                self._touch(user_id, session)
+                return session
+
+            now = datetime.utcnow()
+            session = self.sessions[user_id] = {
+                "created_at": now,
+                "last_active": now,
                 "user_name": None,
                 "last_topic": None
             }
-            logger.info(f"[Session Created] user_id={user_id}")
-        return self.sessions[user_id]
+            self._created += 1
+            SESSIONS_CREATED.inc(store=self.name)
+            logger.debug(f"[Session Created] store={self.name} user_id={user_id}")
+
+            while self.max_sessions and len(self.sessions) > self.max_sessions:
+                oldest = next(iter(self.sessions))
+                self._evict(oldest, "lru")
+            return session
+
+    def get_session(self, user_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Returns a live session (refreshing it) or None if missing or expired.
+        """
+        with self._lock:
+            if self.is_session_expired(user_id):
+                if user_id in self.sessions:
+                    self._evict(user_id, "idle")
+                return None
+            session = self.sessions[user_id]
+            self._touch(user_id, session)
+            return session
 
     def refresh_session(self, user_id: str):
         """
         Updates the last_active timestamp for a session.
         """
-        if user_id in self.sessions:
-            self.sessions[user_id]["last_active"] = datetime.utcnow()
-            logger.debug(f"[Session Refreshed] user_id={user_id}")
+        with self._lock:
+            if user_id in self.sessions:
+                self._touch(user_id, self.sessions[user_id])
+                logger.debug(f"[Session Refreshed] user_id={user_id}")
 
     def is_session_expired(self, user_id: str) -> bool:
         """
@@ -62,5 +119,67 @@ class SessionManager:
         last_active = self.sessions[user_id]["last_active"]
         expired = datetime.utcnow() - last_active > self.timeout
         if expired:
-            logger.info(f"[Session Expired] user_id={user_id}")
-        return expired
\ No newline at end of file
+            logger.debug(f"[Session Expired] store={self.name} user_id={user_id}")
+        return expired
+
+    def remove_session(self, user_id: str) -> bool:
+        """
+        Removes a session explicitly. Eviction callbacks still run.
+        """
+        with self._lock:
+            if user_id not in self.sessions:
+                return False
+            self._evict(user_id, "removed")
+            return True
+
+    def sweep(self) -> int:
+        """
+        Evicts every session idle longer than the timeout.
+
+        Returns:
+            Number of sessions evicted.
+        """
+        cutoff = datetime.utcnow() - self.timeout
+        evicted = 0
+        with self._lock:
+            while self.sessions:
+                user_id, session = next(iter(self.sessions.items()))
+                if session["last_active"] >= cutoff:
+                    break
+                self._evict(user_id, "idle")
+                evicted += 1
+        return evicted
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "size": len(self.sessions),
+                "max_sessions": self.max_sessions,
+                "timeout_seconds": self.timeout.total_seconds(),
+                "created": self._created,
+                "evictions": dict(self._evictions),
+            }
+
+    def __contains__(self, user_id: str) -> bool:
+        return user_id in self.sessions
+
+    def __len__(self) -> int:
+        return len(self.sessions)
+
+    # ---------------------------------------------------------------
+    # Internals
+    # ---------------------------------------------------------------
+    def _touch(self, user_id: str, session: Dict[str, Any]) -> None:
+        session["last_active"] = datetime.utcnow()
+        self.sessions.move_to_end(user_id)
+
+    def _evict(self, user_id: str, reason: str) -> None:
+        session = self.sessions.pop(user_id)
+        self._evictions[reason] += 1
+        SESSIONS_EVICTED.inc(store=self.name, reason=reason)
+        logger.debug(f"[Session Evicted] store={self.name} user_id={user_id} reason={reason}")
+        for callback in self._callbacks:
+            try:
+                callback(user_id, session, reason)
+            except Exception as e:
+                logger.warning(f"[Session Evicted] store={self.name} callback failed for {user_id}: {e}", exc_info=True)
@@ -0,0 +1,157 @@
+"""
+session_state.py — Versioned key/value store for per-session state.
+
+Responsibilities:
+- Hold session state (conversation history) where every worker can see it.
+- Hand out values from shared counters (e.g. broadcast event ids).
+- In-process backend for a single worker (the default): nothing is copied,
+  workers keep state in their own memory.
+- SQLite backend for several workers on one host: a small WAL-mode database
+  separate from the application DB, with a version per key so workers only
+  reload state another worker has changed.
+
+Select the backend with the SESSION_STATE_BACKEND env var ("inprocess" or
+"sqlite"); SESSION_STATE_PATH sets the SQLite file. gunicorn_conf.py switches
+to "sqlite" when it runs more than one worker.
+
+Future Changes:
+- Redis backend for multi-host deployments.
+"""
+
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from typing import Any, Dict, Optional, Tuple
+
+from app.core.logger import logger
+
+# ===== Settings =====
+SESSION_STATE_BACKEND = os.getenv("SESSION_STATE_BACKEND", "inprocess").lower()
+SESSION_STATE_PATH = os.getenv("SESSION_STATE_PATH", os.path.join(tempfile.gettempdir(), "permitflow-state.db"))
+
+
+class InProcessStateStore:
+    """No-op store: state already lives in this process's SessionManager."""
+
+    name = "inprocess"
+    shared = False
+
+    def version(self, key: str) -> int:
+        return 0
+
+    def get(self, key: str) -> Optional[Tuple[int, Dict[str, Any]]]:
+        return None
+
+    def put(self, key: str, value: Dict[str, Any]) -> int:
+        return 0
+
+    def delete(self, key: str) -> None:
+        pass
+
+    def purge_idle(self, max_idle_seconds: float) -> int:
+        return 0
+
+    def next_sequence(self, key: str, floor: int = 0) -> int:
+        return floor
+
+
+class SqliteStateStore(InProcessStateStore):
+    """
+    WAL-mode SQLite store shared by the workers on one host. Readers never
+    block the writer, and version() is a primary-key lookup.
+    """
+
+    name = "sqlite"
+    shared = True
+
+    def __init__(self, path: str = SESSION_STATE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._pid = 0
+
+    def _db(self) -> sqlite3.Connection:
+        # Connect per process: with preload_app the store is created in the
+        # gunicorn master and must not share its connection across forks.
+        if self._conn is None or self._pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=5000")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS session_state ("
+                " key TEXT PRIMARY KEY,"
+                " version INTEGER NOT NULL,"
+                " value TEXT NOT NULL,"
+                " updated_at REAL NOT NULL)"
+            )
+            self._conn, self._pid = conn, os.getpid()
+            logger.info(f"[SessionState] sqlite store at {self.path} (pid={self._pid})")
+        return self._conn
+
+    def version(self, key: str) -> int:
+        with self._lock:
+            row = self._db().execute("SELECT version FROM session_state WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else 0
+
+    def get(self, key: str) -> Optional[Tuple[int, Dict[str, Any]]]:
+        with self._lock:
+            row = self._db().execute("SELECT version, value FROM session_state WHERE key = ?", (key,)).fetchone()
+        return (row[0], json.loads(row[1])) if row else None
+
+    def put(self, key: str, value: Dict[str, Any]) -> int:
+        """Store a value and return its new version."""
+        with self._lock:
+            row = self._db().execute(
+                "INSERT INTO session_state (key, version, value, updated_at) VALUES (?, 1, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET version = version + 1, value = excluded.value, "
+                "updated_at = excluded.updated_at RETURNING version",
+                (key, json.dumps(value), time.time())
+            ).fetchone()
+        return row[0]
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._db().execute("DELETE FROM session_state WHERE key = ?", (key,))
+
+    def next_sequence(self, key: str, floor: int = 0) -> int:
+        """
+        Advance a counter shared by all workers and return its new value:
+        one more than the last value handed out, and at least `floor`. The
+        value is kept as the key's version; if the row is purged the counter
+        restarts from `floor`.
+        """
+        with self._lock:
+            row = self._db().execute(
+                "INSERT INTO session_state (key, version, value, updated_at) VALUES (?, ?, '{}', ?) "
+                "ON CONFLICT(key) DO UPDATE SET version = max(version + 1, excluded.version), "
+                "updated_at = excluded.updated_at RETURNING version",
+                (key, max(floor, 1), time.time())
+            ).fetchone()
+        return row[0]
+
+    def purge_idle(self, max_idle_seconds: float) -> int:
+        """Delete state untouched for longer than max_idle_seconds."""
+        with self._lock:
+            cursor = self._db().execute(
+                "DELETE FROM session_state WHERE updated_at < ?", (time.time() - max_idle_seconds,))
+        return cursor.rowcount
+
+
+def create_state_store(backend: str = SESSION_STATE_BACKEND) -> InProcessStateStore:
+    if backend == "sqlite":
+        return SqliteStateStore()
+    if backend != "inprocess":
+        logger.warning(f"[SessionState] Unknown SESSION_STATE_BACKEND '{backend}', using inprocess")
+    return InProcessStateStore()
+
+
+# ===== Shared Instance =====
+session_state = create_state_store()
+
+
+def get_session_state() -> InProcessStateStore:
+    return session_state
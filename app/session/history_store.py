@@ -0,0 +1,204 @@
+"""
+app/session/history_store.py
+
+Responsible for:
+- Holding each session's conversation as a fixed-capacity ring buffer of
+  compact message records (O(1) append, O(n) view of the last n messages).
+- Keeping the rendered transcript ("Human: ...\\nAI: ...") cached and updated
+  incrementally as messages are appended or fall off the buffer.
+- Carrying a running summary of older messages (see history_summarizer);
+  prompts use the summary plus the messages it does not yet cover.
+- Exposing a LangChain-compatible adapter (chat_memory.messages,
+  load_memory_variables, save_context) for code written against
+  ConversationBufferMemory.
+"""
+
+import time
+from collections import deque
+from itertools import islice
+from typing import Any, Deque, Dict, List, Optional
+
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage
+
+# Role names match LangChain message types so callers see the same values
+HUMAN = "human"
+AI = "ai"
+
+_ROLE_PREFIX = {HUMAN: "Human", AI: "AI"}
+_ROLE_ALIASES = {"user": HUMAN, "human": HUMAN, "bot": AI, "ai": AI, "assistant": AI}
+
+
+class MessageRecord:
+    """One message in a session's history."""
+
+    __slots__ = ("seq", "role", "content", "created_at", "rendered")
+
+    def __init__(self, seq: int, role: str, content: str, created_at: Optional[float] = None):
+        self.seq = seq
+        self.role = role
+        self.content = content
+        self.created_at = created_at if created_at is not None else time.time()
+        self.rendered = f"{_ROLE_PREFIX.get(role, role.capitalize())}: {content}"
+
+    def to_dict(self) -> Dict[str, str]:
+        return {"role": self.role, "content": self.content}
+
+    def to_message(self) -> BaseMessage:
+        return HumanMessage(content=self.content) if self.role == HUMAN else AIMessage(content=self.content)
+
+
+class ConversationHistory:
+    """
+    Fixed-capacity conversation buffer; the oldest message is dropped once
+    `capacity` messages are held.
+    """
+
+    def __init__(self, capacity: int):
+        self.capacity = max(1, capacity)
+        self._records: Deque[MessageRecord] = deque(maxlen=self.capacity)
+        self._text = ""
+        self._appended = 0
+        # Running summary of every message with seq < summarized_upto
+        self.summary = ""
+        self.summarized_upto = 0
+        self.summarized_chars = 0
+
+    # ---------------------------------------------------------------
+    # Writes
+    # ---------------------------------------------------------------
+    def append(self, role: str, content: str) -> MessageRecord:
+        """Append a message; `role` may be user/human or bot/ai/assistant."""
+        normalized = _ROLE_ALIASES.get(role)
+        if normalized is None:
+            raise ValueError(f"Unknown role '{role}'")
+
+        record = MessageRecord(self._appended, normalized, content)
+        self._appended += 1
+        if len(self._records) == self.capacity:
+            dropped = self._records[0]
+            # Drop the oldest line (and its newline) from the cached text
+            self._text = self._text[len(dropped.rendered) + 1:] if len(self._records) > 1 else ""
+        self._records.append(record)
+        self._text = f"{self._text}\n{record.rendered}" if len(self._records) > 1 else record.rendered
+        return record
+
+    def add_user_message(self, content: str) -> None:
+        self.append(HUMAN, content)
+
+    def add_ai_message(self, content: str) -> None:
+        self.append(AI, content)
+
+    def clear(self) -> None:
+        self._records.clear()
+        self._text = ""
+        self.summary = ""
+        self.summarized_upto = self._appended
+        self.summarized_chars = 0
+
+    def apply_summary(self, summary: str, upto: int, raw_chars: int) -> None:
+        """Replace the running summary with one covering messages before `upto`."""
+        if upto <= self.summarized_upto:
+            return
+        self.summary = summary
+        self.summarized_upto = upto
+        self.summarized_chars += raw_chars
+
+    # ---------------------------------------------------------------
+    # Reads
+    # ---------------------------------------------------------------
+    def last(self, n: int) -> List[MessageRecord]:
+        """The last n records, oldest first."""
+        if n <= 0:
+            return []
+        recent = list(islice(reversed(self._records), n))
+        recent.reverse()
+        return recent
+
+    @property
+    def text(self) -> str:
+        """Rendered transcript of the whole buffer."""
+        return self._text
+
+    def render_last(self, n: int) -> str:
+        return "\n".join(record.rendered for record in self.last(n))
+
+    def unsummarized(self, limit: Optional[int] = None) -> List[MessageRecord]:
+        """Messages not yet folded into the summary (at most `limit`, newest kept)."""
+        pending = min(self._appended - self.summarized_upto, len(self._records))
+        return self.last(pending if limit is None else min(pending, limit))
+
+    def summarizable(self, keep: int) -> List[MessageRecord]:
+        """Unsummarized messages older than the last `keep`."""
+        pending = self.unsummarized()
+        return pending[:max(0, len(pending) - keep)]
+
+    def context_text(self, limit: Optional[int] = None) -> str:
+        """Summary of older turns followed by the messages it does not cover."""
+        recent = "\n".join(record.rendered for record in self.unsummarized(limit))
+        if not self.summary:
+            return recent
+        return f"Summary of earlier conversation: {self.summary}\n{recent}"
+
+    @property
+    def messages(self) -> List[BaseMessage]:
+        """LangChain message objects, built on demand."""
+        return [record.to_message() for record in self._records]
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def __iter__(self):
+        return iter(self._records)
+
+    # ---------------------------------------------------------------
+    # Serialization (shared session state)
+    # ---------------------------------------------------------------
+    def to_state(self) -> Dict[str, Any]:
+        return {
+            "records": [[r.seq, r.role, r.content, r.created_at] for r in self._records],
+            "appended": self._appended,
+            "summary": self.summary,
+            "summarized_upto": self.summarized_upto,
+            "summarized_chars": self.summarized_chars,
+        }
+
+    @classmethod
+    def from_state(cls, state: Dict[str, Any], capacity: int) -> "ConversationHistory":
+        history = cls(capacity)
+        for seq, role, content, created_at in state.get("records", [])[-history.capacity:]:
+            history._records.append(MessageRecord(seq, role, content, created_at))
+        history._text = "\n".join(r.rendered for r in history._records)
+        history._appended = state.get("appended", len(history._records))
+        history.summary = state.get("summary", "")
+        history.summarized_upto = state.get("summarized_upto", 0)
+        history.summarized_chars = state.get("summarized_chars", 0)
+        return history
+
+
+class HistoryMemory:
+    """
+    Drop-in stand-in for the parts of ConversationBufferMemory this app
+    uses, backed by a ConversationHistory.
+    """
+
+    memory_key = "chat_history"
+
+    def __init__(self, history: ConversationHistory, return_messages: bool = True):
+        self.chat_memory = history
+        self.return_messages = return_messages
+
+    @property
+    def memory_variables(self) -> List[str]:
+        return [self.memory_key]
+
+    def load_memory_variables(self, inputs: Dict[str, Any]) -> Dict[str, Any]:
+        if self.return_messages:
+            return {self.memory_key: self.chat_memory.messages}
+        return {self.memory_key: self.chat_memory.text}
+
+    def save_context(self, inputs: Dict[str, Any], outputs: Dict[str, str]) -> None:
+        self.chat_memory.add_user_message(str(inputs.get("input", "")))
+        self.chat_memory.add_ai_message(str(outputs.get("output", "")))
+
+    def clear(self) -> None:
+        self.chat_memory.clear()
@@ -0,0 +1,119 @@
+"""
+app/session/history_summarizer.py
+
+Responsible for:
+- Folding older conversation turns into each session's running summary so
+  prompts carry the summary plus a few verbatim turns instead of raw history.
+- Running the summary refresh as a background task, off the reply path,
+  with at most one refresh in flight per session.
+- Recording how many prompt tokens compaction saves (approximated as chars / 4).
+
+Settings (site_properties.json):
+- HISTORY_SUMMARY_ENABLED: turn compaction on or off.
+- HISTORY_VERBATIM_MESSAGES: most recent messages always kept verbatim.
+- HISTORY_SUMMARY_BATCH_MESSAGES: older messages to accumulate before a refresh.
+- HISTORY_SUMMARY_MAX_CHARS: hard cap on the stored summary.
+"""
+
+import asyncio
+from typing import Dict, Optional
+
+from langchain.prompts import PromptTemplate
+from langchain_core.output_parsers import StrOutputParser
+
+from app.core.config import SITE_PROPERTIES
+from app.core.logger import logger
+from app.core.metrics import counter, histogram, trace
+from app.langchain_config import get_llm, get_llm_provider
+from app.session.history_store import ConversationHistory
+from app.session.memory_manager import get_or_create_history, save_history
+
+# ===== Settings =====
+HISTORY_SUMMARY_ENABLED = SITE_PROPERTIES.get("HISTORY_SUMMARY_ENABLED", True)
+HISTORY_VERBATIM_MESSAGES = SITE_PROPERTIES.get("HISTORY_VERBATIM_MESSAGES", 6)
+HISTORY_SUMMARY_BATCH_MESSAGES = SITE_PROPERTIES.get("HISTORY_SUMMARY_BATCH_MESSAGES", 6)
+HISTORY_SUMMARY_MAX_CHARS = SITE_PROPERTIES.get("HISTORY_SUMMARY_MAX_CHARS", 1500)
+
+CHARS_PER_TOKEN = 4
+
+summary_prompt = PromptTemplate(
+    input_variables=["summary", "new_lines", "max_words"],
+    template="""
+Progressively summarize a conversation between a user and FlowBot, a permit assistant.
+Fold the new lines into the current summary. Keep names, project details, field values,
+decisions and open questions; drop greetings and small talk.
+Stay under {max_words} words.
+
+Current summary:
+{summary}
+
+New lines of conversation:
+{new_lines}
+
+Updated summary:
+"""
+)
+
+# ===== Metrics =====
+TOKENS_SAVED = counter(
+    "permitflow_history_tokens_saved_total",
+    "Approximate prompt tokens saved by history summarization.")
+CONTEXT_TOKENS = histogram(
+    "permitflow_prompt_context_tokens",
+    "Approximate tokens of conversation context sent per prompt.",
+    buckets=(50, 100, 250, 500, 1000, 2000, 4000, 8000, 16000))
+
+_inflight: Dict[str, asyncio.Task] = {}
+
+
+def record_context_size(history: ConversationHistory, context_chars: int, consumer: str) -> None:
+    """Observe the context size of one prompt and the tokens compaction saved on it."""
+    CONTEXT_TOKENS.observe(context_chars / CHARS_PER_TOKEN, consumer=consumer)
+    saved = history.summarized_chars - len(history.summary)
+    if saved > 0:
+        TOKENS_SAVED.inc(saved / CHARS_PER_TOKEN, consumer=consumer)
+
+
+def schedule_summary(session_id: str) -> Optional[asyncio.Task]:
+    """
+    Start a background summary refresh when enough older messages have
+    accumulated. Safe to call after every turn.
+    """
+    if not HISTORY_SUMMARY_ENABLED or session_id in _inflight:
+        return None
+    history = get_or_create_history(session_id)
+    if len(history.summarizable(HISTORY_VERBATIM_MESSAGES)) < HISTORY_SUMMARY_BATCH_MESSAGES:
+        return None
+    try:
+        task = asyncio.get_running_loop().create_task(_refresh_summary(session_id, history))
+    except RuntimeError:
+        return None  # no event loop (e.g. sync scripts); compaction is best-effort
+    _inflight[session_id] = task
+    task.add_done_callback(lambda _: _inflight.pop(session_id, None))
+    return task
+
+
+async def _refresh_summary(session_id: str, history: ConversationHistory) -> None:
+    records = history.summarizable(HISTORY_VERBATIM_MESSAGES)
+    if not records:
+        return
+    new_lines = "\n".join(record.rendered for record in records)
+    chain = summary_prompt | get_llm(temperature=0) | StrOutputParser()
+    try:
+        with trace("history_summary", provider=get_llm_provider()):
+            summary = await chain.ainvoke({
+                "summary": history.summary or "(none)",
+                "new_lines": new_lines,
+                "max_words": HISTORY_SUMMARY_MAX_CHARS // 6,
+            })
+    except Exception as e:
+        logger.warning(f"[History Summary] session={session_id} failed: {e}")
+        return
+
+    summary = summary.strip()[:HISTORY_SUMMARY_MAX_CHARS]
+    history.apply_summary(summary, upto=records[-1].seq + 1, raw_chars=len(new_lines) + 1)
+    save_history(session_id, history)
+    logger.info(
+        f"[History Summary] session={session_id} folded={len(records)} "
+        f"summary_chars={len(summary)} summarized_chars={history.summarized_chars}"
+    )
@@ -1,20 +1,130 @@
-from langchain.memory import ConversationBufferMemory
+import asyncio
+from typing import Any, Callable, Dict
+
 from app.core.logger import logger
+from app.core.config import SITE_PROPERTIES
+from app.core.metrics import gauge
+from app.services.session_manager import SessionManager
+from app.services.session_state import get_session_state
+from app.session.history_store import ConversationHistory, HistoryMemory
+
+# ===== Settings =====
+SESSION_MAX_COUNT = SITE_PROPERTIES.get("SESSION_MAX_COUNT", 5000)
+SESSION_IDLE_TIMEOUT_MINUTES = SITE_PROPERTIES.get("SESSION_IDLE_TIMEOUT_MINUTES", 60)
+SESSION_SWEEP_INTERVAL_SECONDS = SITE_PROPERTIES.get("SESSION_SWEEP_INTERVAL_SECONDS", 60)
+# Messages kept per session; never fewer than the LLM context window uses
+HISTORY_MAX_MESSAGES = max(
+    SITE_PROPERTIES.get("HISTORY_MAX_MESSAGES", 50),
+    SITE_PROPERTIES.get("MAX_CONTEXT_TURNS", 5)
+)
+
+# Session store holding each session's history under session["history"]
+_memory_registry = SessionManager(
+    timeout_minutes=SESSION_IDLE_TIMEOUT_MINUTES,
+    max_sessions=SESSION_MAX_COUNT,
+    name="memory"
+)
+
+
+def _log_evicted_memory(session_id: str, session: Dict[str, Any], reason: str) -> None:
+    history = session.get("history")
+    logger.info(f"[Memory Evicted] session={session_id} reason={reason} messages={len(history) if history else 0}")
+
+
+_memory_registry.on_evict(_log_evicted_memory)
 
-_memory_registry: dict[str, ConversationBufferMemory] = {}
 
-def get_or_create_memory(session_id: str) -> ConversationBufferMemory:
-    if session_id not in _memory_registry:
-        _memory_registry[session_id] = ConversationBufferMemory(
-            memory_key="chat_history",
-            return_messages=True,
-            input_key="input",
-            output_key="output"
-        )
+def on_memory_evicted(callback: Callable[[str, Dict[str, Any], str], None]) -> None:
+    """
+    Registers a callback run with (session_id, session, reason) when a
+    session's memory is evicted; session["history"] holds the evicted
+    ConversationHistory.
+    """
+    _memory_registry.on_evict(callback)
+
+
+def _state_key(session_id: str) -> str:
+    return f"history:{session_id}"
+
+
+def get_or_create_history(session_id: str) -> ConversationHistory:
+    session = _memory_registry.get_or_create_session(session_id)
+    history = session.get("history")
+
+    # With a shared state backend another worker may have moved the
+    # conversation on; reload only when its version changed.
+    state = get_session_state()
+    if state.shared:
+        version = state.version(_state_key(session_id))
+        if version and version != session.get("state_version"):
+            loaded = state.get(_state_key(session_id))
+            if loaded:
+                session["state_version"], snapshot = loaded
+                history = session["history"] = ConversationHistory.from_state(snapshot, HISTORY_MAX_MESSAGES)
+                logger.debug(f"[Memory Sync] Loaded {len(history)} messages for session {session_id} v{session['state_version']}")
+
+    if history is None:
+        history = session["history"] = ConversationHistory(HISTORY_MAX_MESSAGES)
         logger.info(f"[Memory Init] Created new memory for session {session_id}")
     else:
-        logger.info(f"[Memory Recall] Retrieved {len(_memory_registry[session_id].chat_memory.messages)} messages for session {session_id}")
-    return _memory_registry[session_id]
+        logger.debug(f"[Memory Recall] Retrieved {len(history)} messages for session {session_id}")
+    return history
+
+
+def save_history(session_id: str, history: ConversationHistory) -> None:
+    """Publish a session's history to the shared state backend, if any."""
+    state = get_session_state()
+    if not state.shared:
+        return
+    session = _memory_registry.get_or_create_session(session_id)
+    if session.get("history") is not history:
+        return  # replaced by a newer copy from another worker
+    session["state_version"] = state.put(_state_key(session_id), history.to_state())
+
+
+def get_or_create_memory(session_id: str) -> HistoryMemory:
+    """LangChain-style memory view over the session's history."""
+    return HistoryMemory(get_or_create_history(session_id))
+
+
+def get_memory(session_id: str) -> HistoryMemory | None:
+    session = _memory_registry.get_session(session_id)
+    history = session.get("history") if session else None
+    return HistoryMemory(history) if history is not None else None
+
+
+def drop_memory(session_id: str) -> bool:
+    """Removes a session's memory immediately (eviction callbacks still run)."""
+    get_session_state().delete(_state_key(session_id))
+    return _memory_registry.remove_session(session_id)
+
+
+def sweep_memory() -> int:
+    """Evicts idle session memories. Returns the number evicted."""
+    get_session_state().purge_idle(SESSION_IDLE_TIMEOUT_MINUTES * 60)
+    return _memory_registry.sweep()
+
+
+async def sweep_memory_periodically(interval: float = SESSION_SWEEP_INTERVAL_SECONDS) -> None:
+    """Background task that evicts idle memories even when no new sessions arrive."""
+    while True:
+        await asyncio.sleep(interval)
+        evicted = sweep_memory()
+        if evicted:
+            logger.info(f"[Memory Sweep] evicted={evicted} remaining={len(_memory_registry)}")
+
+
+def get_memory_stats() -> Dict[str, Any]:
+    return _memory_registry.stats()
+
 
-def get_memory(session_id: str) -> ConversationBufferMemory | None:
-    return _memory_registry.get(session_id)
\ No newline at end of file
+gauge(
+    "permitflow_session_memories",
+    "Sessions holding conversation memory.",
+    lambda: [({}, len(_memory_registry))]
+)
+gauge(
+    "permitflow_session_memory_evictions",
+    "Session memories evicted since startup, by reason.",
+    lambda: [({"reason": r}, n) for r, n in _memory_registry.stats()["evictions"].items()]
+)
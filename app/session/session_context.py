@@ -1,13 +1,15 @@
 from typing import List, Dict
 from app.core.logger import logger
 from app.core.config import SITE_PROPERTIES
-from app.session.memory_manager import get_or_create_memory
+from app.session.memory_manager import get_or_create_history, save_history
+from app.session.history_summarizer import record_context_size
 
 MAX_CONTEXT_TURNS = SITE_PROPERTIES.get("MAX_CONTEXT_TURNS", 5)  # fallback to 5
 
 def get_context_history(session_id: str, limit: int = MAX_CONTEXT_TURNS) -> List[Dict[str, str]]:
     """
-    Retrieve the last N exchanges from LangChain memory.
+    Retrieve the last N messages not yet folded into the running summary
+    (see get_context_summary).
 
     Args:
         session_id: The FlowBot session identifier.
@@ -17,17 +19,38 @@ def get_context_history(session_id: str, limit: int = MAX_CONTEXT_TURNS) -> List
         A list of message dicts in chronological order.
     """
     try:
-        memory = get_or_create_memory(session_id)
-        messages = memory.chat_memory.messages[-limit:]
-        logger.debug(f"[Context Retrieved] session_id={session_id} | turns={len(messages)}")
-        return [{"role": msg.type, "content": msg.content} for msg in messages]
+        records = get_or_create_history(session_id).unsummarized(limit)
+        logger.debug(f"[Context Retrieved] session_id={session_id} | turns={len(records)}")
+        return [record.to_dict() for record in records]
     except Exception as e:
         logger.warning(f"[Context Retrieval Failed] session_id={session_id} | Reason: {e}", exc_info=True)
         return []
 
+def get_context_summary(session_id: str) -> str:
+    """
+    Running summary of the turns get_context_history no longer returns.
+    """
+    return get_or_create_history(session_id).summary
+
+def get_context_text(session_id: str, consumer: str = "extraction") -> str:
+    """
+    Rendered prompt context: the running summary followed by the messages it
+    does not cover ("Human: ...\\nAI: ...").
+    """
+    history = get_or_create_history(session_id)
+    text = history.context_text()
+    record_context_size(history, len(text), consumer)
+    return text
+
+def record_context_usage(session_id: str, context_chars: int, consumer: str) -> None:
+    """
+    Record the size of a prompt's conversation context (and tokens saved by summarization).
+    """
+    record_context_size(get_or_create_history(session_id), context_chars, consumer)
+
 def save_to_context_history(session_id: str, role: str, content: str):
     """
-    Append a new message to LangChain memory.
+    Append a new message to the session history.
 
     Args:
         session_id: The FlowBot session identifier.
@@ -35,13 +58,15 @@ def save_to_context_history(session_id: str, role: str, content: str):
         content: Message text
     """
     try:
-        memory = get_or_create_memory(session_id)
+        history = get_or_create_history(session_id)
         if role == "user":
-            memory.chat_memory.add_user_message(content)
+            history.add_user_message(content)
         elif role == "bot":
-            memory.chat_memory.add_ai_message(content)
+            history.add_ai_message(content)
         else:
             logger.warning(f"[Context Save Skipped] Unknown role={role}")
+            return
+        save_history(session_id, history)
         logger.debug(f"[Context Saved] session_id={session_id} | role={role} | content={content}")
     except Exception as e:
-        logger.warning(f"[Context Save Failed] session_id={session_id} | Reason: {e}", exc_info=True)
\ No newline at end of file
+        logger.warning(f"[Context Save Failed] session_id={session_id} | Reason: {e}", exc_info=True)
@@ -0,0 +1,47 @@
+# app/tests/conftest.py
+
+"""
+🧪 Shared fixtures for the database-backed tests.
+
+The engines are created from DATABASE_URL when app.db.database is imported,
+so the environment is pointed at a throwaway SQLite file (and archive
+directory) before any app module is loaded.
+"""
+
+import asyncio
+import os
+import tempfile
+
+_TMP = tempfile.mkdtemp(prefix="permitflow-tests-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{_TMP}/test.db")
+os.environ.setdefault("EVENT_LOG_ARCHIVE_DIR", f"{_TMP}/event_archive")
+os.environ.setdefault("LLM_PROVIDER", "stub")
+
+import pytest
+from sqlalchemy import text
+
+from app.db.database import Base, dispose_engines, engine
+from app.db.init_db import init_db
+from app.db.write_queue import write_queue
+
+
+def run_async(coro):
+    """Run a coroutine on a fresh loop, then release the loop-bound writer and pools."""
+    async def main():
+        try:
+            return await coro
+        finally:
+            await write_queue.stop()
+            await dispose_engines()
+    return asyncio.run(main())
+
+
+@pytest.fixture
+def db_tables():
+    """Empty tables (and id sequences) for each test."""
+    init_db()
+    with engine.begin() as conn:
+        for table in reversed(Base.metadata.sorted_tables):
+            conn.execute(table.delete())
+        conn.execute(text("DELETE FROM sqlite_sequence"))
+    yield
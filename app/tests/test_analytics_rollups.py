@@ -0,0 +1,143 @@
+# app/tests/test_analytics_rollups.py
+
+"""
+📊 Analytics rollups: failure isolation from the EventLog flush, and the
+portable (no ON CONFLICT) update path.
+"""
+
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import select
+
+from app.db import event_writer as event_writer_module
+from app.db.database import SessionLocal
+from app.db.event_archive import EventArchive
+from app.db.event_writer import WRITE_SYNC, EventLogWriter
+from app.db.models import Application, EventLog, HourlyRollup
+from app.services import analytics
+from app.tests.conftest import run_async
+
+
+def _application() -> int:
+    with SessionLocal() as db:
+        app = Application(session_id="s1", permit_type="Permit to Build")
+        db.add(app)
+        db.commit()
+        return app.id
+
+
+def _rollups():
+    with SessionLocal() as db:
+        return {
+            (r.metric, r.dimension): (r.count, r.total)
+            for r in db.execute(select(HourlyRollup)).scalars()
+        }
+
+
+def _event_types():
+    with SessionLocal() as db:
+        return db.execute(select(EventLog.event_type).order_by(EventLog.id)).scalars().all()
+
+
+def test_rollup_failure_does_not_block_events(db_tables, monkeypatch):
+    async def broken_rollups(db, events):
+        # A partial write, then a failure
+        await analytics._apply_deltas_async(db, {(datetime(2026, 1, 1, 10), "x", ""): [1, 0.0]})
+        raise RuntimeError("rollup bug")
+    monkeypatch.setattr(event_writer_module, "apply_event_rollups", broken_rollups)
+    writer = EventLogWriter(mode=WRITE_SYNC)
+    app_id = _application()
+
+    run_async(writer.log(app_id, "app_started", {"permit_type": "Permit to Build"}))
+
+    assert _event_types() == ["app_started"]
+    assert _rollups() == {}  # the savepoint rolled the partial rollup write back
+
+
+def test_rollups_written_with_events(db_tables):
+    writer = EventLogWriter(mode=WRITE_SYNC)
+    app_id = _application()
+
+    async def scenario():
+        await writer.log(app_id, "app_started", {"permit_type": "Permit to Build"})
+        await writer.log(app_id, "sme_decision", {"sme_type": "cyber", "decision": "approve"})
+
+    run_async(scenario())
+
+    rollups = _rollups()
+    assert rollups[(analytics.APPLICATIONS_STARTED, "Permit to Build")] == (1, 0.0)
+    assert rollups[(analytics.SME_DECISIONS, "cyber:approve")] == (1, 0.0)
+
+
+def test_portable_fallback_matches_upsert(db_tables, monkeypatch):
+    events = [
+        {"application_id": 1, "event_type": "app_started", "details": {"permit_type": "Permit to Build"},
+         "timestamp": datetime(2026, 1, 1, 10, 5)},
+        {"application_id": 2, "event_type": "app_started", "details": {"permit_type": "Permit to Build"},
+         "timestamp": datetime(2026, 1, 1, 10, 40)},
+    ]
+    deltas = analytics.compute_deltas(events, {})
+
+    with SessionLocal() as db:
+        analytics._apply_deltas(db, deltas)
+        db.commit()
+    upserted = _rollups()
+
+    with SessionLocal() as db:
+        db.query(HourlyRollup).delete()
+        db.commit()
+    monkeypatch.setattr(analytics, "UPSERT_DIALECTS", ())
+    with SessionLocal() as db:
+        analytics._apply_deltas(db, deltas)  # inserts the rows
+        analytics._apply_deltas(db, deltas)  # then increments them
+        db.commit()
+
+    assert {key: (count * 2, total * 2) for key, (count, total) in upserted.items()} == _rollups()
+
+
+def test_latency_uses_archived_start_events(db_tables, tmp_path, monkeypatch):
+    archive = EventArchive(str(tmp_path / "archive"))
+    monkeypatch.setattr(analytics, "get_event_archive", lambda: archive)
+    app_id = _application()
+    submitted = datetime.now(timezone.utc) - timedelta(days=100)
+    # The start events were archived by retention long ago
+    archive.write_segment([
+        {"id": 1, "application_id": app_id, "event_type": "app_started", "details": {}, "timestamp": submitted},
+        {"id": 2, "application_id": app_id, "event_type": "app_submitted", "details": {}, "timestamp": submitted},
+    ])
+    writer = EventLogWriter(mode=WRITE_SYNC)
+
+    run_async(writer.log(app_id, "sme_decision", {"sme_type": "cyber", "decision": "approve"}))
+
+    count, total = _rollups()[(analytics.SME_LATENCY, "cyber")]
+    assert count == 1 and total >= timedelta(days=100).total_seconds()
+
+
+def test_backfill_reproduces_live_rollups_across_archive(db_tables, tmp_path, monkeypatch):
+    archive = EventArchive(str(tmp_path / "archive"))
+    monkeypatch.setattr(analytics, "get_event_archive", lambda: archive)
+    app_id = _application()
+    writer = EventLogWriter(mode=WRITE_SYNC)
+
+    async def scenario():
+        await writer.log(app_id, "app_started", {"permit_type": "Permit to Build"})
+        await writer.log(app_id, "app_submitted", {})
+        await writer.log(app_id, "sme_decision", {"sme_type": "cyber", "decision": "approve"})
+        await writer.log(app_id, "human_review_ready", {})
+
+    run_async(scenario())
+    live = _rollups()
+    with SessionLocal() as db:
+        oldest = db.execute(
+            select(EventLog.id, EventLog.application_id, EventLog.event_type, EventLog.details, EventLog.timestamp)
+            .order_by(EventLog.id).limit(2)
+        ).all()
+        archive.write_segment([row._asdict() for row in oldest])
+        db.query(EventLog).filter(EventLog.id <= oldest[-1].id).delete()
+        db.commit()
+
+    with SessionLocal() as db:
+        result = analytics.backfill_rollups(db)
+
+    assert result["events"] == 4
+    assert _rollups() == live
@@ -0,0 +1,131 @@
+# app/tests/test_application_uow.py
+
+"""
+🧾 Application unit of work: one UPDATE per turn, events staged until commit,
+and the active-application cache kept honest when the write fails.
+"""
+
+import pytest
+from sqlalchemy import event, select
+
+from app.db import database
+from app.db.database import SessionLocal
+from app.db.models import Application
+from app.services import application_service
+from app.services.active_app_cache import get_active_app_cache
+from app.services.application_service import AsyncApplicationService
+from app.tests.conftest import run_async
+
+
+def _application(session_id: str) -> int:
+    with SessionLocal() as db:
+        app = Application(session_id=session_id, permit_type="Permit to Build", status="draft", data={})
+        db.add(app)
+        db.commit()
+        return app.id
+
+
+def _service(logged):
+    service = AsyncApplicationService()
+
+    async def log_event(app_id, event_type, details):
+        logged.append((app_id, event_type))
+    service.log_event = log_event
+    return service
+
+
+def test_one_update_per_turn(db_tables):
+    app_id = _application("uow-1")
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement.split()[0].upper())
+
+    async def turn():
+        service = AsyncApplicationService()
+        try:
+            async with service.unit_of_work("uow-1") as uow:
+                uow.update_data({"budget": "$10k"})
+                uow.update_data({"site": "Lot 4"})
+                uow.set_status("reviewing")
+        finally:
+            await service.close()
+
+    engines = {database.async_engine.sync_engine, database.async_write_engine.sync_engine}
+    for engine in engines:
+        event.listen(engine, "before_cursor_execute", record)
+    try:
+        get_active_app_cache().invalidate("uow-1")
+        run_async(turn())
+    finally:
+        for engine in engines:
+            event.remove(engine, "before_cursor_execute", record)
+
+    assert statements.count("UPDATE") == 1
+    with SessionLocal() as db:
+        app = db.execute(select(Application).where(Application.id == app_id)).scalar_one()
+    assert (app.status, app.data) == ("reviewing", {"budget": "$10k", "site": "Lot 4"})
+
+
+def test_staged_events_are_flushed_on_commit(db_tables):
+    app_id = _application("uow-2")
+    logged = []
+
+    async def turn():
+        service = _service(logged)
+        try:
+            async with service.unit_of_work("uow-2") as uow:
+                uow.log_event("field_updated", {"field": "budget"})
+                uow.submit()
+                assert logged == []  # staged until the commit
+        finally:
+            await service.close()
+
+    run_async(turn())
+
+    assert logged == [(app_id, "field_updated"), (app_id, "app_submitted")]
+
+
+def test_staged_events_are_dropped_on_exception(db_tables):
+    _application("uow-3")
+    logged = []
+
+    async def turn():
+        service = _service(logged)
+        try:
+            async with service.unit_of_work("uow-3") as uow:
+                uow.update_data({"budget": "$10k"})
+                uow.log_event("field_updated", {"field": "budget"})
+                raise RuntimeError("turn failed")
+        finally:
+            await service.close()
+
+    with pytest.raises(RuntimeError):
+        run_async(turn())
+
+    assert logged == []
+    with SessionLocal() as db:
+        assert db.execute(select(Application.data).where(Application.session_id == "uow-3")).scalar_one() == {}
+
+
+def test_failed_write_invalidates_cache(db_tables, monkeypatch):
+    _application("uow-4")
+    cache = get_active_app_cache()
+
+    async def failing_write(work, db):
+        raise RuntimeError("database is locked")
+
+    async def turn():
+        service = AsyncApplicationService()
+        try:
+            async with service.unit_of_work("uow-4") as uow:
+                assert cache.lookup("uow-4")[0]  # the load cached the application
+                monkeypatch.setattr(application_service, "run_write", failing_write)
+                uow.update_data({"budget": "$10k"})
+        finally:
+            await service.close()
+
+    with pytest.raises(RuntimeError):
+        run_async(turn())
+
+    assert cache.lookup("uow-4") == (False, None)
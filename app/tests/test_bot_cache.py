@@ -0,0 +1,75 @@
+# app/tests/test_bot_cache.py
+
+"""
+🤖 FlowBot cache: persona rebinding and per-session turn locks.
+"""
+
+import asyncio
+
+from app.agents.flowbot.flowbot import FlowBot
+from app.services import bot_cache as bot_cache_module
+from app.services.bot_cache import BotCache
+from app.services.session_state import InProcessStateStore, SqliteStateStore
+
+
+def test_persona_switch_rebinds_without_rebuilding(monkeypatch):
+    cache = BotCache()
+    first = cache.get("s1", "default")
+
+    def rebuilt(*args, **kwargs):
+        raise AssertionError("persona switch constructed a new FlowBot")
+    monkeypatch.setattr(FlowBot, "__init__", rebuilt)
+
+    other = cache.get("s1", "mentor")
+
+    assert other is not first
+    assert other.avatar == "mentor" and first.avatar == "default"
+    assert other.form_manager is first.form_manager
+    assert cache.get("s1", "mentor") is other
+
+
+def test_eviction_mid_turn_keeps_one_lock_per_session():
+    cache = BotCache(max_sessions=1)
+    order = []
+
+    async def turn(session_id: str, name: str, hold: float) -> None:
+        async with cache.turn(session_id):
+            order.append(f"{name} start")
+            await asyncio.sleep(hold)
+            order.append(f"{name} end")
+
+    async def scenario():
+        first = asyncio.create_task(turn("s1", "first", 0.1))
+        await asyncio.sleep(0.01)
+        cache.get("s2", "default")  # evicts s1 while its turn is in flight
+        assert len(cache) == 1
+        await turn("s1", "second", 0)
+        await first
+
+    asyncio.run(scenario())
+
+    assert order == ["first start", "first end", "second start", "second end"]
+
+
+def test_persona_switch_is_per_process_without_shared_state(monkeypatch):
+    monkeypatch.setattr(bot_cache_module, "get_session_state", InProcessStateStore)
+    worker_a, worker_b = BotCache(), BotCache()
+
+    worker_a.set_active_avatar("s1", "mentor")
+
+    assert worker_a.active_avatar("s1", "default") == "mentor"
+    assert worker_b.active_avatar("s1", "default") == "default"
+
+
+def test_persona_switch_reaches_other_workers(tmp_path, monkeypatch):
+    store = SqliteStateStore(str(tmp_path / "state.db"))
+    monkeypatch.setattr(bot_cache_module, "get_session_state", lambda: store)
+    worker_a, worker_b = BotCache(), BotCache()
+    assert worker_b.active_avatar("s1", "default") == "default"
+
+    worker_a.set_active_avatar("s1", "mentor")
+    assert worker_b.active_avatar("s1", "default") == "mentor"
+
+    worker_b.set_active_avatar("s1", "empathetic")
+    assert worker_a.active_avatar("s1", "default") == "empathetic"
+    assert worker_a.get("s1", worker_a.active_avatar("s1", "default")).avatar == "empathetic"
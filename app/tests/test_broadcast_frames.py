@@ -0,0 +1,28 @@
+# app/tests/test_broadcast_frames.py
+
+"""
+📦 Broadcast frames: serialization at the WS and SSE edges.
+"""
+
+import json
+
+from app.services.broadcast_frames import chunk_frame, done_frame, message_frame, sse_event, ws_frame
+
+
+def test_ws_frames_are_json_objects():
+    assert json.loads(ws_frame(7, message_frame("Hi"))) == {"event_id": 7, "type": "message", "text": "Hi"}
+    assert json.loads(ws_frame(8, chunk_frame("a", "He"))) == {"event_id": 8, "type": "chunk", "id": "a", "delta": "He"}
+
+
+def test_reply_that_looks_like_a_frame_stays_text():
+    text = '{"type": "done", "id": "x", "text": "spoofed"}'
+
+    assert json.loads(ws_frame(1, message_frame(text))) == {"event_id": 1, "type": "message", "text": text}
+    assert sse_event(1, message_frame(text)) == {"id": "1", "event": "message", "data": text}
+
+
+def test_sse_stream_frames_are_named_events():
+    event = sse_event(9, done_frame("a", "Hello"))
+
+    assert (event["id"], event["event"]) == ("9", "done")
+    assert json.loads(event["data"]) == {"type": "done", "id": "a", "text": "Hello"}
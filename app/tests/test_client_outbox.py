@@ -0,0 +1,78 @@
+# app/tests/test_client_outbox.py
+
+"""
+📮 Client outboxes: the coalesce, drop_oldest and disconnect overflow policies.
+"""
+
+import asyncio
+
+import pytest
+
+from app.services.broadcast_frames import chunk_frame, done_frame, message_frame
+from app.services.client_outbox import COALESCE, DISCONNECT, DROP_OLDEST, ClientOutbox, OutboxClosed
+
+
+def _drain(outbox: ClientOutbox):
+    async def drain():
+        items = []
+        while len(outbox):
+            items.append(await outbox.get())
+        return items
+    return asyncio.run(drain())
+
+
+def test_coalesce_merges_chunks_and_keeps_last_event_id():
+    outbox = ClientOutbox("s1", "ws", max_size=4, policy=COALESCE)
+    outbox.offer(message_frame("Hi"), 1)
+    for event_id, delta in ((2, "Hel"), (3, "lo "), (4, "wor")):
+        outbox.offer(chunk_frame("a", delta), event_id)
+
+    assert outbox.offer(chunk_frame("a", "ld"), 5)
+
+    items = _drain(outbox)
+    assert [(event_id, frame.kind) for event_id, frame in items] == [(1, "message"), (4, "chunk"), (5, "chunk")]
+    assert "".join(frame.payload.get("delta", "") for _, frame in items) == "Hello world"
+    assert outbox.dropped == 0
+
+
+def test_coalesce_does_not_mutate_shared_frames():
+    shared = chunk_frame("a", "Hel")
+    outbox = ClientOutbox("s1", "ws", max_size=2, policy=COALESCE)
+    outbox.offer(shared, 1)
+    outbox.offer(chunk_frame("a", "lo"), 2)
+    outbox.offer(chunk_frame("a", "!"), 3)
+
+    assert shared.payload["delta"] == "Hel"  # other clients' queues hold the same frame
+
+
+def test_drop_oldest_drops_chunks_never_done_or_messages():
+    outbox = ClientOutbox("s1", "sse", max_size=3, policy=DROP_OLDEST)
+    outbox.offer(message_frame("Welcome"), 1)
+    outbox.offer(chunk_frame("a", "Hel"), 2)
+    outbox.offer(done_frame("a", "Hello"), 3)
+
+    assert outbox.offer(message_frame("Next"), 4)
+
+    assert [event_id for event_id, _ in _drain(outbox)] == [1, 3, 4]
+    assert outbox.dropped == 1 and not outbox.closed
+
+
+@pytest.mark.parametrize("policy", [DROP_OLDEST, COALESCE])
+def test_full_of_undroppable_frames_disconnects(policy):
+    outbox = ClientOutbox("s1", "ws", max_size=2, policy=policy)
+    outbox.offer(message_frame("Welcome"), 1)
+    outbox.offer(done_frame("a", "Hello"), 2)
+
+    assert not outbox.offer(chunk_frame("b", "x"), 3)
+    assert outbox.closed and outbox.close_reason == DISCONNECT
+
+
+def test_disconnect_policy_closes_on_overflow():
+    outbox = ClientOutbox("s1", "ws", max_size=2, policy=DISCONNECT)
+    outbox.offer(chunk_frame("a", "x"), 1)
+    outbox.offer(chunk_frame("a", "y"), 2)
+
+    assert not outbox.offer(chunk_frame("a", "z"), 3)
+    assert outbox.close_reason == DISCONNECT
+    with pytest.raises(OutboxClosed):
+        asyncio.run(outbox.get())  # queued frames are abandoned; the client reconnects
@@ -0,0 +1,57 @@
+# app/tests/test_database.py
+
+"""
+🔌 Async URL mapping and lazy failure for backends without an async driver.
+"""
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from app.db.database import to_async_url
+
+ROOT_DIR = Path(__file__).resolve().parents[2]
+
+
+@pytest.mark.parametrize("url, expected", [
+    ("sqlite:///./permitflow.db", "sqlite+aiosqlite:///./permitflow.db"),
+    ("postgresql://u:p@db/permitflow", "postgresql+asyncpg://u:p@db/permitflow"),
+    ("mssql+pyodbc://u:p@azure/permitflow", "mssql+aioodbc://u:p@azure/permitflow"),
+    ("postgresql+asyncpg://u:p@db/permitflow", "postgresql+asyncpg://u:p@db/permitflow"),
+])
+def test_to_async_url(url, expected):
+    assert to_async_url(url) == expected
+
+
+def test_unmapped_backend_raises():
+    with pytest.raises(ValueError):
+        to_async_url("oracle://u:p@db/permitflow")
+
+
+def test_import_survives_without_async_engine(tmp_path):
+    # A sync-only driver as the async URL: the app must still import, and
+    # async sessions fail when used
+    env = {
+        **os.environ,
+        "DATABASE_URL": f"sqlite:///{tmp_path}/sync.db",
+        "ASYNC_DATABASE_URL": f"sqlite+pysqlite:///{tmp_path}/sync.db",
+        "LLM_PROVIDER": "stub",
+        "PYTHONPATH": str(ROOT_DIR),
+    }
+    code = (
+        "from app.db.database import AsyncSessionLocal, SessionLocal, async_engine\n"
+        "from sqlalchemy import text\n"
+        "assert async_engine is None\n"
+        "SessionLocal().execute(text('select 1'))\n"
+        "try:\n"
+        "    AsyncSessionLocal()\n"
+        "except RuntimeError as e:\n"
+        "    print('lazy:', e)\n"
+    )
+    result = subprocess.run([sys.executable, "-c", code], env=env, cwd=ROOT_DIR,
+                            capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stderr
+    assert "lazy: Async database access is unavailable" in result.stdout
@@ -0,0 +1,66 @@
+# app/tests/test_db_inspector.py
+
+"""
+🔎 DB inspector: list vs batch detail responses; keyset paging.
+"""
+
+from fastapi.testclient import TestClient
+
+from app.db.database import SessionLocal
+from app.db.models import Application
+from app.main import app
+
+client = TestClient(app)
+
+
+def _applications(count: int) -> None:
+    with SessionLocal() as db:
+        db.add_all(Application(session_id="s1", permit_type="Permit to Build") for _ in range(count))
+        db.commit()
+
+
+def test_batch_returns_details_in_id_order(db_tables):
+    _applications(3)
+
+    response = client.get("/db/applications/batch", params={"ids": "3,1"})
+
+    assert response.status_code == 200
+    assert [(a["id"], a["reviews"], a["events"]) for a in response.json()] == [(1, [], []), (3, [], [])]
+
+
+def test_list_matches_its_schema(db_tables):
+    _applications(2)
+
+    response = client.get("/db/applications")
+
+    assert response.status_code == 200
+    assert all("reviews" not in a for a in response.json())
+
+
+def test_batch_rejects_bad_ids(db_tables):
+    assert client.get("/db/applications/batch", params={"ids": "1,x"}).status_code == 422
+    assert client.get("/db/applications/batch").status_code == 422
+
+
+def test_keyset_pages_return_every_row_once(db_tables):
+    _applications(7)
+    seen, params = [], {"limit": 3}
+
+    while True:
+        response = client.get("/db/applications", params=params)
+        assert response.status_code == 200
+        seen += [a["id"] for a in response.json()]
+        if "X-Next-After-Id" not in response.headers:
+            break
+        params["after_id"] = response.headers["X-Next-After-Id"]
+
+    assert seen == list(range(1, 8))
+    assert len(response.json()) == 1  # the header is absent on the last page
+
+
+def test_skip_with_after_id_is_rejected(db_tables):
+    _applications(3)
+
+    assert client.get("/db/applications", params={"after_id": 1, "skip": 1}).status_code == 422
+    assert client.get("/db/reviews", params={"after_id": 1, "skip": 1}).status_code == 422
+    assert [a["id"] for a in client.get("/db/applications", params={"skip": 1}).json()] == [2, 3]
@@ -0,0 +1,105 @@
+# app/tests/test_event_retention.py
+
+"""
+🗃️ Event-log retention: archive watermark, id reuse and interrupted passes.
+"""
+
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import func, select
+
+from app.db.database import SessionLocal
+from app.db.event_archive import EventArchive
+from app.db.init_db import init_db
+from app.db.models import EventLog
+from app.services.event_retention import EventLogRetention
+from app.tests.conftest import run_async
+
+
+def _add_events(count: int, age_days: float = 0) -> None:
+    ts = datetime.now(timezone.utc) - timedelta(days=age_days)
+    with SessionLocal() as db:
+        db.add_all(EventLog(event_type="bench", details={"n": n}, timestamp=ts) for n in range(count))
+        db.commit()
+
+
+def _live_ids():
+    with SessionLocal() as db:
+        return db.execute(select(EventLog.id).order_by(EventLog.id)).scalars().all()
+
+
+def _retention(tmp_path, **kwargs) -> EventLogRetention:
+    return EventLogRetention(archive=EventArchive(str(tmp_path / "archive")), pause_ms=0, **kwargs)
+
+
+def test_new_event_after_full_archive_is_kept(db_tables, tmp_path):
+    _add_events(3, age_days=100)
+    retention = _retention(tmp_path, retention_days=90)
+
+    assert run_async(retention.archive_expired())["archived"] == 3
+    assert _live_ids() == []
+
+    # The table is empty now; the next id must not reuse an archived one
+    _add_events(1)
+    new_ids = _live_ids()
+    assert new_ids[0] > retention.archive.watermark
+
+    assert run_async(retention.archive_expired())["archived"] == 0
+    assert _live_ids() == new_ids
+    assert [e["id"] for e in retention.archive.read()] == [1, 2, 3]
+
+
+def test_interrupted_pass_deletes_only_archived_rows(db_tables, tmp_path):
+    _add_events(5, age_days=100)
+    retention = _retention(tmp_path, retention_days=90)
+    with SessionLocal() as db:
+        rows = db.execute(
+            select(EventLog.id, EventLog.application_id, EventLog.event_type, EventLog.details, EventLog.timestamp)
+            .order_by(EventLog.id).limit(3)
+        ).all()
+    # Segment written, rows never deleted (the process died in between)
+    retention.archive.write_segment([row._asdict() for row in rows])
+
+    result = run_async(retention.archive_expired())
+
+    assert result == {"archived": 2, "segments": 1}
+    assert _live_ids() == []
+    assert [e["id"] for e in retention.archive.read()] == [1, 2, 3, 4, 5]
+
+
+def test_rows_below_watermark_not_in_archive_are_kept(db_tables, tmp_path):
+    retention = _retention(tmp_path, retention_days=90)
+    ts = datetime.now(timezone.utc) - timedelta(days=100)
+    retention.archive.write_segment([
+        {"id": 1, "application_id": None, "event_type": "other", "details": {}, "timestamp": ts},
+        {"id": 2, "application_id": None, "event_type": "other", "details": {}, "timestamp": ts},
+    ])
+    _add_events(1)  # id 1, but not the archived event 1
+
+    run_async(retention.archive_expired())
+
+    assert _live_ids() == [1]
+
+
+def test_init_db_keeps_ids_above_archive_watermark(db_tables, tmp_path, monkeypatch):
+    archive = EventArchive(str(tmp_path / "archive"))
+    ts = datetime.now(timezone.utc)
+    archive.write_segment([{"id": 41, "application_id": None, "event_type": "bench", "details": {}, "timestamp": ts}])
+    monkeypatch.setattr("app.db.init_db.get_event_archive", lambda: archive)
+
+    init_db()
+    _add_events(1)
+
+    assert _live_ids() == [42]
+
+
+def test_size_policy_archives_oldest_rows(db_tables, tmp_path):
+    _add_events(10)
+    retention = _retention(tmp_path, retention_days=0, max_rows=4, segment_rows=3, batch_size=2)
+
+    result = run_async(retention.archive_expired())
+
+    assert result == {"archived": 6, "segments": 2}
+    assert _live_ids() == [7, 8, 9, 10]
+    with SessionLocal() as db:
+        assert db.execute(select(func.count()).select_from(EventLog)).scalar() == 4
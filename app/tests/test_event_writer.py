@@ -0,0 +1,68 @@
+# app/tests/test_event_writer.py
+
+"""
+📝 EventLog write-behind: shutdown flush and batching.
+"""
+
+import asyncio
+
+from sqlalchemy import select
+
+from app.db.database import SessionLocal
+from app.db.event_writer import WRITE_BEHIND, EventLogWriter
+from app.db.models import EventLog
+from app.tests.conftest import run_async
+
+
+def _logged_types():
+    with SessionLocal() as db:
+        return db.execute(select(EventLog.event_type).order_by(EventLog.id)).scalars().all()
+
+
+def test_stop_during_slow_insert_keeps_every_event(db_tables):
+    writer = EventLogWriter(mode=WRITE_BEHIND, batch_size=3, flush_ms=10)
+    insert = writer._insert
+
+    async def scenario():
+        started = asyncio.Event()
+
+        async def slow_insert(rows):
+            started.set()
+            await asyncio.sleep(0.2)
+            await insert(rows)
+        writer._insert = slow_insert
+
+        for n in range(3):
+            await writer.log(None, f"first_{n}")
+        await started.wait()  # the first batch is out of the buffer, mid-insert
+        for n in range(2):
+            await writer.log(None, f"second_{n}")
+        await writer.stop()
+
+    run_async(scenario())
+
+    assert _logged_types() == ["first_0", "first_1", "first_2", "second_0", "second_1"]
+    assert len(writer) == 0
+
+
+def test_failed_flush_is_retried(db_tables):
+    writer = EventLogWriter(mode=WRITE_BEHIND, batch_size=10, flush_ms=10)
+    insert = writer._insert
+    calls = []
+
+    async def flaky_insert(rows):
+        calls.append(len(rows))
+        if len(calls) == 1:
+            raise RuntimeError("database is locked")
+        await insert(rows)
+
+    async def scenario():
+        writer._insert = flaky_insert
+        await writer.log(None, "retried")
+        await asyncio.sleep(0.1)
+        await writer.stop()
+
+    run_async(scenario())
+
+    assert _logged_types() == ["retried"]
+    assert calls[0] == 1 and len(calls) >= 2
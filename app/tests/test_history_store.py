@@ -0,0 +1,41 @@
+# app/tests/test_history_store.py
+
+"""
+🧠 Conversation history: ring-buffer truncation and state round trips.
+"""
+
+from app.session.history_store import ConversationHistory
+
+
+def _fill(history: ConversationHistory, count: int) -> None:
+    for n in range(count):
+        history.append("user" if n % 2 == 0 else "bot", f"message {n}")
+
+
+def test_ring_buffer_keeps_newest_messages():
+    history = ConversationHistory(capacity=3)
+    _fill(history, 5)
+
+    assert len(history) == 3
+    assert [r.content for r in history] == ["message 2", "message 3", "message 4"]
+    assert history.text == "Human: message 2\nAI: message 3\nHuman: message 4"
+    assert [r.seq for r in history.last(2)] == [3, 4]
+
+
+def test_ring_buffer_of_one():
+    history = ConversationHistory(capacity=1)
+    _fill(history, 3)
+
+    assert history.text == "Human: message 2"
+
+
+def test_state_round_trip_truncates_to_capacity():
+    history = ConversationHistory(capacity=10)
+    _fill(history, 6)
+    history.apply_summary("earlier", upto=2, raw_chars=40)
+
+    restored = ConversationHistory.from_state(history.to_state(), capacity=4)
+
+    assert [r.content for r in restored] == ["message 2", "message 3", "message 4", "message 5"]
+    assert restored.text == history.render_last(4)
+    assert (restored.summary, restored.summarized_upto) == ("earlier", 2)
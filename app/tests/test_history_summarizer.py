@@ -0,0 +1,78 @@
+# app/tests/test_history_summarizer.py
+
+"""
+📝 History summarization: older turns fold into the running summary in a
+background task, one refresh per session at a time.
+"""
+
+import asyncio
+
+from app.session import history_summarizer
+from app.session.history_store import ConversationHistory
+from app.session.memory_manager import get_or_create_history
+from app.session.session_context import get_context_text
+
+
+def _fill(history: ConversationHistory, count: int) -> None:
+    for n in range(count):
+        history.append("user" if n % 2 == 0 else "bot", f"message {n}")
+
+
+def _summarize(session_id: str, monkeypatch, messages: int):
+    monkeypatch.setattr(history_summarizer, "HISTORY_VERBATIM_MESSAGES", 4)
+    monkeypatch.setattr(history_summarizer, "HISTORY_SUMMARY_BATCH_MESSAGES", 6)
+    history = get_or_create_history(session_id)
+    _fill(history, messages)
+
+    async def run():
+        task = history_summarizer.schedule_summary(session_id)
+        if task:
+            await task
+        return task
+    return history, asyncio.run(run())
+
+
+def test_older_turns_become_the_summary(monkeypatch):
+    history, task = _summarize("history-fold", monkeypatch, messages=12)
+
+    assert task is not None
+    assert history.summarized_upto == 8  # all but the 4 verbatim messages
+    assert "message 0" in history.summary and "message 7" in history.summary
+    assert [r.content for r in history.unsummarized()] == ["message 8", "message 9", "message 10", "message 11"]
+
+
+def test_context_text_is_summary_plus_recent_turns(monkeypatch):
+    history, _ = _summarize("history-context", monkeypatch, messages=12)
+
+    assert get_context_text("history-context") == (
+        f"Summary of earlier conversation: {history.summary}\n{history.render_last(4)}"
+    )
+
+
+def test_too_few_older_turns_are_not_summarized(monkeypatch):
+    history, task = _summarize("history-short", monkeypatch, messages=9)
+
+    assert task is None and history.summary == ""
+    assert get_context_text("history-short") == history.text
+
+
+def test_one_refresh_in_flight_per_session(monkeypatch):
+    monkeypatch.setattr(history_summarizer, "HISTORY_VERBATIM_MESSAGES", 4)
+    monkeypatch.setattr(history_summarizer, "HISTORY_SUMMARY_BATCH_MESSAGES", 6)
+    _fill(get_or_create_history("history-concurrent"), 12)
+    runs = []
+
+    async def slow_refresh(session_id, history):
+        runs.append(session_id)
+        await asyncio.sleep(0.05)
+    monkeypatch.setattr(history_summarizer, "_refresh_summary", slow_refresh)
+
+    async def run():
+        first = history_summarizer.schedule_summary("history-concurrent")
+        second = history_summarizer.schedule_summary("history-concurrent")
+        await first
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert first is not None and second is None
+    assert runs == ["history-concurrent"]
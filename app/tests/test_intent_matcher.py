@@ -0,0 +1,100 @@
+# app/tests/test_intent_matcher.py
+
+"""
+🎯 Intent matcher: the compiled index picks the same intent as the original
+per-intent substring loop.
+"""
+
+import pytest
+
+from app.core.config import GENERAL_INTENTS
+from app.services.intent_matcher import IntentMatcher
+from app.utils.text_utils import expand_with_synonyms
+
+
+def loop_match(intents, message):
+    """The nested loop the matcher replaced: first intent/pattern in catalog order."""
+    msg_variants = expand_with_synonyms(message)
+    for intent_name, intent_data in intents.items():
+        for pattern in intent_data.get("patterns", []):
+            pattern_variants = expand_with_synonyms(pattern)
+            if any(mv == pv or mv in pv or pv in mv for mv in msg_variants for pv in pattern_variants):
+                return intent_name
+    return None
+
+
+CATALOG = {
+    "greeting": {"patterns": ["hello", "hi there"]},
+    "permit": {"patterns": ["permit to build", "build"]},
+    "permit_status": {"patterns": ["permit status", "status of my permit"]},
+    "thanks": {"patterns": ["thank you", "thanks"]},
+    "help": {"patterns": ["help me", "hello help"]},
+}
+
+MESSAGES = [
+    "hello",
+    "HELLO!!!",
+    "Hi there, can you help me?",
+    "hello help",                            # both "hello" (rank 0) and "hello help" occur
+    "what is the permit status?",            # "permit" is inside "permit status"...
+    "I want a permit to build something",    # ...and "build" inside "permit to build"
+    "status of my permit to build",          # patterns of two intents overlap
+    "perm",                                  # message inside a pattern
+    "to",                                    # message inside patterns of several intents
+    "Thank you so much",
+    "thanks, help me",
+    "  thank   you  ",
+    "tank you",
+]
+
+
+@pytest.mark.parametrize("message", MESSAGES)
+def test_same_intent_as_loop(message):
+    match = IntentMatcher(CATALOG).match(message)
+
+    assert (match.intent if match else None) == loop_match(CATALOG, message)
+
+
+def test_earlier_intent_wins_a_tie():
+    catalog = {"first": {"patterns": ["build"]}, "second": {"patterns": ["build"]}}
+
+    assert IntentMatcher(catalog).match("build it").intent == "first"
+
+
+def test_earlier_pattern_wins_within_overlaps():
+    catalog = {"long": {"patterns": ["permit to build"]}, "short": {"patterns": ["permit"]}}
+
+    # "permit" occurs first in the text, but the long pattern ranks first
+    assert IntentMatcher(catalog).match("permit to build please").intent == "long"
+
+
+def test_no_match():
+    assert IntentMatcher(CATALOG).match("quantum chromodynamics") is None
+    assert loop_match(CATALOG, "quantum chromodynamics") is None
+    assert IntentMatcher({}).match("hello") is None
+
+
+def test_site_catalog_agrees_with_loop():
+    matcher = IntentMatcher(GENERAL_INTENTS)
+    messages = [p for data in GENERAL_INTENTS.values() for p in data.get("patterns", [])]
+    messages += [m.upper() + "?" for m in messages] + [f"well, {m} please" for m in messages] + MESSAGES
+
+    for message in messages:
+        match = matcher.match(message)
+        assert (match.intent if match else None) == loop_match(GENERAL_INTENTS, message), message
+
+
+def test_exact_match_scores_one():
+    matcher = IntentMatcher(CATALOG)
+
+    assert matcher.match("Thanks!") == ("thanks", 1.0, True)
+    partial = matcher.match("perm")
+    assert not partial.exact and 0 < partial.confidence < 1
+
+
+def test_confidence_is_best_over_the_intents_patterns():
+    catalog = {"permit": {"patterns": ["permit to build a new service", "build"]}}
+
+    # "build" is inside the first (winning) pattern and equal to the second
+    match = IntentMatcher(catalog).match("build")
+    assert match == ("permit", 1.0, True)
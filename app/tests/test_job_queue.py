@@ -0,0 +1,57 @@
+# app/tests/test_job_queue.py
+
+"""
+🧰 Job queue: idempotent enqueue and re-submitting failed jobs.
+"""
+
+from app.db.database import SessionLocal
+from app.db.models import Job
+from app.services.job_queue import JobQueue
+from app.tests.conftest import run_async
+
+
+def _job(job_id: int) -> Job:
+    with SessionLocal() as db:
+        return db.query(Job).filter(Job.id == job_id).one()
+
+
+def _fail(queue: JobQueue) -> int:
+    job = queue._claim_next()
+    queue._finish(job.id, "SME timed out")
+    return job.id
+
+
+def test_duplicate_enqueue_returns_existing_job(db_tables):
+    queue = JobQueue()
+
+    first = run_async(queue.enqueue("sme_review", {"app_id": 1}, job_key="sme_review:1"))
+    second = run_async(queue.enqueue("sme_review", {"app_id": 1}, job_key="sme_review:1"))
+
+    assert first == second
+    with SessionLocal() as db:
+        assert db.query(Job).count() == 1
+
+
+def test_failed_job_is_rearmed_on_resubmit(db_tables):
+    queue = JobQueue()
+    job_id = run_async(queue.enqueue("sme_review", {"app_id": 1}, job_key="sme_review:1", max_attempts=1))
+    assert _fail(queue) == job_id
+    assert _job(job_id).status == "failed"
+
+    assert run_async(queue.enqueue("sme_review", {"app_id": 1}, job_key="sme_review:1", max_attempts=1)) == job_id
+
+    job = _job(job_id)
+    assert (job.status, job.attempts) == ("pending", 0)
+    assert queue._claim_next().id == job_id
+
+
+def test_pending_or_done_job_is_not_reset(db_tables):
+    queue = JobQueue()
+    job_id = run_async(queue.enqueue("sme_review", {"app_id": 1}, job_key="sme_review:1"))
+    job = queue._claim_next()
+    queue._finish(job.id)
+
+    run_async(queue.enqueue("sme_review", {"app_id": 1}, job_key="sme_review:1"))
+
+    job = _job(job_id)
+    assert (job.status, job.attempts) == ("done", 1)
@@ -0,0 +1,35 @@
+# app/tests/test_llm_polish.py
+
+"""
+✨ LLM polishing policy per intent: never / low_confidence / always.
+"""
+
+import pytest
+
+from app.agents.flowbot import flowbot
+from app.agents.flowbot.flowbot import FlowBot
+
+
+@pytest.mark.parametrize("policy, confidence, expected", [
+    ("never", 0.1, False),
+    ("never", 1.0, False),
+    ("always", 0.1, True),
+    ("always", 1.0, True),
+    ("low_confidence", 1.0, False),
+    ("low_confidence", 0.99, True),
+    (None, 1.0, False),   # default policy is low_confidence
+    (None, 0.5, True),
+])
+def test_policy(policy, confidence, expected):
+    intent = {"llm_polish": policy} if policy else {}
+
+    assert FlowBot._needs_llm_polish(intent, confidence) is expected
+
+
+def test_low_confidence_uses_threshold(monkeypatch):
+    monkeypatch.setattr(flowbot, "INTENT_CONFIDENCE_THRESHOLD", 0.8)
+    intent = {"llm_polish": "low_confidence"}
+
+    assert FlowBot._needs_llm_polish(intent, 0.8) is False
+    assert FlowBot._needs_llm_polish(intent, 0.79) is True
+
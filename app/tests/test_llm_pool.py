@@ -0,0 +1,34 @@
+# app/tests/test_llm_pool.py
+
+"""
+🧺 LLM client pool: LRU bound on clients and their stats.
+"""
+
+from app.langchain_config import LLMClientPool
+
+
+def _key(temperature: float) -> tuple:
+    return ("stub", "stub", temperature, False, 15)
+
+
+def test_evicted_clients_take_their_stats_with_them():
+    pool = LLMClientPool(max_size=2)
+    for n in range(50):
+        pool.get(_key(n / 100), object)
+
+    stats = pool.stats()
+    assert stats["size"] == 2 and stats["evictions"] == 48
+    assert [c["temperature"] for c in stats["clients"]] == [0.48, 0.49]
+
+
+def test_hits_reuse_the_client():
+    pool = LLMClientPool(max_size=2)
+    first = pool.get(_key(0.0), object)
+    pool.get(_key(0.7), object)
+
+    assert pool.get(_key(0.0), object) is first
+    pool.get(_key(0.2), object)  # evicts 0.7, the least recently used
+
+    clients = {c["temperature"]: c for c in pool.stats()["clients"]}
+    assert sorted(clients) == [0.0, 0.2]
+    assert (clients[0.0]["hits"], clients[0.0]["misses"]) == (1, 1)
@@ -0,0 +1,49 @@
+# app/tests/test_llm_stub.py
+
+"""
+🧪 Stub LLM: injected errors arrive after the sampled latency.
+"""
+
+import asyncio
+import time
+
+import pytest
+from langchain_core.messages import HumanMessage
+
+from app.llm_stub import StubChatModel, StubLLMError
+
+
+def test_injected_error_waits_out_latency():
+    llm = StubChatModel(latency="fixed:50", error_rate=1.0)
+    started = time.perf_counter()
+
+    with pytest.raises(StubLLMError):
+        asyncio.run(llm.ainvoke([HumanMessage(content="hi")]))
+
+    assert time.perf_counter() - started >= 0.05
+
+
+def test_streamed_error_waits_out_latency():
+    llm = StubChatModel(latency="fixed:50", error_rate=1.0)
+    started = time.perf_counter()
+
+    with pytest.raises(StubLLMError):
+        list(llm.stream([HumanMessage(content="hi")]))
+
+    assert time.perf_counter() - started >= 0.05
+
+
+def test_error_rate_is_seeded():
+    outcomes = []
+    for _ in range(2):
+        llm = StubChatModel(error_rate=0.5, seed=7)
+        run = []
+        for _ in range(20):
+            try:
+                llm.invoke([HumanMessage(content="hi")])
+                run.append(True)
+            except StubLLMError:
+                run.append(False)
+        outcomes.append(run)
+
+    assert outcomes[0] == outcomes[1] and True in outcomes[0] and False in outcomes[0]
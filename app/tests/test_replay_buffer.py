@@ -0,0 +1,62 @@
+# app/tests/test_replay_buffer.py
+
+"""
+🔁 Replay buffer: events from several workers arriving out of id order, and
+event ids shared across workers.
+"""
+
+from app.services import replay_buffer
+from app.services.broadcast_frames import chunk_frame, done_frame, message_frame
+from app.services.session_state import SqliteStateStore
+
+
+def test_out_of_order_events_are_replayed():
+    session_id = "replay-out-of-order"
+    # Worker B's event (id 20) reaches this worker before worker A's (id 15)
+    for event_id in (10, 20, 15, 30):
+        replay_buffer.record(session_id, event_id, message_frame(f"n={event_id}"))
+
+    # The client saw 10 and 15 before reconnecting
+    assert [e[0] for e in replay_buffer.events_after(session_id, 15)] == [20, 30]
+    assert [e[0] for e in replay_buffer.events_after(session_id, 10)] == [15, 20, 30]
+
+
+def test_full_buffer_keeps_newest_events(monkeypatch):
+    monkeypatch.setattr(replay_buffer, "REPLAY_BUFFER_SIZE", 3)
+    session_id = "replay-full"
+    for event_id in (1, 2, 4, 5, 3, 0):
+        replay_buffer.record(session_id, event_id, message_frame(""))
+
+    assert [e[0] for e in replay_buffer.events_after(session_id, 1)] == [3, 4, 5]
+
+
+def test_event_ids_come_from_one_shared_sequence(tmp_path, monkeypatch):
+    path = str(tmp_path / "state.db")
+    worker_a, worker_b = SqliteStateStore(path), SqliteStateStore(path)
+    issued = []
+    for store in (worker_a, worker_b, worker_b, worker_a):
+        monkeypatch.setattr(replay_buffer, "get_session_state", lambda store=store: store)
+        issued.append(replay_buffer.next_event_id())
+
+    # Strictly increasing in issue order whichever worker took the id
+    assert issued == sorted(set(issued))
+
+
+def test_shared_sequence_ignores_a_lagging_clock(tmp_path):
+    store = SqliteStateStore(str(tmp_path / "state.db"))
+    first = store.next_sequence("sequence:event_id", floor=1_000)
+
+    # Another worker's clock is behind: it still gets the next id
+    assert store.next_sequence("sequence:event_id", floor=10) == first + 1
+    assert store.next_sequence("sequence:event_id", floor=5_000) == 5_000
+
+
+def test_done_frame_replaces_its_chunks():
+    session_id = "replay-stream"
+    replay_buffer.record(session_id, 1, chunk_frame("a", "Hel"))
+    replay_buffer.record(session_id, 2, message_frame('{"type": "chunk", "id": "a", "delta": "x"}'))
+    replay_buffer.record(session_id, 3, chunk_frame("a", "lo"))
+    replay_buffer.record(session_id, 4, done_frame("a", "Hello"))
+
+    # A plain reply that looks like a chunk frame is kept as a message
+    assert [(e[0], e[1].kind) for e in replay_buffer.events_after(session_id, 0)] == [(2, "message"), (4, "done")]
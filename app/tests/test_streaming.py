@@ -0,0 +1,109 @@
+# app/tests/test_streaming.py
+
+"""
+🌊 Streamed replies: a model failure mid-stream falls back to the candidate
+reply in the "done" frame and in history; deltas are coalesced per window.
+"""
+
+import asyncio
+
+from langchain_core.messages import AIMessageChunk
+from langchain_core.outputs import ChatGenerationChunk
+
+from app import llm_client
+from app.llm_client import LLMStreamInterrupted
+from app.agents.flowbot.flowbot import FlowBot
+from app.llm_stub import StubChatModel, StubLLMError
+from app.services import flowbot_service
+from app.services.session_bus import get_session_bus
+from app.session.session_context import get_context_history
+from app.tests.conftest import run_async
+
+
+class MidStreamFailure(StubChatModel):
+    """Streams part of a reply, then drops the connection."""
+
+    async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+        yield ChatGenerationChunk(message=AIMessageChunk(content="Partial "))
+        yield ChatGenerationChunk(message=AIMessageChunk(content="reply "))
+        raise StubLLMError("connection reset")
+
+
+def test_mid_stream_failure_sends_candidate_reply(db_tables, monkeypatch):
+    monkeypatch.setattr(llm_client, "get_llm", lambda **kwargs: MidStreamFailure())
+    sent = []
+
+    async def capture(session_id, frame, event_id):
+        sent.append(frame)
+    monkeypatch.setattr(get_session_bus(), "_handler", capture)
+    bot = FlowBot(user_id="stream-1")
+
+    async def resolve(message):
+        return "Candidate reply.", True  # needs LLM polishing
+    bot._resolve_reply = resolve
+
+    text = run_async(flowbot_service.broadcast_stream("stream-1", bot.stream_message("qwerty zxcv")))
+
+    assert text == "Candidate reply."
+    assert [frame.kind for frame in sent] == ["chunk", "chunk", "done"]
+    assert sent[-1].payload["text"] == "Candidate reply."
+    assert [turn["content"] for turn in get_context_history("stream-1")[-2:]] == ["qwerty zxcv", "Candidate reply."]
+
+
+def test_failure_before_output_yields_candidate(monkeypatch):
+    class FailsFirst(StubChatModel):
+        async def _astream(self, messages, stop=None, run_manager=None, **kwargs):
+            raise StubLLMError("timeout")
+            yield  # pragma: no cover
+
+    monkeypatch.setattr(llm_client, "get_llm", lambda **kwargs: FailsFirst())
+
+    async def collect():
+        return [d async for d in llm_client.stream_validate_with_llm("s", "default", "plain", "hi", "Hello!")]
+
+    assert run_async(collect()) == ["Hello!"]
+
+
+async def _deltas(pieces, gap=0.0, error=None):
+    for piece in pieces:
+        if gap:
+            await asyncio.sleep(gap)
+        yield piece
+    if error:
+        raise error
+
+
+def _collect(deltas, window):
+    async def collect():
+        return [piece async for piece in flowbot_service.coalesce_deltas(deltas, window)]
+    return asyncio.run(collect())
+
+
+def test_fast_deltas_are_merged():
+    pieces = [f"t{n} " for n in range(20)]
+
+    out = _collect(_deltas(pieces), window=0.05)
+
+    assert "".join(out) == "".join(pieces)
+    assert out[0] == "t0 "  # the first token is not held back
+    assert len(out) == 2
+
+
+def test_slow_deltas_pass_through():
+    pieces = ["a", "b", "c"]
+
+    assert _collect(_deltas(pieces, gap=0.03), window=0.01) == pieces
+
+
+def test_coalesced_stream_reraises_interruptions():
+    async def collect():
+        out = []
+        try:
+            async for piece in flowbot_service.coalesce_deltas(
+                    _deltas(["a", "b"], error=LLMStreamInterrupted("fallback")), 0.05):
+                out.append(piece)
+        except LLMStreamInterrupted as e:
+            return out, e.fallback
+
+    out, fallback = asyncio.run(collect())
+    assert "".join(out) == "ab" and fallback == "fallback"
@@ -8,8 +8,20 @@ import multiprocessing
 # On small Azure App Service plans, each worker is a full Python process.
 # Reducing to 1 worker minimizes memory usage and avoids OOM kills.
 # Increase this if you move to a larger plan with more RAM.
-# NOTE: For SQLite, use 1 worker to avoid "database is locked" errors.
-workers = 1
+# NOTE: SQLite runs in WAL mode with a busy_timeout and one writer task per
+# worker (app/db/database.py, app/db/write_queue.py), so several workers can
+# share the file; write throughput is still bounded by a single writer.
+# GUNICORN_WORKERS (or WEB_CONCURRENCY) overrides this; "auto" uses every core.
+_workers = os.environ.get("GUNICORN_WORKERS") or os.environ.get("WEB_CONCURRENCY") or "1"
+workers = multiprocessing.cpu_count() if _workers == "auto" else max(1, int(_workers))
+
+# With several workers, broadcasts and conversation memory must be shared:
+# default to the host-local session bus and state store (see
+# app/services/session_bus.py and app/services/session_state.py).
+# Set before the app is preloaded so the backends pick these up.
+if workers > 1:
+    os.environ.setdefault("SESSION_BUS_BACKEND", "unix")
+    os.environ.setdefault("SESSION_STATE_BACKEND", "sqlite")
 
 # Use Uvicorn's ASGI worker class for FastAPI
 worker_class = "uvicorn.workers.UvicornWorker"
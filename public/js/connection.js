@@ -6,7 +6,15 @@ export const ConnectionManager = {
   messageQueue: [],
   uiReady: false,
   addMessageFn: null,
+  streamMessageFn: null,
   updateStatusFn: null,
+  streamBuffers: {},
+  // Highest server event id seen; sent on reconnect so only missed events are replayed
+  lastEventId: 0,
+  // Recently delivered event ids. Events published by different workers can
+  // arrive out of id order, so duplicates are found by id, not by high-water mark.
+  seenEventIds: new Set(),
+  maxSeenEventIds: 1000,
 
   isConnected() {
     return this.ws && this.ws.readyState === WebSocket.OPEN;
@@ -26,17 +34,67 @@ export const ConnectionManager = {
   },
 
   flushQueue() {
-    if (this.addMessageFn) {
-      this.messageQueue.forEach(msg => this.addMessageFn(msg, "bot"));
-    }
+    const queued = this.messageQueue;
     this.messageQueue = [];
+    queued.forEach(data => this.handleIncomingMessage(data));
   },
 
-  handleIncomingMessage(data) {
-    if (this.uiReady && this.addMessageFn) {
-      this.addMessageFn(data, "bot");
+  // Streamed replies arrive as frames: {type: "chunk", id, delta} … {type: "done", id, text}
+  handleStreamFrame(frame) {
+    if (frame.type === "chunk") {
+      this.streamBuffers[frame.id] = (this.streamBuffers[frame.id] || "") + frame.delta;
+      this.streamMessageFn(frame.id, this.streamBuffers[frame.id], false);
     } else {
+      // "done" carries the full text, so late joiners still get the whole reply
+      delete this.streamBuffers[frame.id];
+      this.streamMessageFn(frame.id, frame.text, true);
+    }
+  },
+
+  // Returns false for events already delivered (e.g. replayed after a reconnect)
+  acceptEventId(eventId) {
+    const id = Number(eventId);
+    if (!id) return true;
+    if (this.seenEventIds.has(id)) return false;
+    this.seenEventIds.add(id);
+    if (this.seenEventIds.size > this.maxSeenEventIds) {
+      // Sets iterate in insertion order: forget the oldest
+      this.seenEventIds.delete(this.seenEventIds.values().next().value);
+    }
+    this.lastEventId = Math.max(this.lastEventId, id);
+    return true;
+  },
+
+  // WS frames are JSON: {event_id, type: "message", text} or a stream frame with event_id
+  handleWsFrame(data) {
+    let frame = null;
+    try {
+      frame = JSON.parse(data);
+    } catch (e) {
+      console.warn("[WS] Ignoring non-JSON frame", data);
+      return;
+    }
+    if (!frame || typeof frame !== "object") return;
+    if (!this.acceptEventId(frame.event_id)) return;
+    this.handleIncomingMessage(frame.type === "message" ? frame.text : frame);
+  },
+
+  resumeParam() {
+    return this.lastEventId ? `&last_event_id=${this.lastEventId}` : "";
+  },
+
+  // data is a plain message's text or a stream frame object
+  handleIncomingMessage(data) {
+    if (!this.uiReady || !this.addMessageFn) {
       this.messageQueue.push(data);
+      return;
+    }
+    if (typeof data !== "object") {
+      this.addMessageFn(data, "bot");
+    } else if (this.streamMessageFn) {
+      this.handleStreamFrame(data);
+    } else if (data.type === "done") {
+      this.addMessageFn(data.text, "bot");
     }
   },
 
@@ -58,7 +116,7 @@ export const ConnectionManager = {
     const protocol = window.location.protocol === "https:" ? "wss" : "ws";
     const host = window.location.host;
     const avatarParam = encodeURIComponent(avatarName || "FlowBot");
-    const wsUrl = `${protocol}://${host}/ws/flowbot?avatar=${avatarParam}&session=${sessionId}`;
+    const wsUrl = `${protocol}://${host}/ws/flowbot?avatar=${avatarParam}&session=${sessionId}${this.resumeParam()}`;
 
     console.log(`[WS] Connecting to ${wsUrl}`);
     this.ws = new WebSocket(wsUrl);
@@ -71,7 +129,7 @@ export const ConnectionManager = {
 
     this.ws.onmessage = (event) => {
       console.log("[WS] Received:", event.data);
-      this.handleIncomingMessage(event.data);
+      this.handleWsFrame(event.data);
     };
 
     this.ws.onerror = (err) => {
@@ -99,17 +157,31 @@ export const ConnectionManager = {
 
     console.log("[SSE] Starting SSE connection...");
     this.usingSSE = true;
-    this.eventSource = new EventSource(`/events?session=${sessionId}`);
+    // EventSource only resends Last-Event-ID on its own retries, so pass it explicitly too
+    this.eventSource = new EventSource(`/events?session=${sessionId}${this.resumeParam()}`);
 
     this.eventSource.onopen = () => {
       this._updateStatus("Connected via SSE", "orange");
       console.log(`[SSE] Connected. Session ID: ${sessionId}`);
     };
 
+    // Plain messages are "message" events carrying the text; stream frames
+    // are "chunk" / "done" events carrying JSON
     this.eventSource.onmessage = (event) => {
       console.log("[SSE] Received:", event.data);
+      if (!this.acceptEventId(event.lastEventId)) return;
       this.handleIncomingMessage(event.data);
     };
+    ["chunk", "done"].forEach(type => {
+      this.eventSource.addEventListener(type, (event) => {
+        if (!this.acceptEventId(event.lastEventId)) return;
+        try {
+          this.handleIncomingMessage(JSON.parse(event.data));
+        } catch (e) {
+          console.warn(`[SSE] Ignoring malformed ${type} event`, event.data);
+        }
+      });
+    });
 
     this.eventSource.onerror = () => {
       this._updateStatus("Disconnected", "red");
@@ -1,7 +1,7 @@
 import { sessionId } from './session.js';
 import { loadSiteProperties } from './config.js';
 import { ConnectionManager } from './connection.js';
-import { addMessage, updateStatus } from './ui.js';
+import { addMessage, upsertStreamingMessage, updateStatus } from './ui.js';
 import { initUI } from './events.js';
 
 document.addEventListener("DOMContentLoaded", async () => {
@@ -13,6 +13,7 @@ document.addEventListener("DOMContentLoaded", async () => {
 
   // 3️⃣ Inject UI hooks into ConnectionManager
   ConnectionManager.addMessageFn = addMessage;
+  ConnectionManager.streamMessageFn = upsertStreamingMessage;
   ConnectionManager.updateStatusFn = (text, color) => updateStatus(text, color, sessionId);
 
   // 4️⃣ Mark UI as ready and flush any queued bot messages
@@ -35,6 +35,23 @@ export function addMessage(text, sender) {
   messagesDiv.scrollTop = messagesDiv.scrollHeight;
 }
 
+// Create or update a bot bubble for a streamed reply, keyed by message id
+export function upsertStreamingMessage(id, text, done) {
+  let bubble = document.querySelector(`.bubble[data-stream-id="${id}"]`);
+  if (!bubble) {
+    addMessage(text, "bot");
+    const messagesDiv = document.getElementById("messages");
+    bubble = messagesDiv.lastElementChild.querySelector(".bubble");
+    bubble.dataset.streamId = id;
+  } else {
+    bubble.textContent = text;
+  }
+  bubble.classList.toggle("streaming", !done);
+
+  const messagesDiv = document.getElementById("messages");
+  messagesDiv.scrollTop = messagesDiv.scrollHeight;
+}
+
 export function addSystemMessage(text) {
   const messagesDiv = document.getElementById("messages");
   const msgDiv = document.createElement("div");
@@ -0,0 +1,41 @@
+"""
+📊 backfill_analytics.py — Rebuild the hourly analytics rollups from event_logs.
+
+Run once after deploying the rollups on an existing database, or any time
+the rollups need rebuilding. Archived events (EVENT_LOG_ARCHIVE_DIR) are
+included. The app can keep running on SQLite and Postgres: its event log
+flushes wait for the rebuild and are rolled up after it.
+
+Usage:
+    python scripts/backfill_analytics.py
+    DATABASE_URL=sqlite:///./permitflow.db python scripts/backfill_analytics.py --batch-size 10000
+"""
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+# --- Ensure project root is in sys.path ---
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from app.db.database import SessionLocal
+from app.db.init_db import init_db
+from app.services.analytics import BACKFILL_BATCH_SIZE, backfill_rollups
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Rebuild hourly analytics rollups")
+    parser.add_argument("--batch-size", type=int, default=BACKFILL_BATCH_SIZE, help="Events read per batch")
+    args = parser.parse_args()
+
+    init_db()  # creates hourly_rollups if missing
+    db = SessionLocal()
+    try:
+        print(json.dumps(backfill_rollups(db, batch_size=args.batch_size), indent=2))
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,467 @@
+"""
+🏎️ benchmark_chat_flow.py — Concurrent-session load generator for FlowBot.
+
+Drives N concurrent WebSocket or SSE sessions through a scripted
+conversation against a local server and reports throughput, per-stage
+latency percentiles and error rate as JSON.
+
+Usage:
+    # Against a running server
+    python scripts/benchmark_chat_flow.py --sessions 20 --transport ws
+
+    # Spawn a local server on the offline stub LLM with a throwaway database
+    python scripts/benchmark_chat_flow.py --spawn --sessions 50 --out bench.json
+
+    # Fail (exit 1) if any stage p95 regressed more than 20% vs a baseline
+    python scripts/benchmark_chat_flow.py --spawn --compare bench_main.json --max-regression 20
+
+Reports include the git commit and run settings so baselines stay comparable
+across commits.
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+import websockets
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+
+# ===== Conversation Scripts =====
+# (stage, message, expected reply substring or None)
+SCRIPTS: Dict[str, List[Tuple[str, str, Optional[str]]]] = {
+    # Permit to Build flow handled by FormManager
+    "permit_to_build": [
+        ("smalltalk", "list all tollgates", None),
+        ("start_application", "permit to build", "What is the name of your project?"),
+        ("field_project_name", "Project Apollo", None),
+        ("field_description", "A self-service data platform for analysts", None),
+        ("field_tech_stack", "Python, FastAPI and Postgres on Azure", None),
+        ("field_compliance", "Medium", None),
+        ("field_budget", "$250,000", None),
+        ("submit", "yes, submit it", None),
+    ],
+    # Steps used by devops/deploy_and_test.sh
+    "deploy_smoke": [
+        ("tg1_start", "Permit to Design", None),
+        ("purpose_reply", "The purpose is to expedite tollgate approvals for project managers", None),
+        ("service_name_reply", "The service name is PermitFlow", None),
+        ("owner_reply", "The owner is Bill Bettini", None),
+        ("data_class_reply", "The data classification is non private", None),
+    ],
+}
+
+# Run settings that must match for two reports to be comparable
+COMPARABLE_META = ("transport", "script", "sessions", "iterations", "think_ms", "llm_provider", "llm_stub_latency_ms")
+
+SME_SUMMARY_MARKER = "SME Reviews Complete"
+SUBMITTED_MARKER = "Application submitted!"
+
+
+# ===== Frame Parsing =====
+def parse_frame(raw: str) -> Tuple[str, Optional[str], str]:
+    """
+    Classify an incoming frame. Both clients deliver JSON frames: WS frames
+    as sent, SSE events converted to the same {"type", ...} shape.
+
+    Returns:
+        (kind, message_id, text) where kind is "message", "chunk" or "done".
+    """
+    frame = json.loads(raw)
+    if frame.get("type") in ("chunk", "done"):
+        text = frame.get("delta", "") if frame["type"] == "chunk" else frame.get("text", "")
+        return frame["type"], frame.get("id"), text
+    return "message", None, frame.get("text", "")
+
+
+# ===== Stats =====
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+class StageStats:
+    def __init__(self):
+        self.latencies_ms: List[float] = []
+        self.first_frame_ms: List[float] = []
+        self.errors = 0
+
+    def summary(self) -> Dict[str, Optional[float]]:
+        def r(v):
+            return round(v, 2) if v is not None else None
+        count = len(self.latencies_ms)
+        return {
+            "count": count,
+            "errors": self.errors,
+            "mean_ms": r(sum(self.latencies_ms) / count) if count else None,
+            "p50_ms": r(percentile(self.latencies_ms, 50)),
+            "p95_ms": r(percentile(self.latencies_ms, 95)),
+            "p99_ms": r(percentile(self.latencies_ms, 99)),
+            "first_frame_p50_ms": r(percentile(self.first_frame_ms, 50)),
+            "first_frame_p95_ms": r(percentile(self.first_frame_ms, 95)),
+        }
+
+
+class Recorder:
+    def __init__(self):
+        self.stages: Dict[str, StageStats] = {}
+        self.sessions_completed = 0
+        self.sessions_failed = 0
+
+    def stage(self, name: str) -> StageStats:
+        return self.stages.setdefault(name, StageStats())
+
+    def ok(self, name: str, started: float, first_frame: Optional[float]) -> None:
+        stats = self.stage(name)
+        now = time.perf_counter()
+        stats.latencies_ms.append((now - started) * 1000)
+        if first_frame is not None:
+            stats.first_frame_ms.append((first_frame - started) * 1000)
+
+    def error(self, name: str) -> None:
+        self.stage(name).errors += 1
+
+
+# ===== Transports =====
+class WSClient:
+    def __init__(self, base_url: str, session_id: str, avatar: str):
+        scheme = "wss" if base_url.startswith("https") else "ws"
+        host = base_url.split("://", 1)[1].rstrip("/")
+        self.url = f"{scheme}://{host}/ws/flowbot?avatar={avatar}&session={session_id}"
+        self.ws = None
+
+    async def connect(self) -> None:
+        self.ws = await websockets.connect(self.url, open_timeout=30, max_size=None)
+
+    async def send(self, text: str) -> None:
+        await self.ws.send(text)
+
+    async def recv(self) -> str:
+        return await self.ws.recv()
+
+    async def close(self) -> None:
+        if self.ws:
+            await self.ws.close()
+
+
+class SSEClient:
+    def __init__(self, base_url: str, session_id: str, avatar: str):
+        self.base_url = base_url.rstrip("/")
+        self.session_id = session_id
+        self.avatar = avatar
+        self.client = httpx.AsyncClient(timeout=None)
+        self.inbox: asyncio.Queue[str] = asyncio.Queue()
+        self._reader: Optional[asyncio.Task] = None
+        self._connected = asyncio.Event()
+
+    async def connect(self) -> None:
+        self._reader = asyncio.create_task(self._read())
+        await asyncio.wait_for(self._connected.wait(), timeout=30)
+
+    async def _read(self) -> None:
+        url = f"{self.base_url}/events"
+        async with self.client.stream("GET", url, params={"session": self.session_id}) as response:
+            self._connected.set()
+            event = "message"
+            data_lines: List[str] = []
+            async for line in response.aiter_lines():
+                if line.startswith("event:"):
+                    event = line[6:].strip()
+                elif line.startswith("data:"):
+                    data_lines.append(line[6:] if line.startswith("data: ") else line[5:])
+                elif line == "" and data_lines:
+                    data = "\n".join(data_lines)
+                    # "message" events carry plain text; stream events carry JSON frames
+                    await self.inbox.put(json.dumps({"type": "message", "text": data}) if event == "message" else data)
+                    event, data_lines = "message", []
+
+    async def send(self, text: str) -> None:
+        response = await self.client.post(
+            f"{self.base_url}/send",
+            params={"session": self.session_id, "avatar": self.avatar},
+            json={"text": text},
+        )
+        response.raise_for_status()
+
+    async def recv(self) -> str:
+        return await self.inbox.get()
+
+    async def close(self) -> None:
+        if self._reader:
+            self._reader.cancel()
+        await self.client.aclose()
+
+
+async def read_reply(client, timeout: float) -> Tuple[str, float]:
+    """
+    Read one logical reply (a plain message, or chunk frames up to "done").
+
+    Returns:
+        (reply text, perf_counter timestamp of the first frame)
+    """
+    first_frame = None
+    parts: List[str] = []
+    deadline = time.perf_counter() + timeout
+    while True:
+        remaining = deadline - time.perf_counter()
+        if remaining <= 0:
+            raise asyncio.TimeoutError()
+        raw = await asyncio.wait_for(client.recv(), timeout=remaining)
+        if first_frame is None:
+            first_frame = time.perf_counter()
+        kind, _, text = parse_frame(raw)
+        if kind == "message":
+            return text, first_frame
+        if kind == "chunk":
+            parts.append(text)
+        else:
+            return text or "".join(parts), first_frame
+
+
+# ===== Session Driver =====
+async def run_session(
+    index: int,
+    args: argparse.Namespace,
+    recorder: Recorder,
+    script: List[Tuple[str, str, Optional[str]]],
+) -> None:
+    session_id = f"bench-{uuid.uuid4().hex[:12]}"
+    client_cls = WSClient if args.transport == "ws" else SSEClient
+    client = client_cls(args.base_url, session_id, args.avatar)
+    failed = False
+
+    started = time.perf_counter()
+    try:
+        await client.connect()
+        first = None
+        if args.transport == "ws":
+            # The server greets every WebSocket connection
+            _, first = await read_reply(client, args.timeout)
+        recorder.ok("connect", started, first)
+    except Exception as e:
+        recorder.error("connect")
+        recorder.sessions_failed += 1
+        if args.verbose:
+            print(f"[session {index}] connect failed: {e!r}", file=sys.stderr)
+        await client.close()
+        return
+
+    try:
+        for stage, message, expected in script:
+            started = time.perf_counter()
+            try:
+                await client.send(message)
+                reply, first = await read_reply(client, args.timeout)
+                if expected and expected not in reply:
+                    raise ValueError(f"unexpected reply: {reply[:80]!r}")
+                recorder.ok(stage, started, first)
+            except Exception as e:
+                recorder.error(stage)
+                failed = True
+                if args.verbose:
+                    print(f"[session {index}] {stage} failed: {e!r}", file=sys.stderr)
+                break
+
+            # Background SME reviews push their outcome after the submit reply
+            if stage == "submit" and SUBMITTED_MARKER in reply:
+                try:
+                    reply, first = await read_reply(client, args.sme_timeout)
+                    if SME_SUMMARY_MARKER not in reply:
+                        raise ValueError(f"unexpected reply: {reply[:80]!r}")
+                    recorder.ok("sme_review", started, first)
+                except Exception as e:
+                    recorder.error("sme_review")
+                    failed = True
+                    if args.verbose:
+                        print(f"[session {index}] sme_review failed: {e!r}", file=sys.stderr)
+
+            if args.think_ms:
+                await asyncio.sleep(args.think_ms / 1000)
+    finally:
+        await client.close()
+
+    if failed:
+        recorder.sessions_failed += 1
+    else:
+        recorder.sessions_completed += 1
+
+
+# ===== Local Server =====
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def spawn_server(args: argparse.Namespace) -> Tuple[subprocess.Popen, str, tempfile.TemporaryDirectory]:
+    """Start uvicorn on the stub LLM with a throwaway SQLite database."""
+    workdir = tempfile.TemporaryDirectory(prefix="permitflow-bench-")
+    port = _free_port()
+    env = {
+        **os.environ,
+        "LLM_PROVIDER": os.environ.get("LLM_PROVIDER", "stub"),
+        "DATABASE_URL": os.environ.get("DATABASE_URL", f"sqlite:///{workdir.name}/bench.db"),
+        "PYTHONPATH": str(ROOT_DIR),
+    }
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1",
+         "--port", str(port), "--log-level", "warning"],
+        cwd=ROOT_DIR, env=env,
+        stdout=subprocess.DEVNULL if not args.verbose else None,
+        stderr=subprocess.DEVNULL if not args.verbose else None,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            if httpx.get(f"{base_url}/health", timeout=1).status_code == 200:
+                return proc, base_url, workdir
+        except httpx.HTTPError:
+            pass
+        if proc.poll() is not None:
+            break
+        time.sleep(0.2)
+    proc.terminate()
+    raise RuntimeError("Local server did not become healthy")
+
+
+# ===== Reporting =====
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT_DIR, text=True, stderr=subprocess.DEVNULL
+        ).strip()
+    except Exception:
+        return None
+
+
+def build_report(args: argparse.Namespace, recorder: Recorder, duration: float) -> dict:
+    turns = sum(len(s.latencies_ms) for name, s in recorder.stages.items() if name != "connect")
+    attempts = sum(len(s.latencies_ms) + s.errors for s in recorder.stages.values())
+    errors = sum(s.errors for s in recorder.stages.values())
+    return {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "base_url": args.base_url,
+            "transport": args.transport,
+            "script": args.script,
+            "sessions": args.sessions,
+            "iterations": args.iterations,
+            "think_ms": args.think_ms,
+            "llm_provider": os.environ.get("LLM_PROVIDER", "stub" if args.spawn else None),
+            "llm_stub_latency_ms": os.environ.get("LLM_STUB_LATENCY_MS"),
+        },
+        "totals": {
+            "duration_s": round(duration, 3),
+            "turns": turns,
+            "throughput_turns_per_s": round(turns / duration, 2) if duration else None,
+            "sessions_completed": recorder.sessions_completed,
+            "sessions_failed": recorder.sessions_failed,
+            "errors": errors,
+            "error_rate": round(errors / attempts, 4) if attempts else 0.0,
+        },
+        "stages": {name: stats.summary() for name, stats in recorder.stages.items()},
+    }
+
+
+def compare_reports(current: dict, baseline: dict, max_regression_pct: float) -> List[str]:
+    """Return human-readable regressions of stage p95 beyond the threshold."""
+    regressions = []
+    for stage, stats in current["stages"].items():
+        base = baseline.get("stages", {}).get(stage)
+        if not base or not base.get("p95_ms") or stats.get("p95_ms") is None:
+            continue
+        change = (stats["p95_ms"] - base["p95_ms"]) / base["p95_ms"] * 100
+        if change > max_regression_pct:
+            regressions.append(f"{stage}: p95 {base['p95_ms']}ms → {stats['p95_ms']}ms (+{change:.1f}%)")
+    base_rate = baseline.get("totals", {}).get("error_rate", 0.0)
+    if current["totals"]["error_rate"] > base_rate:
+        regressions.append(f"error_rate: {base_rate} → {current['totals']['error_rate']}")
+    return regressions
+
+
+# ===== Entry Point =====
+async def run(args: argparse.Namespace) -> dict:
+    recorder = Recorder()
+    script = SCRIPTS[args.script]
+    semaphore = asyncio.Semaphore(args.sessions)
+
+    async def bounded(i: int) -> None:
+        async with semaphore:
+            await run_session(i, args, recorder, script)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(bounded(i) for i in range(args.sessions * args.iterations)))
+    return build_report(args, recorder, time.perf_counter() - started)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="FlowBot concurrent-session benchmark")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000", help="Server to benchmark")
+    parser.add_argument("--spawn", action="store_true", help="Start a local server on the stub LLM")
+    parser.add_argument("--transport", choices=["ws", "sse"], default="ws")
+    parser.add_argument("--script", choices=sorted(SCRIPTS), default="permit_to_build")
+    parser.add_argument("--sessions", type=int, default=10, help="Concurrent sessions")
+    parser.add_argument("--iterations", type=int, default=1, help="Conversations per concurrent slot")
+    parser.add_argument("--avatar", default="FlowBot")
+    parser.add_argument("--think-ms", type=float, default=0, help="Pause between turns")
+    parser.add_argument("--timeout", type=float, default=60, help="Per-reply timeout (s)")
+    parser.add_argument("--sme-timeout", type=float, default=120, help="Wait for background SME results (s)")
+    parser.add_argument("--out", help="Write the JSON report to this file")
+    parser.add_argument("--compare", help="Baseline JSON report to compare against")
+    parser.add_argument("--max-regression", type=float, default=20.0, help="Allowed p95 regression (%%)")
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    proc = workdir = None
+    if args.spawn:
+        proc, args.base_url, workdir = spawn_server(args)
+    try:
+        report = asyncio.run(run(args))
+    finally:
+        if proc:
+            proc.terminate()
+            proc.wait(timeout=10)
+        if workdir:
+            workdir.cleanup()
+
+    output = json.dumps(report, indent=2)
+    if args.out:
+        Path(args.out).write_text(output + "\n", encoding="utf-8")
+    print(output)
+
+    if args.compare:
+        baseline = json.loads(Path(args.compare).read_text(encoding="utf-8"))
+        for key in COMPARABLE_META:
+            if baseline.get("meta", {}).get(key) != report["meta"].get(key):
+                print(f"⚠️ Baseline differs on {key}: {baseline.get('meta', {}).get(key)!r} "
+                      f"vs {report['meta'].get(key)!r}", file=sys.stderr)
+        regressions = compare_reports(report, baseline, args.max_regression)
+        if regressions:
+            print("\n❌ Regressions vs baseline:", file=sys.stderr)
+            for line in regressions:
+                print(f"  - {line}", file=sys.stderr)
+            return 1
+        print("\n✅ No regressions vs baseline", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,162 @@
+"""
+🗄️ benchmark_sqlite_writes.py — SQLite write-throughput benchmark.
+
+Runs a chat-turn-shaped DB workload (read the active application, merge a
+field into it, log an event, read it back) from several concurrent sessions
+in one or more worker processes, once per SQLite profile:
+
+- default: stock rollback journal, every session writes on its own connection
+- wal: WAL + pragmas (app/db/database.py), writes still race for the lock
+- wal_single_writer: WAL + pragmas + the per-worker single-writer queue
+
+and reports turns/s, latency percentiles and "database is locked" errors.
+
+Usage:
+    python scripts/benchmark_sqlite_writes.py
+    python scripts/benchmark_sqlite_writes.py --processes 4 --sessions 32 --turns 20 --out sqlite_bench.json
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+
+PROFILES: Dict[str, Dict[str, str]] = {
+    "default": {"SQLITE_PROFILE": "default", "DB_SINGLE_WRITER": "0"},
+    "wal": {"SQLITE_PROFILE": "wal", "DB_SINGLE_WRITER": "0"},
+    "wal_single_writer": {"SQLITE_PROFILE": "wal", "DB_SINGLE_WRITER": "1"},
+}
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, math.ceil(pct / 100 * len(ordered)) - 1)
+    return ordered[index]
+
+
+# ===== Worker Process =====
+async def run_worker(worker: int, sessions: int, turns: int) -> Dict:
+    from sqlalchemy.exc import OperationalError
+
+    from app.db.database import dispose_engines
+    from app.db.write_queue import write_queue
+    from app.services.application_service import AsyncApplicationService
+
+    latencies: List[float] = []
+    errors = {"locked": 0, "other": 0}
+
+    async def session(index: int) -> None:
+        session_id = f"bench-{worker}-{index}"
+        service = AsyncApplicationService()
+        try:
+            app = await service.create_application(session_id, "Permit to Build")
+            for turn in range(turns):
+                started = time.perf_counter()
+                try:
+                    active = await service.get_active_application_by_session(session_id)
+                    await service.update_application_data(active.id, {f"field_{turn}": "x" * 64})
+                    await service.log_event(app.id, "bench_turn", {"turn": turn})
+                    await service.get_application(app.id)
+                    latencies.append(time.perf_counter() - started)
+                except OperationalError as e:
+                    errors["locked" if "locked" in str(e) else "other"] += 1
+                finally:
+                    await service.close()
+        except OperationalError as e:
+            errors["locked" if "locked" in str(e) else "other"] += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(session(i) for i in range(sessions)))
+    elapsed = time.perf_counter() - started
+    await write_queue.stop()
+    await dispose_engines()
+    return {"turns": len(latencies), "elapsed": elapsed, "latencies": latencies, "errors": errors}
+
+
+# ===== Orchestration =====
+def run_profile(name: str, args: argparse.Namespace) -> Dict:
+    workdir = tempfile.mkdtemp(prefix=f"permitflow-sqlite-{name}-")
+    env = {
+        **os.environ,
+        **PROFILES[name],
+        "DATABASE_URL": f"sqlite:///{workdir}/bench.db",
+        "PYTHONPATH": str(ROOT_DIR),
+    }
+    subprocess.run(
+        [sys.executable, "-c", "from app.db.init_db import init_db; init_db()"],
+        env=env, cwd=ROOT_DIR, check=True, stdout=subprocess.DEVNULL)
+
+    started = time.perf_counter()
+    procs = [
+        subprocess.Popen(
+            [sys.executable, __file__, "--child", str(worker),
+             "--sessions", str(args.sessions), "--turns", str(args.turns)],
+            env=env, cwd=ROOT_DIR, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+        for worker in range(args.processes)
+    ]
+    results = [json.loads(proc.communicate()[0].strip().splitlines()[-1]) for proc in procs]
+    wall = time.perf_counter() - started
+
+    latencies = [lat for r in results for lat in r["latencies"]]
+    turns = sum(r["turns"] for r in results)
+    window = max(r["elapsed"] for r in results)
+    expected = args.processes * args.sessions * args.turns
+    return {
+        "profile": name,
+        "turns": turns,
+        "expected_turns": expected,
+        "turns_per_second": round(turns / window, 1) if window else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "locked_errors": sum(r["errors"]["locked"] for r in results),
+        "other_errors": sum(r["errors"]["other"] for r in results),
+        "wall_seconds": round(wall, 2),
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="SQLite write-throughput benchmark")
+    parser.add_argument("--processes", type=int, default=2, help="Worker processes sharing the DB file")
+    parser.add_argument("--sessions", type=int, default=16, help="Concurrent sessions per process")
+    parser.add_argument("--turns", type=int, default=15, help="Turns per session")
+    parser.add_argument("--profiles", default=",".join(PROFILES), help="Comma-separated profiles to run")
+    parser.add_argument("--out", help="Write the JSON report to this file")
+    parser.add_argument("--child", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child is not None:
+        result = asyncio.run(run_worker(args.child, args.sessions, args.turns))
+        print(json.dumps(result))
+        return 0
+
+    report = {
+        "settings": {"processes": args.processes, "sessions": args.sessions, "turns": args.turns},
+        "profiles": [run_profile(name, args) for name in args.profiles.split(",")],
+    }
+    baseline = report["profiles"][0]
+    for profile in report["profiles"][1:]:
+        if baseline["turns_per_second"]:
+            profile["speedup_vs_" + baseline["profile"]] = round(
+                profile["turns_per_second"] / baseline["turns_per_second"], 2)
+
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.out:
+        Path(args.out).write_text(output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,65 @@
+"""
+🗃️ event_retention.py — Run one event-log retention pass now.
+
+Compacts duplicate sme_decision payloads, then archives the events selected
+by the retention policies into gzip segments under EVENT_LOG_ARCHIVE_DIR and
+deletes them from the database. The app runs the same pass every
+EVENT_LOG_RETENTION_INTERVAL_SECONDS; use this to catch up or to apply a
+one-off policy.
+
+Usage:
+    python scripts/event_retention.py
+    python scripts/event_retention.py --retention-days 30 --max-rows 1000000
+    python scripts/event_retention.py --compact-only
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+# --- Ensure project root is in sys.path ---
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from app.db.database import dispose_engines
+from app.db.event_archive import get_event_archive
+from app.db.init_db import init_db
+from app.db.write_queue import write_queue
+from app.services.event_retention import (
+    EVENT_LOG_MAX_ROWS,
+    EVENT_LOG_RETENTION_DAYS,
+    EventLogRetention,
+)
+
+
+async def run(args: argparse.Namespace) -> dict:
+    retention = EventLogRetention(retention_days=args.retention_days, max_rows=args.max_rows)
+    try:
+        if args.compact_only:
+            result = {"compacted": await retention.compact()}
+        else:
+            result = await retention.run_once()
+            if result is None:
+                raise SystemExit("Another process is running retention")
+        return {**result, "archive": get_event_archive().stats()}
+    finally:
+        await write_queue.stop()
+        await dispose_engines()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compact and archive event_logs")
+    parser.add_argument("--retention-days", type=float, default=EVENT_LOG_RETENTION_DAYS,
+                        help="Archive events older than this (0 = no age limit)")
+    parser.add_argument("--max-rows", type=int, default=EVENT_LOG_MAX_ROWS,
+                        help="Archive the oldest events beyond this many rows (0 = no size limit)")
+    parser.add_argument("--compact-only", action="store_true", help="Only compact, archive nothing")
+    args = parser.parse_args()
+
+    init_db()
+    print(json.dumps(asyncio.run(run(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()